@@ -0,0 +1,118 @@
+# agents/cache.py
+# Small thread-safe LRU + TTL cache shared by the planning and API caching layers
+
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire `ttl` seconds after being stored.
+    With `stale_ttl`, expired entries are kept that much longer so callers can
+    serve them via get_stale() while refreshing in the background.
+    Tracks hit/miss/eviction/expiration counters for instrumentation.
+    `clock` returns the current time in seconds (injectable for tests).
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, stale_ttl: float = 0.0, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for key, or default if missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age > self.ttl:
+                if age > self.ttl + self.stale_ttl:
+                    del self._data[key]
+                    self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key) -> tuple:
+        """
+        Return (value, is_fresh). Entries past `ttl` but within `stale_ttl`
+        are returned with is_fresh=False; (None, False) when nothing usable.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age > self.ttl + self.stale_ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None, False
+            self._data.move_to_end(key)
+            if age > self.ttl:
+                self.stale_hits += 1
+                return value, False
+            self.hits += 1
+            return value, True
+
+    def set(self, key, value, stored_at: float = None):
+        """
+        Store value under key, evicting the least recently used entry if full.
+        """
+        with self._lock:
+            self._data[key] = (value, self.clock() if stored_at is None else stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> list:
+        """
+        Return (key, value, stored_at) for all unexpired entries, oldest first.
+        """
+        now = self.clock()
+        with self._lock:
+            return [(key, value, stored_at) for key, (value, stored_at) in self._data.items()
+                    if now - stored_at <= self.ttl]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._data)
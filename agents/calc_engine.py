@@ -0,0 +1,517 @@
+# agents/calc_engine.py
+# Safe arithmetic expression engine for calculator_agent
+#
+# Expressions are tokenized, parsed into a small tuple-based AST, validated
+# against an operator/function whitelist and compiled into nested closures.
+# Nothing is ever passed to eval(). Compiled evaluators are LRU-cached by
+# normalized expression text. The NumPy batch compiler built on the same AST
+# lives in agents/calc_vector.py.
+#
+# This module only imports the standard library: run as a script it is the
+# worker process behind evaluate(timeout=...), which reads one JSON
+# expression per line on stdin and answers with one JSON line on stdout.
+
+import atexit
+import json
+import math
+import operator
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+from functools import lru_cache
+
+# Resource limits for scalar evaluation, checked before evaluating:
+# - results are returned as floats, so integer results above MAX_DIGITS digits
+#   (at most the 309 digits of float range) are rejected;
+# - intermediate results (e.g. 10**500 % 7) may reach MAX_INTERMEDIATE_DIGITS;
+# - expressions estimated above INLINE_DIGITS run in a worker process with a
+#   hard TIMEOUT (seconds); smaller ones take microseconds and run inline.
+_FLOAT_MAX_DIGITS = math.log10(sys.float_info.max)
+MAX_DIGITS = int(os.getenv("CALC_MAX_DIGITS", "309"))
+MAX_INTERMEDIATE_DIGITS = int(os.getenv("CALC_MAX_INTERMEDIATE_DIGITS", "10000"))
+INLINE_DIGITS = int(os.getenv("CALC_INLINE_DIGITS", "2000"))
+TIMEOUT = float(os.getenv("CALC_TIMEOUT", "2.0"))
+WORKERS = int(os.getenv("CALC_WORKERS", "2"))
+
+BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': operator.floordiv,
+    '%': operator.mod,
+    '**': operator.pow,
+}
+
+UNARY_OPERATORS = {
+    '-': operator.neg,
+    '+': operator.pos,
+}
+
+# name -> (callable, min_args, max_args); max_args None means variadic
+FUNCTIONS = {
+    'sqrt': (math.sqrt, 1, 1),
+    'sin': (math.sin, 1, 1),
+    'cos': (math.cos, 1, 1),
+    'tan': (math.tan, 1, 1),
+    'log': (math.log, 1, 2),
+    'log10': (math.log10, 1, 1),
+    'exp': (math.exp, 1, 1),
+    'floor': (math.floor, 1, 1),
+    'ceil': (math.ceil, 1, 1),
+    'abs': (abs, 1, 1),
+    'round': (round, 1, 2),
+    'min': (min, 2, None),
+    'max': (max, 2, None),
+    'pow': (pow, 2, 2),
+    'factorial': (math.factorial, 1, 1),
+}
+
+CONSTANTS = {
+    'pi': math.pi,
+    'π': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+}
+
+# Spelled-out operators accepted in expressions, longest phrases first
+_WORD_OPERATORS = {
+    'to the power of': '**',
+    'divided by': '/',
+    'multiply': '*',
+    'plus': '+',
+    'minus': '-',
+    'times': '*',
+    'divide': '/',
+    'power': '**',
+}
+_WORD_OPERATOR_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(w) for w in _WORD_OPERATORS) + r')\b')
+_NAME_PATTERN = re.compile(r'(?<![\w.])[a-zA-Zπ_][a-zA-Z0-9_]*')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<placeholder>\#)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[a-zA-Zπ_][a-zA-Z0-9_]*)
+  | (?P<op>\*\*|//|[-+*/%^(),×÷√])
+  | (?P<space>\s+)
+''', re.VERBOSE)
+
+_OPERATOR_ALIASES = {'^': '**', '×': '*', '÷': '/'}
+
+class ExpressionError(ValueError):
+    """Raised for expressions that cannot be parsed, validated or evaluated."""
+    error_type = "invalid_expression"
+
+class CalculationTooExpensive(ExpressionError):
+    """Raised when an expression exceeds the magnitude or time limits."""
+    error_type = "too_expensive"
+
+def _normalize_text(text: str) -> str:
+    text = _WORD_OPERATOR_PATTERN.sub(lambda m: f" {_WORD_OPERATORS[m.group(1)]} ", text.lower())
+    return _WHITESPACE_PATTERN.sub(' ', text)
+
+def normalize(expression: str, names=()) -> str:
+    """
+    Lower-case, replace spelled-out operators and collapse whitespace.
+    Identifiers listed in names (template variables) are kept exactly as written.
+    """
+    if not names:
+        return _normalize_text(expression).strip()
+    parts = []
+    position = 0
+    for match in _NAME_PATTERN.finditer(expression):
+        if match.group() in names:
+            parts.append(_normalize_text(expression[position:match.start()]))
+            parts.append(match.group())
+            position = match.end()
+    parts.append(_normalize_text(expression[position:]))
+    return "".join(parts).strip()
+
+def tokenize(expression: str) -> list:
+    """
+    Split an expression into (kind, value) tokens. '#' placeholders (used for
+    batch templates) become names '#0', '#1', ... in order of appearance.
+    """
+    tokens = []
+    placeholders = 0
+    position = 0
+    while position < len(expression):
+        match = _TOKEN_PATTERN.match(expression, position)
+        if not match:
+            raise ExpressionError(f"Unexpected character '{expression[position]}'")
+        kind = match.lastgroup
+        value = match.group()
+        position = match.end()
+        if kind == 'space':
+            continue
+        if kind == 'placeholder':
+            tokens.append(('name', f"#{placeholders}"))
+            placeholders += 1
+        elif kind == 'number':
+            is_float = '.' in value or 'e' in value.lower()
+            tokens.append(('number', float(value) if is_float else int(value)))
+        elif kind == 'op':
+            tokens.append(('op', _OPERATOR_ALIASES.get(value, value)))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+class _Parser:
+    """
+    Recursive-descent parser producing tuple AST nodes:
+    ('num', value), ('name', id), ('unary', op, operand),
+    ('binary', op, left, right), ('call', id, [args])
+    """
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, value: str):
+        kind, token = self.take()
+        if token != value:
+            raise ExpressionError(f"Expected '{value}'")
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        node = self.expression()
+        if self.position != len(self.tokens):
+            raise ExpressionError(f"Unexpected token '{self.peek()[1]}'")
+        return node
+
+    def expression(self):
+        node = self.term()
+        while self.peek()[1] in ('+', '-'):
+            op = self.take()[1]
+            node = ('binary', op, node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek()[1] in ('*', '/', '//', '%'):
+            op = self.take()[1]
+            node = ('binary', op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek()[1] in ('+', '-'):
+            op = self.take()[1]
+            return ('unary', op, self.unary())
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self.peek()[1] == '**':
+            self.take()
+            # Right-associative, and the exponent may carry its own sign: 2**-1
+            node = ('binary', '**', node, self.unary())
+        return node
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return ('num', value)
+        if kind == 'name':
+            if self.peek()[1] == '(':
+                self.take()
+                args = []
+                if self.peek()[1] != ')':
+                    args.append(self.expression())
+                    while self.peek()[1] == ',':
+                        self.take()
+                        args.append(self.expression())
+                self.expect(')')
+                return ('call', value, args)
+            return ('name', value)
+        if value == '(':
+            node = self.expression()
+            self.expect(')')
+            return node
+        if value == '√':
+            return ('call', 'sqrt', [self.power()])
+        if value is None:
+            raise ExpressionError("Unexpected end of expression")
+        raise ExpressionError(f"Unexpected token '{value}'")
+
+def parse(expression: str):
+    """
+    Parse normalized expression text into an AST.
+    """
+    return _Parser(tokenize(expression)).parse()
+
+def validate(node, variables=()):
+    """
+    Check an AST against the operator/function/constant whitelist.
+    """
+    kind = node[0]
+    if kind == 'num':
+        return
+    if kind == 'name':
+        if node[1] not in CONSTANTS and node[1] not in variables:
+            raise ExpressionError(f"Unknown name '{node[1]}'")
+    elif kind == 'unary':
+        if node[1] not in UNARY_OPERATORS:
+            raise ExpressionError(f"Operator '{node[1]}' is not allowed")
+        validate(node[2], variables)
+    elif kind == 'binary':
+        if node[1] not in BINARY_OPERATORS:
+            raise ExpressionError(f"Operator '{node[1]}' is not allowed")
+        validate(node[2], variables)
+        validate(node[3], variables)
+    elif kind == 'call':
+        if node[1] not in FUNCTIONS:
+            raise ExpressionError(f"Function '{node[1]}' is not allowed")
+        _, min_args, max_args = FUNCTIONS[node[1]]
+        if len(node[2]) < min_args or (max_args is not None and len(node[2]) > max_args):
+            raise ExpressionError(f"Wrong number of arguments for {node[1]}()")
+        for arg in node[2]:
+            validate(arg, variables)
+    else:
+        raise ExpressionError(f"Unsupported expression node '{kind}'")
+
+def _compile(node):
+    kind = node[0]
+    if kind == 'num':
+        value = node[1]
+        return lambda: value
+    if kind == 'name':
+        value = CONSTANTS[node[1]]
+        return lambda: value
+    if kind == 'unary':
+        op = UNARY_OPERATORS[node[1]]
+        operand = _compile(node[2])
+        return lambda: op(operand())
+    if kind == 'binary':
+        op = BINARY_OPERATORS[node[1]]
+        left = _compile(node[2])
+        right = _compile(node[3])
+        return lambda: op(left(), right())
+    # call
+    func = FUNCTIONS[node[1]][0]
+    args = [_compile(arg) for arg in node[2]]
+    if len(args) == 1:
+        arg = args[0]
+        return lambda: func(arg())
+    return lambda: func(*[arg() for arg in args])
+
+# Upper bound (in decimal digits) of any float result; larger floats overflow immediately
+_FLOAT_DIGITS = 309.0
+_LOG10_2 = math.log10(2)
+
+def _ten_to(digits: float) -> float:
+    return math.inf if digits > 300 else 10.0 ** digits
+
+def estimate_digits(node) -> tuple:
+    """
+    Statically bound the size of an expression's result.
+    Returns (digits, is_int): an upper bound on log10(|result|) and whether the
+    result may be a Python int. Only int arithmetic (**, *, factorial) can grow
+    without bound; float results overflow at ~1e308 and are cheap to compute.
+    """
+    kind = node[0]
+    if kind == 'num':
+        value = node[1]
+        return (math.log10(abs(value)) if value else 0.0), isinstance(value, int)
+    if kind == 'name':
+        return math.log10(abs(CONSTANTS[node[1]])), False
+    if kind == 'unary':
+        return estimate_digits(node[2])
+    if kind == 'binary':
+        op = node[1]
+        left, left_int = estimate_digits(node[2])
+        right, right_int = estimate_digits(node[3])
+        is_int = left_int and right_int
+        if op in ('+', '-'):
+            digits = max(left, right) + _LOG10_2
+        elif op == '*':
+            digits = left + right
+        elif op == '//':
+            digits = left
+        elif op == '%':
+            digits = right
+        elif op == '**':
+            if node[3][0] == 'unary' and node[3][1] == '-':
+                # Negative int exponents produce a float
+                return 0.0, False
+            digits = _ten_to(right) * max(left, 0.0)
+        else:
+            is_int = False
+            digits = _FLOAT_DIGITS
+        return (digits if is_int else min(digits, _FLOAT_DIGITS)), is_int
+    # call
+    name = node[1]
+    args = [estimate_digits(arg) for arg in node[2]]
+    if name == 'factorial':
+        n = _ten_to(args[0][0])
+        return (math.lgamma(n + 1) / math.log(10) if n > 1 else 0.0), True
+    if name == 'pow':
+        (left, left_int), (right, right_int) = args
+        is_int = left_int and right_int
+        digits = _ten_to(right) * max(left, 0.0)
+        return (digits if is_int else min(digits, _FLOAT_DIGITS)), is_int
+    if name in ('abs', 'min', 'max', 'floor', 'ceil', 'round'):
+        return max(digits for digits, _ in args), any(is_int for _, is_int in args) or name in ('floor', 'ceil', 'round')
+    return _FLOAT_DIGITS, False
+
+def _children(node) -> tuple:
+    if node[0] == 'unary':
+        return (node[2],)
+    if node[0] == 'binary':
+        return node[2], node[3]
+    if node[0] == 'call':
+        return tuple(node[2])
+    return ()
+
+def peak_digits(node) -> float:
+    """
+    Largest estimated size over the expression and all of its subexpressions,
+    so huge intermediates (e.g. 9**9**9 % 7) are caught too.
+    """
+    digits, _ = estimate_digits(node)
+    if node[0] == 'call' and node[1] == 'round' and len(node[2]) == 2:
+        # round(int, -n) builds 10**n internally
+        ndigits, is_int = estimate_digits(node[2][1])
+        if is_int:
+            digits = max(digits, _ten_to(ndigits))
+    return max([digits] + [peak_digits(child) for child in _children(node)])
+
+def _describe_digits(digits: float) -> str:
+    # digits estimates log10(|value|); a value below 10**d has at most floor(d) + 1 digits
+    return f"up to {math.floor(digits) + 1:.3g}" if math.isfinite(digits) else "an astronomical number of"
+
+def check_cost(tree) -> float:
+    """
+    Raise CalculationTooExpensive if an integer result could exceed MAX_DIGITS
+    digits or any intermediate result could exceed MAX_INTERMEDIATE_DIGITS.
+    Returns the estimated peak digit count.
+    """
+    digits, is_int = estimate_digits(tree)
+    # digits is an upper bound on log10(|result|); a float holds up to ~10**308.25
+    if is_int and digits > min(MAX_DIGITS, _FLOAT_MAX_DIGITS):
+        raise CalculationTooExpensive(
+            f"Result would have {_describe_digits(digits)} digits (limit {MAX_DIGITS}, the range of a float)")
+    peak = peak_digits(tree)
+    if peak > MAX_INTERMEDIATE_DIGITS:
+        raise CalculationTooExpensive(
+            f"Intermediate result would have {_describe_digits(peak)} digits (limit {MAX_INTERMEDIATE_DIGITS})")
+    return peak
+
+@lru_cache(maxsize=2048)
+def compile_expression(expression: str) -> tuple:
+    """
+    Parse, validate, cost-check and compile normalized expression text into
+    (evaluator, estimated_digits). Results are LRU-cached per expression.
+    """
+    tree = parse(expression)
+    validate(tree)
+    digits = check_cost(tree)
+    return _compile(tree), digits
+
+def evaluate(expression: str, timeout: float = None) -> float:
+    """
+    Evaluate an arithmetic expression and return the result as a float.
+    With a timeout, expressions estimated above INLINE_DIGITS run in a worker
+    process that is killed if it exceeds the time limit.
+    """
+    normalized = normalize(expression)
+    try:
+        evaluator, digits = compile_expression(normalized)
+        if timeout and digits > INLINE_DIGITS:
+            return _evaluate_in_worker(normalized, timeout)
+        return float(evaluator())
+    except ExpressionError:
+        raise
+    except Exception as e:
+        raise ExpressionError(str(e)) from e
+
+class _Worker:
+    """A calc_engine.py subprocess evaluating one expression per line"""
+    def __init__(self):
+        # -I: no user site-packages or PYTHON* env, so the child imports only the stdlib
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", os.path.abspath(__file__)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1
+        )
+        self.replies = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.replies.put(json.loads(line))
+        self.replies.put(None)
+
+    def evaluate(self, expression: str, timeout: float) -> dict:
+        self.process.stdin.write(json.dumps(expression) + "\n")
+        self.process.stdin.flush()
+        reply = self.replies.get(timeout=timeout)
+        if reply is None:
+            raise OSError("Calculator worker exited unexpectedly")
+        return reply
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+# Idle workers are reused; at most WORKERS evaluations run in workers at once
+_idle_workers = queue.LifoQueue()
+_worker_slots = threading.BoundedSemaphore(WORKERS)
+
+def _evaluate_in_worker(expression: str, timeout: float) -> float:
+    if not _worker_slots.acquire(timeout=timeout):
+        raise CalculationTooExpensive("All calculator workers are busy")
+    try:
+        try:
+            worker = _idle_workers.get_nowait()
+        except queue.Empty:
+            worker = _Worker()
+        try:
+            reply = worker.evaluate(expression, timeout)
+        except queue.Empty:
+            # A stuck worker can't be interrupted; kill it and start fresh next time
+            worker.kill()
+            raise CalculationTooExpensive(f"Evaluation exceeded the {timeout:g}s time limit")
+        except OSError as e:
+            worker.kill()
+            raise ExpressionError(str(e)) from e
+        _idle_workers.put(worker)
+    finally:
+        _worker_slots.release()
+    if "error" in reply:
+        error_type = CalculationTooExpensive if reply["too_expensive"] else ExpressionError
+        raise error_type(reply["error"])
+    return reply["value"]
+
+@atexit.register
+def _stop_workers():
+    while True:
+        try:
+            _idle_workers.get_nowait().kill()
+        except queue.Empty:
+            return
+
+def _serve():
+    """Worker loop: one JSON expression in, one JSON {"value"} or {"error"} reply out"""
+    for line in sys.stdin:
+        try:
+            evaluator, _ = compile_expression(json.loads(line))
+            reply = {"value": float(evaluator())}
+        except Exception as e:
+            reply = {"error": str(e), "too_expensive": isinstance(e, CalculationTooExpensive)}
+        print(json.dumps(reply), flush=True)
+
+def cache_info():
+    return compile_expression.cache_info()
+
+if __name__ == "__main__":
+    _serve()
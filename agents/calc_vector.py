@@ -0,0 +1,150 @@
+# agents/calc_vector.py
+# NumPy batch evaluation on top of the calc_engine AST
+#
+# evaluate_template() runs one expression over arrays of variable bindings and
+# evaluate_batch() groups many expressions by shape (numbers abstracted away)
+# so each group is evaluated with a single vectorized pass. Kept apart from
+# calc_engine so its worker processes never import NumPy.
+
+import math
+import re
+from functools import lru_cache, reduce
+import numpy as np
+from .calc_engine import (
+    BINARY_OPERATORS, CONSTANTS, UNARY_OPERATORS, ExpressionError, _NAME_PATTERN,
+    evaluate, normalize, parse, validate
+)
+
+def _vector_log(x, base=None):
+    return np.log(x) if base is None else np.log(x) / np.log(base)
+
+def _vector_round(x, digits=None):
+    if digits is None:
+        return np.round(x)
+    if np.ndim(digits) == 0:
+        return np.round(x, int(digits))
+    scale = np.power(10.0, np.floor(digits))
+    return np.round(x * scale) / scale
+
+VECTOR_FUNCTIONS = {
+    'sqrt': np.sqrt,
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'log': _vector_log,
+    'log10': np.log10,
+    'exp': np.exp,
+    'floor': np.floor,
+    'ceil': np.ceil,
+    'abs': np.abs,
+    'round': _vector_round,
+    'min': lambda *args: reduce(np.minimum, args),
+    'max': lambda *args: reduce(np.maximum, args),
+    'pow': np.power,
+    # n! overflows float64 beyond 170, so larger arguments never compute a big int
+    'factorial': np.vectorize(
+        lambda n: float(math.factorial(int(n))) if 0 <= n <= 170 and n == int(n) else (math.inf if n > 170 else math.nan),
+        otypes=[np.float64]
+    ),
+}
+
+def _compile_vector(node, variables=()):
+    """
+    Compile an AST into a function of an environment dict of float64 arrays.
+    Variables shadow constants of the same name (e.g. a binding called "e").
+    """
+    kind = node[0]
+    if kind == 'num':
+        value = float(node[1])
+        return lambda env: value
+    if kind == 'name':
+        if node[1] in CONSTANTS and node[1] not in variables:
+            value = CONSTANTS[node[1]]
+            return lambda env: value
+        name = node[1]
+        return lambda env: env[name]
+    if kind == 'unary':
+        op = UNARY_OPERATORS[node[1]]
+        operand = _compile_vector(node[2], variables)
+        return lambda env: op(operand(env))
+    if kind == 'binary':
+        op = np.power if node[1] == '**' else BINARY_OPERATORS[node[1]]
+        left = _compile_vector(node[2], variables)
+        right = _compile_vector(node[3], variables)
+        return lambda env: op(left(env), right(env))
+    func = VECTOR_FUNCTIONS[node[1]]
+    args = [_compile_vector(arg, variables) for arg in node[2]]
+    return lambda env: func(*[arg(env) for arg in args])
+
+@lru_cache(maxsize=256)
+def compile_vectorized(expression: str, variables: tuple = ()):
+    """
+    Parse, validate and compile normalized expression text into a NumPy
+    evaluator taking {variable: array}. Results are LRU-cached.
+    """
+    tree = parse(expression)
+    validate(tree, variables)
+    return _compile_vector(tree, variables)
+
+def evaluate_template(expression: str, bindings: dict) -> tuple:
+    """
+    Evaluate one expression over arrays of variable bindings.
+    Returns (values, ok) float64 / bool arrays; ok is False where the result
+    is not finite (division by zero, overflow or a math domain error).
+    Variable names are case-sensitive and may shadow constants or operator words.
+    """
+    env = {name: np.asarray(values, dtype=np.float64) for name, values in bindings.items()}
+    for name in env:
+        if not _NAME_PATTERN.fullmatch(name):
+            raise ExpressionError(f"Invalid variable name '{name}'")
+    size = max((array.size for array in env.values()), default=1)
+    evaluator = compile_vectorized(normalize(expression, env), tuple(sorted(env)))
+    with np.errstate(all='ignore'):
+        values = np.broadcast_to(np.asarray(evaluator(env), dtype=np.float64), (size,)).copy()
+    return values, np.isfinite(values)
+
+# Numeric literals, excluding digits that are part of a name such as log10
+_NUMBER_LITERAL_PATTERN = re.compile(r'(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+def evaluate_batch(expressions: list) -> list:
+    """
+    Evaluate many expressions, grouping those with the same shape (e.g.
+    "2 + 3" and "40 + 2") into one vectorized evaluation per group.
+    Returns one (value, error) pair per expression, in input order.
+    """
+    results = [None] * len(expressions)
+    groups = {}
+    for index, expression in enumerate(expressions):
+        normalized = normalize(expression)
+        template = _NUMBER_LITERAL_PATTERN.sub('#', normalized)
+        group = groups.setdefault(template, ([], []))
+        group[0].append(index)
+        group[1].append(_NUMBER_LITERAL_PATTERN.findall(normalized))
+
+    for template, (indices, literals) in groups.items():
+        try:
+            placeholders = tuple(f"#{i}" for i in range(len(literals[0])))
+            evaluator = compile_vectorized(template, placeholders)
+            if placeholders:
+                columns = np.array(literals, dtype=np.float64).T
+                env = dict(zip(placeholders, columns))
+            else:
+                env = {}
+            with np.errstate(all='ignore'):
+                values = np.broadcast_to(np.asarray(evaluator(env), dtype=np.float64), (len(indices),))
+        except Exception as e:
+            for index in indices:
+                results[index] = (None, str(e))
+            continue
+
+        finite = np.isfinite(values)
+        for index, value, ok in zip(indices, values.tolist(), finite.tolist()):
+            if ok:
+                results[index] = (value, None)
+            else:
+                # Rare path: re-evaluate exactly to report the precise error (or big-int result)
+                try:
+                    results[index] = (evaluate(expressions[index]), None)
+                except Exception as e:
+                    results[index] = (None, str(e))
+    return results
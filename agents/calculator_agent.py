@@ -1,8 +1,70 @@
 # agents/calculator_agent.py
 
 import re
-import math
-import operator
+import numpy as np
+from . import calc_engine, calc_vector
+
+# Keys of the shared data dict this agent reads and writes (see agents/scheduler.py)
+READS = ["goal"]
+WRITES = ["calculation"]
+
+# Patterns used by perform_calculation / extract_math_expressions, compiled once at import
+# Applied to lower-cased text. Starting with a plain character class (the word boundary
+# is checked by the lookbehind) lets re skip ahead to candidate letters, so long
+# number lists are scanned ~10x faster than with a leading \b.
+_TRIGGER_WORDS = re.compile(r'[cswf](?<!\w.)(?:alculate|ompute|olve|hat\s+is|ind)\b')
+_SQRT_PATTERN = re.compile(r'(?:square\s+root\s+of|sqrt\s+of|√)\s+([\d.]+)', re.IGNORECASE)
+_POWER_PATTERN = re.compile(r'([\d.]+)\s+(?:to\s+the\s+power\s+of|power\s+of?|raised\s+to)\s+([\d.]+)', re.IGNORECASE)
+_TRIG_PATTERNS = [
+    (re.compile(rf'{func}(?:e)?\s+of\s+([\d.]+)', re.IGNORECASE),
+     'sin' if 'sin' in func else 'cos' if 'cos' in func else 'tan')
+    for func in ['sin', 'cos', 'tan', 'sine', 'cosine', 'tangent']
+]
+_LOG_PATTERN = re.compile(r'(?:log(?:arithm)?)\s+of\s+([\d.]+)', re.IGNORECASE)
+_FACTORIAL_PATTERN = re.compile(r'factorial\s+of\s+(\d+)|\b(\d+)\s*!(?!=)', re.IGNORECASE)
+_EQUALS_PATTERN = re.compile(r'(.+?)\s*=\s*(.+)')
+_FUNCTION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in [
+        r'sqrt\(\s*[\d.]+\s*\)',  # sqrt(number)
+        r'sin\(\s*[\d.]+\s*\)',   # sin(number)
+        r'cos\(\s*[\d.]+\s*\)',   # cos(number)
+        r'tan\(\s*[\d.]+\s*\)',   # tan(number)
+        r'log\(\s*[\d.]+\s*\)',   # log(number)
+        r'factorial\(\s*\d+\s*\)',  # factorial(number)
+        r'[\d.]+(?:\s*\^\s*[\d.]+)+',  # power: number^number (chains kept whole)
+        r'[\d.]+(?:\s*\*\*\s*[\d.]+)+', # power: number**number (chains kept whole)
+    ]
+]
+_ARITHMETIC_PATTERN = re.compile(r'[\d.]+\s*[+\-*/]\s*[\d.]+(?:\s*[+\-*/]\s*[\d.]+)*')
+_NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+# Aggregate verbs -> operation name; "90th percentile" carries its own q
+_STATISTIC_PATTERN = re.compile(
+    r'\b(?:(sum|total)|(mean|average|avg)|(median)|(std|stdev|standard\s+deviation)|(variance)'
+    r'|(min|minimum|smallest|lowest)|(max|maximum|largest|highest)'
+    r'|(\d+(?:\.\d+)?)(?:st|nd|rd|th)?\s+percentile)\b',
+    re.IGNORECASE
+)
+_STATISTIC_NAMES = ['sum', 'mean', 'median', 'std', 'variance', 'min', 'max', 'percentile']
+_SIGNED_NUMBER = r'-?\d+(?:\.\d+)?(?:e[+-]?\d+)?'
+# Two or more numbers separated by commas, semicolons, "and" or whitespace
+_NUMBER_LIST_PATTERN = re.compile(
+    rf'{_SIGNED_NUMBER}(?:(?:\s*[,;]\s*(?:and\s+)?|\s+(?:and\s+)?){_SIGNED_NUMBER})+',
+    re.IGNORECASE
+)
+_AND_PATTERN = re.compile(r'\band\b', re.IGNORECASE)
+
+# std/variance use the sample estimator (n - 1), matching spreadsheet STDEV/VAR
+STATISTICS = {
+    'sum': lambda values, q: np.sum(values),
+    'mean': lambda values, q: np.mean(values),
+    'median': lambda values, q: np.median(values),
+    'std': lambda values, q: np.std(values, ddof=1 if values.size > 1 else 0),
+    'variance': lambda values, q: np.var(values, ddof=1 if values.size > 1 else 0),
+    'min': lambda values, q: np.min(values),
+    'max': lambda values, q: np.max(values),
+    'percentile': lambda values, q: np.percentile(values, q),
+}
 
 def run(previous_data: dict) -> dict:
     """
@@ -27,20 +89,22 @@ def perform_calculation(text: str) -> dict:
         text = text.lower().strip()
         
         # Remove trigger words
-        text = re.sub(r'\b(calculate|compute|solve|what\s+is|find)\b', '', text, flags=re.IGNORECASE)
+        text = _TRIGGER_WORDS.sub('', text)
         text = text.strip()
         
+        # Aggregates over number lists ("average of 12, 15, 19") are computed with NumPy
+        results, text_without_lists = compute_statistics(text)
+        
         # Handle common math expressions
-        expressions = extract_math_expressions(text)
+        expressions = extract_math_expressions(text_without_lists)
         
-        if not expressions:
+        if not expressions and not results:
             return {
                 "success": False,
                 "error": "No mathematical expression found",
                 "input": text
             }
         
-        results = []
         for expr in expressions:
             try:
                 result = evaluate_expression(expr)
@@ -49,6 +113,13 @@ def perform_calculation(text: str) -> dict:
                     "result": result,
                     "success": True
                 })
+            except calc_engine.CalculationTooExpensive as e:
+                results.append({
+                    "expression": expr,
+                    "error": f"Too expensive to evaluate '{expr}': {str(e)}",
+                    "error_type": e.error_type,
+                    "success": False
+                })
             except Exception as e:
                 results.append({
                     "expression": expr,
@@ -70,6 +141,65 @@ def perform_calculation(text: str) -> dict:
             "input": text
         }
 
+def compute_statistics(text: str) -> tuple:
+    """
+    Find aggregate requests over number lists (sum, mean, median, std, variance,
+    min/max, Nth percentile) and compute them with NumPy. Aggregates apply to
+    the number list that follows them ("mean and median of 1, 2, 3").
+    Returns (results, remaining_text) where remaining_text has those lists removed.
+    """
+    results = []
+    remaining = []
+    position = 0
+    for list_match in _NUMBER_LIST_PATTERN.finditer(text):
+        # Only the text between lists is scanned for aggregate verbs
+        statistics = list(_STATISTIC_PATTERN.finditer(text, position, list_match.start()))
+        if not statistics:
+            continue
+        values = _parse_number_list(list_match.group(0))
+        for match in statistics:
+            operation = _STATISTIC_NAMES[match.lastindex - 1]
+            q = float(match.group(match.lastindex)) if operation == 'percentile' else None
+            results.append(_statistic_result(operation, q, values))
+        remaining.append(text[position:list_match.start()])
+        position = list_match.end()
+
+    if not results:
+        return [], text
+    remaining.append(text[position:])
+    return results, ' '.join(remaining)
+
+def _parse_number_list(span: str):
+    # The span matched _NUMBER_LIST_PATTERN, so only separators need replacing
+    span = span.replace(',', ' ').replace(';', ' ')
+    if 'and' in span.lower():
+        span = _AND_PATTERN.sub(' ', span)
+    return np.array(span.split(), dtype=float)
+
+def _statistic_result(operation: str, q, values) -> dict:
+    if q is not None and not 0 <= q <= 100:
+        return {
+            "expression": _describe_statistic(operation, q, values),
+            "error": f"Percentile must be between 0 and 100, got {q:g}",
+            "success": False
+        }
+    return {
+        "expression": _describe_statistic(operation, q, values),
+        "result": float(STATISTICS[operation](values, q)),
+        "success": True,
+        "operation": operation,
+        "count": int(values.size)
+    }
+
+def _describe_statistic(operation: str, q, values) -> str:
+    shown = ', '.join(f"{value:g}" for value in values[:5])
+    if values.size > 6:
+        shown = f"{shown}, ..., {values[-1]:g} ({values.size} values)"
+    elif values.size == 6:
+        shown = f"{shown}, {values[-1]:g}"
+    name = f"percentile_{q:g}" if operation == 'percentile' else operation
+    return f"{name}({shown})"
+
 def extract_math_expressions(text: str) -> list:
     """
     Extract mathematical expressions from text.
@@ -78,55 +208,34 @@ def extract_math_expressions(text: str) -> list:
     
     # Handle special text-based math functions first
     # Handle "square root of X" or "sqrt of X"
-    sqrt_pattern = r'(?:square\s+root\s+of|sqrt\s+of|√)\s+([\d.]+)'
-    sqrt_matches = re.findall(sqrt_pattern, text, re.IGNORECASE)
-    for match in sqrt_matches:
+    for match in _SQRT_PATTERN.findall(text):
         expressions.append(f"sqrt({match})")
     
     # Handle "X to the power of Y" or "X power Y"
-    power_pattern = r'([\d.]+)\s+(?:to\s+the\s+power\s+of|power\s+of?|raised\s+to)\s+([\d.]+)'
-    power_matches = re.findall(power_pattern, text, re.IGNORECASE)
-    for base, exp in power_matches:
+    for base, exp in _POWER_PATTERN.findall(text):
         expressions.append(f"{base}**{exp}")
     
     # Handle "sine/sin of X", "cosine/cos of X", etc.
-    trig_functions = ['sin', 'cos', 'tan', 'sine', 'cosine', 'tangent']
-    for func in trig_functions:
-        pattern = rf'{func}(?:e)?\s+of\s+([\d.]+)'
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            func_name = 'sin' if 'sin' in func else 'cos' if 'cos' in func else 'tan'
+    for pattern, func_name in _TRIG_PATTERNS:
+        for match in pattern.findall(text):
             expressions.append(f"{func_name}({match})")
     
     # Handle "log of X" or "logarithm of X"
-    log_pattern = r'(?:log(?:arithm)?)\s+of\s+([\d.]+)'
-    log_matches = re.findall(log_pattern, text, re.IGNORECASE)
-    for match in log_matches:
+    for match in _LOG_PATTERN.findall(text):
         expressions.append(f"log({match})")
-    
-    # Pattern for mathematical expressions (basic arithmetic)
-    math_pattern = r'[0-9+\-*/().\s=^%√πe]+'
-    
-    # Common math function patterns
-    function_patterns = [
-        r'sqrt\(\s*[\d.]+\s*\)',  # sqrt(number)
-        r'sin\(\s*[\d.]+\s*\)',   # sin(number)
-        r'cos\(\s*[\d.]+\s*\)',   # cos(number)
-        r'tan\(\s*[\d.]+\s*\)',   # tan(number)
-        r'log\(\s*[\d.]+\s*\)',   # log(number)
-        r'[\d.]+\s*\^\s*[\d.]+',  # power: number^number
-        r'[\d.]+\s*\*\*\s*[\d.]+', # power: number**number
-    ]
+
+    # Handle "factorial of X" or "X!"
+    for spelled, bang in _FACTORIAL_PATTERN.findall(text):
+        expressions.append(f"factorial({spelled or bang})")
     
     # Look for explicit expressions with equals sign
-    equals_match = re.search(r'(.+?)\s*=\s*(.+)', text)
+    equals_match = _EQUALS_PATTERN.search(text)
     if equals_match:
         expressions.append(equals_match.group(1).strip())
     
     # Look for function patterns
-    for pattern in function_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        expressions.extend(matches)
+    for pattern in _FUNCTION_PATTERNS:
+        expressions.extend(pattern.findall(text))
     
     # Look for basic arithmetic expressions
     # Remove already found expressions to avoid duplicates
@@ -135,12 +244,11 @@ def extract_math_expressions(text: str) -> list:
         remaining_text = remaining_text.replace(expr, '')
     
     # Find arithmetic expressions in remaining text
-    arithmetic_matches = re.findall(r'[\d.]+\s*[+\-*/]\s*[\d.]+(?:\s*[+\-*/]\s*[\d.]+)*', remaining_text)
-    expressions.extend(arithmetic_matches)
+    expressions.extend(_ARITHMETIC_PATTERN.findall(remaining_text))
     
     # If no expressions found, try to extract just numbers and assume basic arithmetic
     if not expressions:
-        numbers = re.findall(r'\b\d+(?:\.\d+)?\b', text)
+        numbers = _NUMBER_PATTERN.findall(text)
         if len(numbers) >= 2:
             # Look for operation context
             if any(word in text for word in ['plus', 'add', '+']):
@@ -160,60 +268,57 @@ def extract_math_expressions(text: str) -> list:
 def evaluate_expression(expression: str) -> float:
     """
     Safely evaluate mathematical expressions.
+    Parsed and compiled by agents/calc_engine.py against a whitelist; never uses eval.
+    Oversized results are rejected up front and slow evaluations are cut off
+    after calc_engine.TIMEOUT seconds (both raise CalculationTooExpensive).
     """
-    # Clean the expression
-    expression = expression.strip()
-    
-    # Replace common text with operators
-    replacements = {
-        'plus': '+',
-        'minus': '-',
-        'times': '*',
-        'multiply': '*',
-        'divided by': '/',
-        'divide': '/',
-        'power': '**',
-        'to the power of': '**',
-        '^': '**',
-        '×': '*',
-        '÷': '/',
-        'π': str(math.pi),
-        'pi': str(math.pi),
-        'e': str(math.e),
-        '√': 'sqrt'
-    }
-    
-    for old, new in replacements.items():
-        expression = expression.replace(old, new)
-    
-    # Handle sqrt function
-    expression = re.sub(r'sqrt\(([^)]+)\)', r'math.sqrt(\1)', expression)
-    
-    # Handle other math functions
-    math_functions = ['sin', 'cos', 'tan', 'log', 'log10', 'exp', 'floor', 'ceil', 'abs']
-    for func in math_functions:
-        pattern = f'{func}\\(([^)]+)\\)'
-        replacement = f'math.{func}(\\1)'
-        expression = re.sub(pattern, replacement, expression)
-    
-    # Create safe evaluation environment
-    safe_dict = {
-        "__builtins__": {},
-        "math": math,
-        "abs": abs,
-        "round": round,
-        "min": min,
-        "max": max,
-        "sum": sum,
-        "pow": pow
-    }
-    
     try:
-        # Evaluate the expression
-        result = eval(expression, safe_dict)
-        return float(result)
+        return calc_engine.evaluate(expression, timeout=calc_engine.TIMEOUT)
+    except calc_engine.CalculationTooExpensive:
+        raise
     except Exception as e:
-        raise ValueError(f"Cannot evaluate '{expression}': {str(e)}")
+        raise ValueError(f"Cannot evaluate '{expression.strip()}': {str(e)}")
+
+def calculate_batch(expressions: list) -> list:
+    """
+    Evaluate many expressions at once. Expressions with the same shape are
+    evaluated together with NumPy; returns one result dict per expression,
+    in the same format as perform_calculation's "calculations".
+    """
+    results = []
+    for expr, (value, error) in zip(expressions, calc_vector.evaluate_batch(expressions)):
+        if error is None:
+            results.append({"expression": expr, "result": value, "success": True})
+        else:
+            results.append({"expression": expr, "error": f"Cannot evaluate '{expr.strip()}': {error}", "success": False})
+    return results
+
+def calculate_template(expression: str, bindings: dict) -> dict:
+    """
+    Evaluate one expression template over arrays of variable bindings, e.g.
+    calculate_template("price * qty * (1 + tax)", {"price": [...], "qty": [...], "tax": [...]}).
+    Results that are not finite numbers are reported as None and listed in failed_indices.
+    """
+    try:
+        values, ok = calc_vector.evaluate_template(expression, bindings)
+    except Exception as e:
+        return {
+            "success": False,
+            "expression": expression,
+            "error": f"Cannot evaluate '{expression.strip()}': {str(e)}"
+        }
+
+    failed = (~ok).nonzero()[0]
+    results = values.tolist()
+    for index in failed.tolist():
+        results[index] = None
+    return {
+        "success": True,
+        "expression": expression,
+        "results": results,
+        "failed_indices": failed.tolist(),
+        "total_evaluations": len(results)
+    }
 
 if __name__ == "__main__":
     # Test the calculator agent
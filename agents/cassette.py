@@ -0,0 +1,244 @@
+# agents/cassette.py
+# Record/replay layer under http_client and llm_client for offline, deterministic runs.
+#
+#   AGENT_CASSETTE_MODE=record  real calls are made and each request/response pair is
+#                               written (with its timing) to AGENT_CASSETTE_DIR
+#   AGENT_CASSETTE_MODE=replay  responses are served from AGENT_CASSETTE_DIR; a request
+#                               that was never recorded raises CassetteMiss
+#   AGENT_CASSETTE_LATENCY      replay delay: "0" (default), "recorded", or fixed seconds
+#
+# Each interaction is stored as one JSON file named by a hash of the request, with API
+# keys redacted from both the stored request and the hash.
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+MODE = os.getenv("AGENT_CASSETTE_MODE", "off").lower()
+# Relative paths are anchored to the repo root so test-scripts/ (run from its own
+# directory) share the same fixtures
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            os.getenv("AGENT_CASSETTE_DIR", os.path.join("evals", "cassettes")))
+LATENCY = os.getenv("AGENT_CASSETTE_LATENCY", "0").lower()
+
+# Query parameters whose values are replaced before storing or hashing a URL
+SECRET_PARAMS = {"appid", "key", "api_key", "apikey", "access_token", "token"}
+REDACTED = "REDACTED"
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request that has no recording."""
+
+_stats_lock = threading.Lock()
+_stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+def recording() -> bool:
+    return MODE == "record"
+
+def replaying() -> bool:
+    return MODE == "replay"
+
+def redact_url(url: str) -> str:
+    """
+    URL with secret query values replaced and parameters sorted, so the same
+    request always maps to the same recording.
+    """
+    parts = urlsplit(url)
+    query = sorted((name, REDACTED if name.lower() in SECRET_PARAMS else value)
+                   for name, value in parse_qsl(parts.query, keep_blank_values=True))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+def _path(kind: str, request: dict) -> str:
+    digest = hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()[:24]
+    return os.path.join(CASSETTE_DIR, kind, f"{digest}.json")
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+def _save(kind: str, request: dict, response: dict, elapsed: float):
+    path = _path(kind, request)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "request": request,
+            "response": response,
+            "elapsed": round(elapsed, 4),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }, f, indent=2)
+    os.replace(tmp_path, path)
+    _count("recorded")
+
+def _load(kind: str, request: dict) -> dict:
+    path = _path(kind, request)
+    try:
+        with open(path, 'r') as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        _count("misses")
+        raise CassetteMiss(f"No {kind} recording for {json.dumps(request)[:200]} ({path})")
+    _count("replayed")
+    return entry
+
+def replay_delay(elapsed: float) -> float:
+    """
+    Seconds to wait before serving a replayed response.
+    """
+    if LATENCY == "recorded":
+        return elapsed
+    try:
+        return max(0.0, float(LATENCY))
+    except ValueError:
+        return 0.0
+
+def get_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats, mode=MODE, directory=CASSETTE_DIR)
+
+# --- HTTP -----------------------------------------------------------------
+
+def http_request(method: str, url: str) -> dict:
+    return {"method": method.upper(), "url": redact_url(url)}
+
+def record_http(method: str, url: str, status_code: int, headers, body: str, elapsed: float):
+    _save("http", http_request(method, url), {
+        "status_code": status_code,
+        "content_type": headers.get("content-type", ""),
+        "body": body
+    }, elapsed)
+
+def replay_http(method: str, url: str, sleep=True) -> dict:
+    """
+    Return the recorded {"status_code", "content_type", "body"} and its replay delay.
+    """
+    entry = _load("http", http_request(method, url))
+    delay = replay_delay(entry.get("elapsed", 0.0))
+    if sleep and delay:
+        time.sleep(delay)
+    return entry["response"], delay
+
+def to_requests_response(url: str, recorded: dict):
+    import requests
+    response = requests.Response()
+    response.status_code = recorded["status_code"]
+    response._content = recorded["body"].encode("utf-8")
+    response.headers["content-type"] = recorded.get("content_type", "")
+    response.encoding = "utf-8"
+    response.url = url
+    return response
+
+def to_httpx_response(url: str, recorded: dict):
+    import httpx
+    return httpx.Response(
+        recorded["status_code"],
+        content=recorded["body"].encode("utf-8"),
+        headers={"content-type": recorded.get("content_type", "")},
+        request=httpx.Request("GET", url)
+    )
+
+# --- LLM ------------------------------------------------------------------
+
+def _llm_request(model: str, temperature: float, max_tokens: int, messages) -> dict:
+    return {
+        "model": model,
+        "temperature": float(temperature),
+        "max_tokens": int(max_tokens),
+        "messages": [{"role": getattr(m, "type", "human"), "content": getattr(m, "content", str(m))}
+                     for m in messages]
+    }
+
+class CassetteLLM:
+    """
+    Stands in for a LangChain chat model: records calls to the wrapped model,
+    or replays them without one. Supports invoke/ainvoke/stream/astream.
+    """
+    def __init__(self, llm, model: str, temperature: float, max_tokens: int):
+        self.llm = llm
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def _request(self, messages) -> dict:
+        return _llm_request(self.model, self.temperature, self.max_tokens, messages)
+
+    def _replay(self, messages) -> tuple:
+        entry = _load("llm", self._request(messages))
+        response = entry["response"]
+        chunks = response.get("chunks") or [[entry.get("elapsed", 0.0), response["content"]]]
+        return response["content"], chunks, entry.get("elapsed", 0.0)
+
+    def invoke(self, messages, **kwargs):
+        from langchain_core.messages import AIMessage
+        if replaying():
+            content, _, elapsed = self._replay(messages)
+            delay = replay_delay(elapsed)
+            if delay:
+                time.sleep(delay)
+            return AIMessage(content=content)
+        start = time.perf_counter()
+        response = self.llm.invoke(messages, **kwargs)
+        _save("llm", self._request(messages), {"content": response.content}, time.perf_counter() - start)
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        from langchain_core.messages import AIMessage
+        if replaying():
+            content, _, elapsed = self._replay(messages)
+            delay = replay_delay(elapsed)
+            if delay:
+                await asyncio.sleep(delay)
+            return AIMessage(content=content)
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(messages, **kwargs)
+        _save("llm", self._request(messages), {"content": response.content}, time.perf_counter() - start)
+        return response
+
+    def _chunk_delays(self, chunks, elapsed: float) -> list:
+        # "recorded" latency replays the original chunk arrival times; a fixed latency
+        # is spent before the first chunk
+        if LATENCY == "recorded":
+            offsets = [offset for offset, _ in chunks]
+            return [later - earlier for earlier, later in zip([0.0] + offsets, offsets)]
+        return [replay_delay(elapsed)] + [0.0] * (len(chunks) - 1)
+
+    def stream(self, messages, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+        if replaying():
+            content, chunks, elapsed = self._replay(messages)
+            for (_, text), delay in zip(chunks, self._chunk_delays(chunks, elapsed)):
+                if delay > 0:
+                    time.sleep(delay)
+                yield AIMessageChunk(content=text)
+            return
+        start = time.perf_counter()
+        recorded = []
+        for chunk in self.llm.stream(messages, **kwargs):
+            recorded.append([round(time.perf_counter() - start, 4), chunk.content if isinstance(chunk.content, str) else ""])
+            yield chunk
+        _save("llm", self._request(messages), {
+            "content": "".join(text for _, text in recorded),
+            "chunks": recorded
+        }, time.perf_counter() - start)
+
+    async def astream(self, messages, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+        if replaying():
+            content, chunks, elapsed = self._replay(messages)
+            for (_, text), delay in zip(chunks, self._chunk_delays(chunks, elapsed)):
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield AIMessageChunk(content=text)
+            return
+        start = time.perf_counter()
+        recorded = []
+        async for chunk in self.llm.astream(messages, **kwargs):
+            recorded.append([round(time.perf_counter() - start, 4), chunk.content if isinstance(chunk.content, str) else ""])
+            yield chunk
+        _save("llm", self._request(messages), {
+            "content": "".join(text for _, text in recorded),
+            "chunks": recorded
+        }, time.perf_counter() - start)
@@ -1,7 +1,12 @@
 # agents/dictionary_agent.py
 
-import requests
 import re
+from . import http_client, tracing
+from .dictionary_store import get_store
+
+# Keys of the shared data dict this agent reads and writes (see agents/scheduler.py)
+READS = ["goal"]
+WRITES = ["definition"]
 
 def run(previous_data: dict) -> dict:
     """
@@ -17,6 +22,15 @@ def run(previous_data: dict) -> dict:
     previous_data.update({"definition": definition_result})
     return previous_data
 
+async def arun(previous_data: dict) -> dict:
+    """
+    Async variant of run using the shared async HTTP client.
+    """
+    goal = previous_data.get("goal", "")
+    definition_result = await aget_word_definition(goal)
+    previous_data.update({"definition": definition_result})
+    return previous_data
+
 def get_word_definition(text: str) -> dict:
     """
     Get word definition and related information from text input.
@@ -26,34 +40,58 @@ def get_word_definition(text: str) -> dict:
         word = extract_word_to_define(text)
         
         if not word:
-            return {
-                "success": False,
-                "error": "No word found to define",
-                "input": text
-            }
+            return _no_word_result(text)
         
         # Get definition from Free Dictionary API
         definition_data = fetch_definition(word)
+        return _definition_result(text, word, definition_data)
+            
+    except Exception as e:
+        return _error_result(text, e)
+
+async def aget_word_definition(text: str) -> dict:
+    """
+    Async variant of get_word_definition.
+    """
+    try:
+        word = extract_word_to_define(text)
         
-        if definition_data:
-            return {
-                "success": True,
-                "word": word,
-                "definitions": definition_data,
-                "input": text
-            }
-        else:
-            return {
-                "success": False,
-                "error": f"No definition found for '{word}'",
-                "word": word,
-                "input": text
-            }
+        if not word:
+            return _no_word_result(text)
+        
+        definition_data = await afetch_definition(word)
+        return _definition_result(text, word, definition_data)
             
     except Exception as e:
+        return _error_result(text, e)
+
+def _no_word_result(text: str) -> dict:
+    return {
+        "success": False,
+        "error": "No word found to define",
+        "input": text
+    }
+
+def _error_result(text: str, e: Exception) -> dict:
+    return {
+        "success": False,
+        "error": f"Dictionary error: {str(e)}",
+        "input": text
+    }
+
+def _definition_result(text: str, word: str, definition_data: list) -> dict:
+    if definition_data:
+        return {
+            "success": True,
+            "word": word,
+            "definitions": definition_data,
+            "input": text
+        }
+    else:
         return {
             "success": False,
-            "error": f"Dictionary error: {str(e)}",
+            "error": f"No definition found for '{word}'",
+            "word": word,
             "input": text
         }
 
@@ -94,23 +132,57 @@ def extract_word_to_define(text: str) -> str:
 
 def fetch_definition(word: str) -> list:
     """
-    Fetch word definition from Free Dictionary API.
+    Fetch word definition from the local store, falling back to the Free Dictionary API.
     """
+    store = get_store()
+    hit, definitions = store.lookup(word)
+    tracing.set_attribute("dictionary.store_hit", hit)
+    if hit:
+        return definitions
+
     try:
         # Use Free Dictionary API
         url = f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return parse_definition_data(data)
-        else:
-            return None
+        response = http_client.get(url, timeout=5)
+        return _store_response(store, word, response.status_code, response.json)
             
     except Exception as e:
         print(f"Error fetching definition: {e}")
         return None
 
+async def afetch_definition(word: str) -> list:
+    """
+    Async variant of fetch_definition.
+    """
+    store = get_store()
+    hit, definitions = store.lookup(word)
+    tracing.set_attribute("dictionary.store_hit", hit)
+    if hit:
+        return definitions
+
+    try:
+        url = f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}"
+        response = await http_client.aget(url, timeout=5)
+        return _store_response(store, word, response.status_code, response.json)
+            
+    except Exception as e:
+        print(f"Error fetching definition: {e}")
+        return None
+
+def _store_response(store, word: str, status_code: int, load_json) -> list:
+    """
+    Parse an API response and record it in the store. 404s are stored as
+    negative entries; other errors are not cached so they are retried.
+    """
+    if status_code == 200:
+        definitions = parse_definition_data(load_json())
+        if definitions:
+            store.put(word, definitions)
+        return definitions
+    elif status_code == 404:
+        store.put(word, None)
+    return None
+
 def parse_definition_data(api_data: list) -> list:
     """
     Parse and format definition data from API response.
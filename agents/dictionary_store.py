@@ -0,0 +1,172 @@
+# agents/dictionary_store.py
+# Persistent local store of parsed dictionary lookups, including negative (not-found) entries
+#
+# Usage:
+#   python -m agents.dictionary_store prewarm words.txt [--workers 8]
+#   python -m agents.dictionary_store stats
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from .cache import TTLCache
+
+DB_PATH = os.getenv("DICTIONARY_DB_PATH", ".cache/dictionary.sqlite3")
+# Definitions rarely change; not-found words are retried sooner in case they get added
+POSITIVE_TTL = float(os.getenv("DICTIONARY_TTL", str(30 * 86400)))
+NEGATIVE_TTL = float(os.getenv("DICTIONARY_NEGATIVE_TTL", "86400"))
+HOT_CACHE_SIZE = int(os.getenv("DICTIONARY_HOT_CACHE_SIZE", "4096"))
+
+def normalize_word(word: str) -> str:
+    return word.strip().lower()
+
+class DictionaryStore:
+    """
+    SQLite-backed store of word -> parsed definitions with an in-memory LRU in
+    front of it. A stored value of None records that the word was not found.
+    """
+    def __init__(self, path: str = DB_PATH, positive_ttl: float = POSITIVE_TTL,
+                 negative_ttl: float = NEGATIVE_TTL, hot_size: int = HOT_CACHE_SIZE):
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._hot = TTLCache(maxsize=hot_size, ttl=max(positive_ttl, negative_ttl))
+        self._lock = threading.Lock()
+        self._conn = self._connect(path)
+        self.db_hits = 0
+        self.negative_hits = 0
+        # Row counts by found flag: one scan at open, then kept up to date by put() so
+        # stats() (scraped by /metrics) never scans the table
+        self._stored = self._count_rows()
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Dictionary store unavailable at {path} ({e}), using in-memory store")
+            conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS definitions ("
+            "word TEXT PRIMARY KEY, payload TEXT, found INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _count_rows(self) -> dict:
+        with self._lock:
+            positive, negative = self._conn.execute(
+                "SELECT COALESCE(SUM(found), 0), COALESCE(SUM(1 - found), 0) FROM definitions"
+            ).fetchone()
+        return {True: positive, False: negative}
+
+    def lookup(self, word: str) -> tuple:
+        """
+        Return (hit, definitions). definitions is None for a cached not-found word.
+        """
+        key = normalize_word(word)
+        now = time.time()
+
+        entry = self._hot.get(key)
+        if entry is not None and entry[0] > now:
+            if entry[1] is None:
+                self.negative_hits += 1
+            return True, entry[1]
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, found, expires_at FROM definitions WHERE word = ?", (key,)
+            ).fetchone()
+        if row is None or row[2] <= now:
+            return False, None
+
+        definitions = json.loads(row[0]) if row[1] else None
+        self._hot.set(key, (row[2], definitions))
+        self.db_hits += 1
+        if definitions is None:
+            self.negative_hits += 1
+        return True, definitions
+
+    def put(self, word: str, definitions):
+        """
+        Store parsed definitions for word, or None to record a not-found word.
+        """
+        key = normalize_word(word)
+        found = definitions is not None
+        expires_at = time.time() + (self.positive_ttl if found else self.negative_ttl)
+        payload = json.dumps(definitions) if found else None
+        with self._lock:
+            previous = self._conn.execute("SELECT found FROM definitions WHERE word = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO definitions (word, payload, found, expires_at) VALUES (?, ?, ?, ?)",
+                (key, payload, int(found), expires_at)
+            )
+            if previous is not None:
+                self._stored[bool(previous[0])] -= 1
+            self._stored[found] += 1
+        self._hot.set(key, (expires_at, definitions))
+
+    def stats(self) -> dict:
+        with self._lock:
+            positive, negative = self._stored[True], self._stored[False]
+        return {
+            "path": self.path,
+            "stored_words": positive,
+            "stored_not_found": negative,
+            "db_hits": self.db_hits,
+            "negative_hits": self.negative_hits,
+            "hot_cache": self._hot.stats()
+        }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> DictionaryStore:
+    """
+    Return the process-wide store, opening the database on first use.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DictionaryStore()
+    return _store
+
+def prewarm(words: list, workers: int = 8) -> dict:
+    """
+    Look up every word so the store holds its definition (or not-found entry).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from .dictionary_agent import fetch_definition
+
+    words = sorted({normalize_word(word) for word in words if word.strip()})
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fetch_definition, words))
+    found = sum(1 for result in results if result)
+    return {"words": len(words), "found": found, "not_found": len(words) - found}
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local dictionary store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prewarm_parser = subparsers.add_parser("prewarm", help="Load definitions for a word list (one word per line)")
+    prewarm_parser.add_argument("word_file")
+    prewarm_parser.add_argument("--workers", type=int, default=8)
+    subparsers.add_parser("stats", help="Show store statistics")
+    args = parser.parse_args()
+
+    if args.command == "prewarm":
+        with open(args.word_file, 'r') as f:
+            words = f.read().split()
+        start_time = time.time()
+        summary = prewarm(words, workers=args.workers)
+        print(f"📖 Pre-warmed {summary['words']} words in {time.time() - start_time:.1f}s "
+              f"({summary['found']} found, {summary['not_found']} not found)")
+    else:
+        print(json.dumps(get_store().stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# agents/fake_llm.py
+# Local stand-in for the Gemini chat model, selected with LLM_BACKEND=fake (see llm_client.py).
+# Plans, summaries and validation JSON are built from the keyword rules in intent_rules.py,
+# and responses are paced by a configurable time-to-first-token and token rate, so the
+# planning and summary paths can be load tested without API quota.
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from langchain_core.messages import AIMessage, AIMessageChunk
+from . import intent_rules
+
+# Seconds before the first token
+TTFT = float(os.getenv("FAKE_LLM_TTFT", "0.3"))
+# Output tokens per second after the first one (0 = no delay)
+TOKENS_PER_SEC = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "50"))
+# Fraction of calls that fail before the first token, like a 429/503 from the API
+ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+# Seed for the error draws; unset means a different sequence each run
+SEED = os.getenv("FAKE_LLM_SEED")
+
+# One token per word plus its trailing whitespace (~1.3 real tokens, close enough for pacing)
+_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+_GOAL_PATTERN = re.compile(r'User Goal: "(.*?)"', re.DOTALL)
+_REQUEST_PATTERN = re.compile(r'Original User Request: "(.*?)"', re.DOTALL)
+
+# Data keys the validation response expects for each intent topic
+_TOPIC_KEYS = {
+    "spacex": "spacex",
+    "weather": "weather",
+    "calculation": "calculation",
+    "definition": "definition",
+    "news": "news"
+}
+
+class FakeLLMError(RuntimeError):
+    """Simulated Gemini API failure."""
+
+_random = random.Random(int(SEED) if SEED is not None else None)
+_random_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "errors": 0, "output_tokens": 0}
+
+def tokenize(text: str) -> list:
+    return _TOKEN_PATTERN.findall(text)
+
+def _should_fail() -> bool:
+    if ERROR_RATE <= 0:
+        return False
+    with _random_lock:
+        return _random.random() < ERROR_RATE
+
+def _record(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+def get_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats, ttft=TTFT, tokens_per_sec=TOKENS_PER_SEC, error_rate=ERROR_RATE)
+
+def plan_response(goal: str) -> str:
+    return ", ".join(intent_rules.plan(goal, default=["summary_agent"], short_goal_words=3))
+
+def validation_response(goal: str, collected: str) -> str:
+    missing = [key for topic, key in _TOPIC_KEYS.items()
+               if topic in intent_rules.topics(goal) and f'"{key}":' not in collected]
+    achieved = not missing
+    return json.dumps({
+        "goal_achieved": achieved,
+        "confidence": 90 if achieved else 50,
+        "missing_data": [f"{key} data" for key in missing],
+        "suggested_improvements": [] if achieved else ["Retry the agents that returned no data"],
+        "quality_score": 85 if achieved else 40
+    })
+
+def summary_response(context: str) -> str:
+    match = _REQUEST_PATTERN.search(context)
+    goal = match.group(1) if match else context.strip()
+    if intent_rules.classify(goal) == "conversational":
+        return ("Hello! 👋 I can look up SpaceX launches, launch-site weather, calculations, "
+                "definitions and news. What would you like to know?")
+    outputs = []
+    if "Individual Agent Outputs:" in context:
+        section = context.split("Individual Agent Outputs:", 1)[1].split("Complete Data Structure:", 1)[0]
+        outputs = [line.strip().lstrip("•").strip() for line in section.splitlines() if line.strip()]
+    lines = [f'Here is what I found for "{goal}":'] + [f"• {line}" for line in outputs[:12]]
+    lines.append("Let me know if I can help with anything else! 🚀")
+    return "\n".join(lines)
+
+def respond(system_prompt: str, user_message: str) -> str:
+    """
+    Rule-based response for the prompts main.py and GoogleADKCoordinator send.
+    """
+    if "comma-separated list of agent names" in system_prompt:
+        match = _GOAL_PATTERN.search(user_message)
+        return plan_response(match.group(1) if match else user_message)
+    if "goal_achieved" in system_prompt:
+        match = _GOAL_PATTERN.search(user_message)
+        return validation_response(match.group(1) if match else "", user_message)
+    return summary_response(user_message)
+
+class FakeChatModel:
+    """
+    Duck-typed replacement for ChatGoogleGenerativeAI: invoke/ainvoke/stream/astream
+    over a list of LangChain messages.
+    """
+    def __init__(self, model: str, temperature: float = 0.7, max_tokens: int = 1000):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def _generate(self, messages) -> tuple:
+        """
+        Return (tokens, usage) for the messages, or raise FakeLLMError.
+        """
+        _record("calls")
+        if _should_fail():
+            _record("errors")
+            raise FakeLLMError("Simulated Gemini error: 429 Resource has been exhausted")
+        system_prompt = "\n".join(m.content for m in messages if getattr(m, "type", "") == "system")
+        user_message = "\n".join(m.content for m in messages if getattr(m, "type", "") != "system")
+        tokens = tokenize(respond(system_prompt, user_message))[:self.max_tokens]
+        _record("output_tokens", len(tokens))
+        input_tokens = len(tokenize(system_prompt)) + len(tokenize(user_message))
+        usage = {"input_tokens": input_tokens, "output_tokens": len(tokens), "total_tokens": input_tokens + len(tokens)}
+        return tokens, usage
+
+    def _token_delay(self) -> float:
+        return 1.0 / TOKENS_PER_SEC if TOKENS_PER_SEC > 0 else 0.0
+
+    def _duration(self, tokens: list) -> float:
+        return TTFT + self._token_delay() * max(len(tokens) - 1, 0)
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        tokens, usage = self._generate(messages)
+        time.sleep(self._duration(tokens))
+        return AIMessage(content="".join(tokens), usage_metadata=usage)
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        tokens, usage = self._generate(messages)
+        await asyncio.sleep(self._duration(tokens))
+        return AIMessage(content="".join(tokens), usage_metadata=usage)
+
+    def stream(self, messages, **kwargs):
+        tokens, usage = self._generate(messages)
+        time.sleep(TTFT)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self._token_delay())
+            yield AIMessageChunk(content=token, usage_metadata=usage if i == len(tokens) - 1 else None)
+
+    async def astream(self, messages, **kwargs):
+        tokens, usage = self._generate(messages)
+        await asyncio.sleep(TTFT)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self._token_delay())
+            yield AIMessageChunk(content=token, usage_metadata=usage if i == len(tokens) - 1 else None)
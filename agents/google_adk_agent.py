@@ -3,11 +3,14 @@
 # This simulates Google ADK functionality for agent coordination
 # Enhanced with LangChain for improved AI workflow and responses
 
-import os
 import json
 from typing import Dict, List, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
+from . import intent_rules, llm_client, tracing
+from .plan_cache import plan_cache
+
+# Keys of the shared data dict this agent writes; it reads all collected data (see agents/scheduler.py)
+WRITES = ["adk_validation"]
 
 class GoogleADKCoordinator:
     """
@@ -15,34 +18,23 @@ class GoogleADKCoordinator:
     Uses LangChain's ChatGoogleGenerativeAI for intelligent agent planning and coordination
     """
     def __init__(self):
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        # Initialize LangChain ChatGoogleGenerativeAI model
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=api_key,
-            temperature=0.3,
-            max_tokens=1000
-        )
+        # Shared LangChain ChatGoogleGenerativeAI model from the process-wide registry
+        self.llm = llm_client.get_llm(temperature=0.3)
     
     def plan_agent_sequence(self, user_goal: str) -> List[str]:
         """
         Use LangChain's ChatGoogleGenerativeAI to intelligently plan agent sequence
         """
-        goal_lower = user_goal.lower().strip()
-        
         # Handle conversational inputs directly without AI planning
-        conversational_patterns = [
-            "hi", "hello", "hey", "good morning", "good afternoon", "good evening",
-            "how are you", "what's up", "what can you do", "help", "what are you",
-            "who are you", "thanks", "thank you", "bye", "goodbye", "ok", "okay"
-        ]
-        
-        if any(pattern in goal_lower for pattern in conversational_patterns) or len(goal_lower.split()) <= 3:
+        if intent_rules.classify(user_goal, short_goal_words=3) == "conversational":
+            tracing.set_attribute("adk.source", "conversational")
             return ["summary_agent"]  # Use only summary agent for conversational responses
         
+        cached_sequence = plan_cache.get(user_goal)
+        tracing.set_attribute("adk.cache_hit", bool(cached_sequence))
+        if cached_sequence:
+            return cached_sequence
+        
         # Create LangChain message chain for better context handling
         system_message = SystemMessage(
             content="""You are an intelligent agent planner for a multi-agent AI system. 
@@ -58,6 +50,7 @@ class GoogleADKCoordinator:
             Rules:
             - For greetings or simple questions, use only: summary_agent
             - For calculations/math (keywords: calculate, compute, solve, math): calculator_agent, summary_agent
+            - For statistics over a list of numbers (keywords: sum, average, mean, median, standard deviation, percentile, min/max of): calculator_agent, summary_agent
             - For definitions (keywords: define, meaning, what is): dictionary_agent, summary_agent
             - For SpaceX + weather requests: spacex_agent, weather_agent, summary_agent
             - For SpaceX only: spacex_agent, summary_agent
@@ -72,7 +65,9 @@ class GoogleADKCoordinator:
         )        
         try:
             # Use LangChain's invoke method for better response handling
-            response = self.llm.invoke([system_message, human_message])
+            with tracing.span("llm.invoke", kind="client", **{"llm.backend": llm_client.BACKEND}):
+                response = self.llm.invoke([system_message, human_message])
+            tracing.set_attribute("adk.source", "gemini")
             
             # Parse the response to extract agent names
             agent_list = [agent.strip() for agent in response.content.strip().split(',')]
@@ -82,27 +77,19 @@ class GoogleADKCoordinator:
             agent_list = [agent for agent in agent_list if agent in valid_agents]
             
             # Ensure we have at least one agent
-            if not agent_list:
+            if agent_list:
+                if llm_client.is_live():
+                    plan_cache.put(user_goal, agent_list)
+            else:
                 agent_list = ["summary_agent"]
                 
             return agent_list
             
         except Exception as e:
             print(f"⚠️ LangChain ADK Planning fallback due to: {e}")
-            # Fallback to simple planning with trigger word detection
-            if any(pattern in goal_lower for pattern in conversational_patterns):
-                return ["summary_agent"]
-            elif any(word in goal_lower for word in ["calculate", "compute", "solve", "math", "equation", "+", "-", "*", "/", "="]):
-                return ["calculator_agent", "summary_agent"]
-            elif any(word in goal_lower for word in ["define", "definition", "meaning", "what is", "what does", "dictionary"]):
-                return ["dictionary_agent", "summary_agent"]
-            elif "spacex" in goal_lower and "weather" in goal_lower:
-                return ["spacex_agent", "weather_agent", "summary_agent"]
-            elif "spacex" in goal_lower:
-                return ["spacex_agent", "summary_agent"]
-            elif "weather" in goal_lower:
-                return ["weather_agent", "summary_agent"]
-            return ["summary_agent"]  # Default to conversational response
+            tracing.set_attribute("adk.source", "intent_rules")
+            # Fallback to the shared keyword rules (agents/intent_rules.py)
+            return intent_rules.plan(user_goal, default=["summary_agent"])  # Default to conversational response
     
     def validate_goal_completion(self, user_goal: str, final_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -135,7 +122,8 @@ class GoogleADKCoordinator:
         
         try:
             # Use LangChain's invoke method for better response handling
-            response = self.llm.invoke([system_message, human_message])
+            with tracing.span("llm.invoke", kind="client", **{"llm.backend": llm_client.BACKEND}):
+                response = self.llm.invoke([system_message, human_message])
             
             # Clean and parse JSON response
             json_text = response.content.strip()
@@ -155,6 +143,7 @@ class GoogleADKCoordinator:
                 
         except Exception as e:
             print(f"⚠️ LangChain ADK Validation fallback due to: {e}")
+            tracing.set_attribute("adk.validation_fallback", True)
             return {
                 "goal_achieved": True,
                 "confidence": 80,
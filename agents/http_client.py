@@ -0,0 +1,224 @@
+# agents/http_client.py
+# Shared HTTP clients for the API agents
+#
+# Sync calls go through one pooled requests.Session per upstream host with
+# keep-alive, default connect/read timeouts and bounded retries with backoff.
+# Async calls share one httpx.AsyncClient per event loop with the same
+# timeouts and retry policy.
+# Both paths honour AGENT_CASSETTE_MODE (see cassette.py) for record/replay runs.
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import cassette, metrics, tracing
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Longest wait between retries, as urllib3's Retry.DEFAULT_BACKOFF_MAX
+MAX_BACKOFF = 120.0
+
+def _parse_pool_sizes(value: str) -> dict:
+    sizes = {}
+    for item in value.split(","):
+        if "=" in item:
+            host, size = item.split("=", 1)
+            sizes[host.strip()] = int(size)
+    return sizes
+
+# Per-host pool size overrides, e.g. "api.spacexdata.com=20,api.openweathermap.org=5"
+HOST_POOL_SIZES = _parse_pool_sizes(os.getenv("HTTP_POOL_SIZES", ""))
+
+DEFAULT_TIMEOUT = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+ASYNC_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def _build_session(host: str) -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False
+    )
+    pool_size = HOST_POOL_SIZES.get(host, POOL_SIZE)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_session(url: str) -> requests.Session:
+    """
+    Return the pooled Session for the URL's host, creating it on first use.
+    """
+    host = urlsplit(url).netloc
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _build_session(host)
+                _sessions[host] = session
+    return session
+
+def _full_url(url: str, params) -> str:
+    if not params:
+        return url
+    return requests.Request("GET", url, params=params).prepare().url
+
+def _http_span(url: str):
+    return tracing.span("HTTP GET", kind="client", **{
+        "http.request.method": "GET",
+        "server.address": urlsplit(url).netloc,
+        "url.full": cassette.redact_url(url)
+    })
+
+def _record_response(span, status_code: int, body: bytes):
+    span.set("http.response.status_code", status_code)
+    span.set("http.response.body.size", len(body))
+
+def get(url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    GET through the host's pooled Session with default timeouts and retries.
+    """
+    start_time = time.perf_counter()
+    status = "error"
+    try:
+        with _http_span(url) as span:
+            if cassette.replaying():
+                full_url = _full_url(url, kwargs.get("params"))
+                recorded, _ = cassette.replay_http("GET", full_url)
+                response = cassette.to_requests_response(full_url, recorded)
+                span.set("cassette", "replay")
+            else:
+                if timeout is None:
+                    timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+                response = get_session(url).get(url, timeout=timeout, **kwargs)
+                if cassette.recording():
+                    cassette.record_http("GET", response.url, response.status_code, response.headers,
+                                         response.text, time.perf_counter() - start_time)
+            _record_response(span, response.status_code, response.content)
+            status = response.status_code
+            return response
+    finally:
+        # Recorded here rather than from the span so calls outside a trace (e.g.
+        # background cache refreshes) are counted too
+        metrics.observe_upstream(urlsplit(url).netloc, status, time.perf_counter() - start_time)
+
+def close_sessions():
+    """
+    Close all pooled Sessions (their connections are reopened lazily).
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+# One (AsyncClient, lifetime generator) per event loop; an httpx client can't be shared across loops
+_async_clients = weakref.WeakKeyDictionary()
+
+async def _client_lifetime(client):
+    """
+    Parked for the loop's lifetime. asyncio.run() finalizes async generators
+    before closing the loop, which closes the client and its sockets.
+    """
+    try:
+        yield
+    finally:
+        _async_clients.pop(asyncio.get_running_loop(), None)
+        await client.aclose()
+
+async def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the pooled AsyncClient bound to the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None or entry[0].is_closed:
+        # Retries are handled by _send_with_retries, not the transport
+        transport = httpx.AsyncHTTPTransport(limits=ASYNC_LIMITS)
+        client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, transport=transport)
+        lifetime = _client_lifetime(client)
+        entry = _async_clients[loop] = (client, lifetime)
+        await lifetime.asend(None)
+    return entry[0]
+
+def _retry_delay(retry: int, response) -> float:
+    """
+    Seconds to wait before the given retry (1-based), following urllib3's Retry:
+    a numeric Retry-After header wins, otherwise exponential backoff after the first retry.
+    """
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    if retry_after.isdigit():
+        return min(float(retry_after), MAX_BACKOFF)
+    if retry <= 1:
+        return 0.0
+    return min(RETRY_BACKOFF * 2 ** (retry - 1), MAX_BACKOFF)
+
+async def _send_with_retries(url: str, **kwargs) -> httpx.Response:
+    """
+    Async GET with the sync Sessions' retry policy: connection errors, timeouts
+    and RETRY_STATUSES are retried up to MAX_RETRIES times with backoff, and
+    the last response is returned even if its status is still retryable.
+    """
+    client = await get_async_client()
+    for retry in range(1, MAX_RETRIES + 2):
+        response = None
+        try:
+            response = await client.get(url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or retry > MAX_RETRIES:
+                return response
+        except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError):
+            if retry > MAX_RETRIES:
+                raise
+        await asyncio.sleep(_retry_delay(retry, response))
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    """
+    Async GET through the loop's pooled client with default timeouts and retries.
+    """
+    start_time = time.perf_counter()
+    status = "error"
+    try:
+        with _http_span(url) as span:
+            if cassette.replaying():
+                full_url = _full_url(url, kwargs.get("params"))
+                recorded, delay = cassette.replay_http("GET", full_url, sleep=False)
+                if delay:
+                    await asyncio.sleep(delay)
+                response = cassette.to_httpx_response(full_url, recorded)
+                span.set("cassette", "replay")
+            else:
+                response = await _send_with_retries(url, **kwargs)
+                if cassette.recording():
+                    cassette.record_http("GET", str(response.url), response.status_code, response.headers,
+                                         response.text, time.perf_counter() - start_time)
+            _record_response(span, response.status_code, response.content)
+            status = response.status_code
+            return response
+    finally:
+        metrics.observe_upstream(urlsplit(url).netloc, status, time.perf_counter() - start_time)
+
+async def aclose():
+    """
+    Close the pooled AsyncClient of the running event loop.
+    """
+    entry = _async_clients.get(asyncio.get_running_loop())
+    if entry is not None:
+        await entry[1].aclose()
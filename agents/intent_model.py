@@ -0,0 +1,298 @@
+# agents/intent_model.py
+# Local multinomial Naive Bayes classifier that predicts the agent sequence for a goal,
+# so confident goals can skip the Gemini planning call.
+#
+# Usage:
+#   python -m agents.intent_model train [--goals evals/test_goals.json] [--log .cache/plan_log.jsonl] [--out .cache/intent_model.json]
+#   python -m agents.intent_model predict "Check the weather at Cape Canaveral"
+
+import argparse
+import atexit
+import json
+import math
+import os
+import queue
+import threading
+import time
+import numpy as np
+from .plan_cache import normalize_goal
+
+MODEL_PATH = os.getenv("INTENT_MODEL_PATH", ".cache/intent_model.json")
+# Goals planned by Gemini are appended here and used as training data; the log
+# is rotated to PLAN_LOG_PATH + ".1" once it reaches PLAN_LOG_MAX_BYTES
+PLAN_LOG_PATH = os.getenv("INTENT_PLAN_LOG", ".cache/plan_log.jsonl")
+PLAN_LOG_MAX_BYTES = int(os.getenv("INTENT_PLAN_LOG_MAX_BYTES", "5000000"))
+GOALS_PATH = "evals/test_goals.json"
+# Predictions below this posterior probability go to Gemini
+THRESHOLD = float(os.getenv("INTENT_MODEL_THRESHOLD", "0.9"))
+# Fraction of a goal's n-grams the model must have seen before it is trusted
+MIN_COVERAGE = float(os.getenv("INTENT_MODEL_MIN_COVERAGE", "0.5"))
+
+# Canonical agent order; every training sequence is rewritten in this order
+AGENT_ORDER = ["spacex_agent", "weather_agent", "calculator_agent", "dictionary_agent", "news_agent", "summary_agent"]
+KEY_AGENTS = {
+    "spacex": "spacex_agent",
+    "weather": "weather_agent",
+    "calculation": "calculator_agent",
+    "definition": "dictionary_agent",
+    "news": "news_agent",
+    "summary": "summary_agent"
+}
+
+def canonical_sequence(agents) -> list:
+    """
+    One label per set of agents: known agents in AGENT_ORDER, always ending with
+    summary_agent (as every Gemini plan does). Evals expected_keys and Gemini's
+    own ordering would otherwise train the same intent as different classes.
+    """
+    agents = set(agents) | {"summary_agent"}
+    return [agent for agent in AGENT_ORDER if agent in agents]
+
+def features(goal: str) -> list:
+    """
+    Word unigrams and bigrams of the normalized goal.
+    """
+    words = normalize_goal(goal).split()
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+class IntentModel:
+    """
+    Multinomial Naive Bayes over goal n-grams; each class is an agent sequence.
+    """
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.classes = []
+        self.vocabulary = {}
+        self.class_counts = []
+        self.feature_counts = []  # per class: {feature index: count}
+        self._log_prior = None
+        self._log_prob = None
+
+    def fit(self, goals: list, sequences: list) -> "IntentModel":
+        labels = [",".join(sequence) for sequence in sequences]
+        self.classes = sorted(set(labels))
+        class_index = {label: i for i, label in enumerate(self.classes)}
+        self.vocabulary = {}
+        self.class_counts = [0] * len(self.classes)
+        self.feature_counts = [{} for _ in self.classes]
+        for goal, label in zip(goals, labels):
+            c = class_index[label]
+            self.class_counts[c] += 1
+            counts = self.feature_counts[c]
+            for feature in features(goal):
+                i = self.vocabulary.setdefault(feature, len(self.vocabulary))
+                counts[i] = counts.get(i, 0) + 1
+        self._build()
+        return self
+
+    def _build(self):
+        counts = np.zeros((len(self.classes), len(self.vocabulary)))
+        for c, class_features in enumerate(self.feature_counts):
+            for i, count in class_features.items():
+                counts[c, i] = count
+        smoothed = counts + self.alpha
+        self._log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+        class_counts = np.asarray(self.class_counts, dtype=float)
+        self._log_prior = np.log(class_counts) - math.log(class_counts.sum())
+
+    def predict(self, goal: str) -> tuple:
+        """
+        Return (sequence, confidence, coverage); sequence is None for an empty model.
+        """
+        if not self.classes:
+            return None, 0.0, 0.0
+        goal_features = features(goal)
+        known = [self.vocabulary[f] for f in goal_features if f in self.vocabulary]
+        coverage = len(known) / len(goal_features) if goal_features else 0.0
+        scores = self._log_prior + self._log_prob[:, known].sum(axis=1)
+        posterior = np.exp(scores - scores.max())
+        posterior /= posterior.sum()
+        best = int(posterior.argmax())
+        return self.classes[best].split(","), float(posterior[best]), coverage
+
+    def to_dict(self) -> dict:
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        return {
+            "version": 1,
+            "alpha": self.alpha,
+            "classes": self.classes,
+            "class_counts": self.class_counts,
+            "vocabulary": vocabulary,
+            # Sparse counts, flattened as [index, count, index, count, ...]
+            "feature_counts": [[n for item in sorted(counts.items()) for n in item] for counts in self.feature_counts]
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "IntentModel":
+        model = cls(alpha=payload["alpha"])
+        model.classes = payload["classes"]
+        model.class_counts = payload["class_counts"]
+        model.vocabulary = {feature: i for i, feature in enumerate(payload["vocabulary"])}
+        model.feature_counts = [dict(zip(flat[::2], flat[1::2])) for flat in payload["feature_counts"]]
+        model._build()
+        return model
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentModel":
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+def load_training_data(goals_path: str = GOALS_PATH, log_path: str = PLAN_LOG_PATH) -> tuple:
+    """
+    Read (goals, sequences) from the evals goal file and the production plan log
+    (including its rotated copy), with every sequence in canonical form.
+    """
+    goals, sequences = [], []
+    if goals_path and os.path.exists(goals_path):
+        with open(goals_path, 'r') as f:
+            for case in json.load(f):
+                agents = {KEY_AGENTS[key] for key in case.get("expected_keys", []) if key in KEY_AGENTS}
+                if agents:
+                    goals.append(case["goal"])
+                    sequences.append(canonical_sequence(agents))
+    for path in ([f"{log_path}.1", log_path] if log_path else []):
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("goal") and entry.get("sequence"):
+                    goals.append(entry["goal"])
+                    sequences.append(canonical_sequence(entry["sequence"]))
+    return goals, sequences
+
+# Plan log lines are written by a background thread so requests never wait on the file
+_log_queue = queue.Queue(maxsize=1000)
+_log_thread = None
+_log_thread_lock = threading.Lock()
+
+def log_plan(goal: str, sequence: list, path: str = None):
+    """
+    Queue a planned goal for the production plan log used for retraining.
+    Never blocks; entries are dropped if the writer falls behind.
+    """
+    global _log_thread
+    line = json.dumps({"goal": goal, "sequence": sequence, "ts": round(time.time(), 3)})
+    with _log_thread_lock:
+        if _log_thread is None:
+            _log_thread = threading.Thread(target=_write_plan_log, name="plan-log-writer", daemon=True)
+            _log_thread.start()
+    try:
+        _log_queue.put_nowait((path or PLAN_LOG_PATH, line))
+    except queue.Full:
+        print("⚠️ Plan log queue is full, dropping entry")
+
+def _write_plan_log():
+    while True:
+        batch = [_log_queue.get()]
+        while True:
+            try:
+                batch.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        lines_by_path = {}
+        for path, line in batch:
+            lines_by_path.setdefault(path, []).append(line + "\n")
+        for path, lines in lines_by_path.items():
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(path) and os.path.getsize(path) >= PLAN_LOG_MAX_BYTES:
+                    os.replace(path, f"{path}.1")
+                with open(path, 'a') as f:
+                    f.writelines(lines)
+            except OSError as e:
+                print(f"⚠️ Could not write plan log {path}: {e}")
+        for _ in batch:
+            _log_queue.task_done()
+
+@atexit.register
+def flush_plan_log():
+    """
+    Block until every queued plan log entry has been written.
+    """
+    if _log_thread is not None:
+        _log_queue.join()
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """
+    Return the trained model from MODEL_PATH, or None if none has been trained.
+    The file is reloaded whenever it changes, so retraining needs no restart.
+    """
+    global _model, _model_mtime
+    try:
+        mtime = os.stat(MODEL_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime != _model_mtime:
+        with _model_lock:
+            if mtime != _model_mtime:
+                model = None
+                if mtime is not None:
+                    try:
+                        model = IntentModel.load(MODEL_PATH)
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"⚠️ Could not load intent model {MODEL_PATH}: {e}")
+                _model, _model_mtime = model, mtime
+    return _model
+
+def predict(goal: str) -> tuple:
+    """
+    Return (sequence, confidence). sequence is None unless the model is
+    confident (>= THRESHOLD) and has seen enough of the goal's n-grams.
+    """
+    model = get_model()
+    if model is None:
+        return None, 0.0
+    sequence, confidence, coverage = model.predict(goal)
+    if confidence < THRESHOLD or coverage < MIN_COVERAGE:
+        return None, confidence
+    return sequence, confidence
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or query the local intent model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="Train from evals goals and the production plan log")
+    train_parser.add_argument("--goals", default=GOALS_PATH)
+    train_parser.add_argument("--log", default=PLAN_LOG_PATH)
+    train_parser.add_argument("--out", default=MODEL_PATH)
+    train_parser.add_argument("--alpha", type=float, default=1.0)
+    predict_parser = subparsers.add_parser("predict", help="Predict the agent sequence for a goal")
+    predict_parser.add_argument("goal")
+    predict_parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        goals, sequences = load_training_data(args.goals, args.log)
+        if not goals:
+            parser.error("no training data found")
+        model = IntentModel(alpha=args.alpha).fit(goals, sequences)
+        model.save(args.out)
+        print(f"🧠 Trained on {len(goals)} goals, {len(model.classes)} agent sequences, "
+              f"{len(model.vocabulary)} features → {args.out} ({os.path.getsize(args.out)} bytes)")
+    else:
+        start_time = time.perf_counter()
+        model = IntentModel.load(args.model)
+        load_ms = (time.perf_counter() - start_time) * 1000
+        sequence, confidence, coverage = model.predict(args.goal)
+        print(f"🎯 {sequence} (confidence {confidence:.2f}, coverage {coverage:.2f}, loaded in {load_ms:.1f}ms)")
+
+if __name__ == "__main__":
+    main()
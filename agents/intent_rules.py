@@ -0,0 +1,144 @@
+# agents/intent_rules.py
+# Declarative keyword rules shared by planner.plan and the ADK fallback planner.
+# All keywords are compiled into one Aho-Corasick automaton, so a goal is
+# classified in a single pass over its text.
+
+# Topic -> keywords. Keywords made of letters/digits only match whole words;
+# symbols (e.g. "+") match anywhere.
+KEYWORDS = {
+    "conversational": [
+        "hi", "hello", "hey", "good morning", "good afternoon", "good evening",
+        "how are you", "what's up", "what can you do", "help", "what are you",
+        "who are you", "thanks", "thank you", "bye", "goodbye", "ok", "okay"
+    ],
+    "calculation": [
+        "calculate", "compute", "solve", "math", "equation", "+", " - ", "*", "/", "=", "^",
+        "average", "mean of", "median", "standard deviation", "percentile", "sum of",
+        "minimum of", "maximum of"
+    ],
+    "definition": ["define", "definition", "meaning", "dictionary", "what does"],
+    "spacex": ["spacex", "launch", "rocket", "mission"],
+    "weather": ["weather", "temperature", "climate", "forecast", "condition", "conditions"],
+    "news": ["news", "article", "headlines", "current events"],
+    "question": ["what is"],
+}
+
+# (intent, topics that must all be present, agent sequence), in priority order
+INTENTS = [
+    ("conversational", {"conversational"}, ["summary_agent"]),
+    ("calculation", {"calculation"}, ["calculator_agent", "summary_agent"]),
+    ("definition", {"definition"}, ["dictionary_agent", "summary_agent"]),
+    ("spacex_weather", {"spacex", "weather"}, ["spacex_agent", "weather_agent", "summary_agent"]),
+    ("weather", {"weather"}, ["weather_agent", "summary_agent"]),
+    ("spacex", {"spacex"}, ["spacex_agent", "summary_agent"]),
+    ("news", {"news"}, ["news_agent", "summary_agent"]),
+    # A bare "what is ..." with no other topic is treated as a lookup
+    ("question", {"question"}, ["dictionary_agent", "summary_agent"]),
+]
+
+_SEQUENCES = {intent: sequence for intent, _, sequence in INTENTS}
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a set of keywords, each tagged with a label.
+    find_labels() returns the labels of all keywords found in a text.
+    """
+    def __init__(self, keywords: dict):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(length, label, check_start, check_end)]
+        for label, words in keywords.items():
+            for word in words:
+                self._add(word.lower(), label)
+        self._build_failure_links()
+
+    def _add(self, word: str, label: str):
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(word), label, word[0].isalnum(), word[-1].isalnum()))
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_labels(self, text: str) -> set:
+        """
+        Return the labels of all keywords occurring in text (expected lowercase).
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        labels = set()
+        state = 0
+        last = len(text) - 1
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, label, check_start, check_end in output[state]:
+                if label in labels:
+                    continue
+                start = end - length + 1
+                if check_start and start > 0 and text[start - 1].isalnum():
+                    continue
+                if check_end and end < last and text[end + 1].isalnum():
+                    continue
+                labels.add(label)
+        return labels
+
+_automaton = KeywordAutomaton(KEYWORDS)
+
+def topics(goal: str) -> set:
+    """
+    Return the keyword topics found in the goal.
+    """
+    return _automaton.find_labels(goal.lower().strip())
+
+def classify(goal: str, short_goal_words: int = 0) -> str:
+    """
+    Return the highest-priority intent whose topics all occur in the goal, or None.
+    Goals of at most short_goal_words words are treated as conversational.
+    """
+    text = goal.lower().strip()
+    if short_goal_words and len(text.split()) <= short_goal_words:
+        return "conversational"
+    found = _automaton.find_labels(text)
+    for intent, required, _ in INTENTS:
+        if required <= found:
+            return intent
+    return None
+
+def sequence_for(intent: str) -> list:
+    return list(_SEQUENCES[intent])
+
+def plan(goal: str, default: list, short_goal_words: int = 0) -> list:
+    """
+    Return the agent sequence for the goal's intent, or default if no rule matches.
+    """
+    intent = classify(goal, short_goal_words)
+    return sequence_for(intent) if intent else list(default)
+
+def classify_batch(goals: list, short_goal_words: int = 0) -> list:
+    """
+    Classify many goals; repeated goals are only scanned once.
+    """
+    seen = {}
+    intents = []
+    for goal in goals:
+        if goal not in seen:
+            seen[goal] = classify(goal, short_goal_words)
+        intents.append(seen[goal])
+    return intents
@@ -0,0 +1,85 @@
+# agents/llm_client.py
+# Process-wide registry of LangChain Gemini clients shared by main.py and the ADK coordinator
+# (or local fake_llm stand-ins when LLM_BACKEND=fake)
+
+import os
+import threading
+from langchain_google_genai import ChatGoogleGenerativeAI
+from . import cassette, fake_llm
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+DEFAULT_MAX_TOKENS = 1000
+# "gemini" (default) or "fake" for the local stand-in in fake_llm.py
+BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+
+_clients = {}
+_lock = threading.Lock()
+_stats = {"created": 0, "reused": 0}
+
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = 0.7, max_tokens: int = DEFAULT_MAX_TOKENS):
+    """
+    Return a shared chat client for (model, temperature, max_tokens).
+    Clients keep their underlying HTTP/gRPC channel open, so reusing them avoids a
+    fresh connection setup on every planning and summary call.
+    LLM_BACKEND=fake returns the local FakeChatModel instead of Gemini. In cassette
+    record/replay mode the client is wrapped in a CassetteLLM; replay and the fake
+    backend need no API key.
+    """
+    replaying = cassette.replaying()
+    fake = BACKEND == "fake"
+    api_key = None if replaying or fake else os.getenv("GOOGLE_API_KEY")
+    if not (replaying or fake or api_key):
+        raise ValueError("GOOGLE_API_KEY not found in environment variables")
+
+    # The API key is part of the identity so a rotated key never reuses a stale client
+    key = (model, float(temperature), int(max_tokens), "replay" if replaying else BACKEND, api_key)
+
+    with _lock:
+        llm = _clients.get(key)
+        if llm is not None:
+            _stats["reused"] += 1
+            return llm
+
+        if replaying:
+            llm = cassette.CassetteLLM(None, model, temperature, max_tokens)
+        else:
+            if fake:
+                llm = fake_llm.FakeChatModel(model=model, temperature=temperature, max_tokens=max_tokens)
+            else:
+                llm = ChatGoogleGenerativeAI(
+                    model=model,
+                    google_api_key=api_key,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            if cassette.recording():
+                llm = cassette.CassetteLLM(llm, model, temperature, max_tokens)
+        _clients[key] = llm
+        _stats["created"] += 1
+        return llm
+
+def is_live() -> bool:
+    """
+    True when responses come from the real Gemini API, i.e. not the fake backend
+    or a cassette replay. Only live plans may be cached or logged as training data.
+    """
+    return BACKEND == "gemini" and not cassette.replaying()
+
+def get_stats() -> dict:
+    """
+    Return client registry counters (created vs reused clients).
+    """
+    with _lock:
+        return {
+            "created": _stats["created"],
+            "reused": _stats["reused"],
+            "active_clients": len(_clients),
+            "backend": BACKEND
+        }
+
+def clear():
+    """
+    Drop all cached clients (e.g. after changing credentials in tests).
+    """
+    with _lock:
+        _clients.clear()
@@ -0,0 +1,64 @@
+# agents/log_context.py
+# Context-local stdout/stderr capture. A proxy is installed once as sys.stdout/sys.stderr
+# and forwards each write to the sink bound in the current context (contextvars), so
+# concurrent requests can each capture their own output without swapping globals.
+
+import contextvars
+import sys
+import threading
+from contextlib import contextmanager
+
+_sink = contextvars.ContextVar("log_sink", default=None)
+_install_lock = threading.Lock()
+
+class ContextStream:
+    """
+    File-like proxy that writes to the current context's sink, or to the
+    original stream when no sink is bound.
+    """
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        sink = _sink.get()
+        if sink is None:
+            return self.fallback.write(text)
+        return sink.write(text)
+
+    def flush(self):
+        sink = _sink.get()
+        if sink is None:
+            self.fallback.flush()
+        else:
+            sink.flush()
+
+    def __getattr__(self, name):
+        # encoding, isatty, fileno, ... come from the real stream
+        return getattr(self.fallback, name)
+
+def install():
+    """
+    Replace sys.stdout and sys.stderr with context proxies (idempotent).
+    """
+    with _install_lock:
+        if not isinstance(sys.stdout, ContextStream):
+            sys.stdout = ContextStream(sys.stdout)
+        if not isinstance(sys.stderr, ContextStream):
+            sys.stderr = ContextStream(sys.stderr)
+
+@contextmanager
+def capture(sink):
+    """
+    Send stdout/stderr written in this context to sink (any object with
+    write/flush). Threads started via contextvars.copy_context().run, and
+    asyncio tasks, inherit the sink.
+    """
+    install()
+    token = _sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _sink.reset(token)
+
+def current_sink():
+    return _sink.get()
@@ -0,0 +1,261 @@
+# agents/metrics.py
+# In-process Prometheus metrics (text exposition format 0.0.4) for the /metrics endpoint.
+#
+# Counters, gauges and histograms each hold one lock, so updates from Flask's request
+# threads and the scheduler's agent pool are safe and cheap. Agent and LLM metrics are
+# derived from finished tracing spans (agents/tracing.py); upstream HTTP calls are
+# reported by http_client directly, so calls outside a trace count too; cache
+# counters are read from the caches' own stats when the endpoint is scraped.
+
+import bisect
+import math
+import threading
+from . import tracing
+
+# Latency buckets in seconds, from cache hits to slow Gemini summaries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _samples(self) -> list:
+        with self._lock:
+            return [(self.name, self.label_names, key, value) for key, value in self._values.items()]
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, label_names, key, value in self._samples():
+            lines.append(f"{name}{_format_labels(label_names, key)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, with +Inf last; then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> list:
+        with self._lock:
+            values = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        samples = []
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", self.label_names, key, cumulative, f'le="{_format_value(float(bound))}"'))
+            samples.append((f"{self.name}_sum", self.label_names, key, total, ""))
+            samples.append((f"{self.name}_count", self.label_names, key, count, ""))
+        return samples
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, label_names, key, value, extra in self._samples():
+            lines.append(f"{name}{_format_labels(label_names, key, extra)} {_format_value(value)}")
+        return lines
+
+class Registry:
+    """
+    Metrics plus collectors: callables returning [(name, kind, help, [(labels dict, value)])]
+    evaluated on every scrape.
+    """
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"⚠️ Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "Web UI requests by route, method and status", ["route", "method", "status"])
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Web UI request latency (time to first byte for streamed responses)", ["route", "method"])
+GOALS_IN_FLIGHT = REGISTRY.gauge("goals_in_flight", "Goals currently being processed by run_goal/arun_goal")
+GOALS = REGISTRY.counter("goals_total", "Finished goals by outcome", ["status"])
+GOAL_DURATION = REGISTRY.histogram("goal_duration_seconds", "End-to-end goal latency (plan, agents, summary)")
+AGENT_DURATION = REGISTRY.histogram("agent_run_duration_seconds", "Agent run latency", ["agent"])
+AGENT_ERRORS = REGISTRY.counter("agent_errors_total", "Agent runs that raised", ["agent"])
+UPSTREAM_DURATION = REGISTRY.histogram("upstream_request_duration_seconds", "Upstream HTTP latency by host", ["host"])
+UPSTREAM_REQUESTS = REGISTRY.counter("upstream_requests_total", "Upstream HTTP requests by host and status", ["host", "status"])
+LLM_DURATION = REGISTRY.histogram("llm_request_duration_seconds", "LLM call latency", ["operation", "backend"])
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.histogram("llm_time_to_first_token_seconds", "Time to the first streamed LLM token", ["backend"])
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "Failed LLM calls", ["operation", "backend"])
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "LLM tokens by direction, as reported by the backend", ["direction", "backend"])
+
+def observe_request(route: str, method: str, status: int, seconds: float):
+    HTTP_REQUESTS.inc(route=route, method=method, status=status)
+    HTTP_REQUEST_DURATION.observe(seconds, route=route, method=method)
+
+def observe_upstream(host: str, status, seconds: float):
+    UPSTREAM_DURATION.observe(seconds, host=host)
+    UPSTREAM_REQUESTS.inc(host=host, status=status)
+
+def observe_span(span):
+    """
+    Tracing span observer: turn finished agent/LLM/goal spans into metrics.
+    """
+    seconds = span.duration_ms / 1000
+    failed = span.status == tracing.STATUS_ERROR
+    attributes = span.attributes
+    if span.parent_id is None:
+        GOAL_DURATION.observe(seconds)
+        GOALS.inc(status="error" if failed else "ok")
+    elif span.name.startswith("agent "):
+        agent = attributes.get("agent", "")
+        AGENT_DURATION.observe(seconds, agent=agent)
+        if failed:
+            AGENT_ERRORS.inc(agent=agent)
+    elif span.name.startswith("llm."):
+        operation = span.name[4:]
+        backend = attributes.get("llm.backend", "")
+        LLM_DURATION.observe(seconds, operation=operation, backend=backend)
+        if failed:
+            LLM_ERRORS.inc(operation=operation, backend=backend)
+        if "llm.time_to_first_token_ms" in attributes:
+            LLM_TIME_TO_FIRST_TOKEN.observe(attributes["llm.time_to_first_token_ms"] / 1000, backend=backend)
+        for direction in ("input", "output"):
+            tokens = attributes.get(f"llm.{direction}_tokens")
+            if tokens:
+                LLM_TOKENS.inc(tokens, direction=direction, backend=backend)
+
+def _cache_stats() -> dict:
+    """
+    Cache name -> stats dict with hits/misses (and stale_hits/evictions/size where tracked).
+    """
+    from . import dictionary_store, spacex_agent, weather_cache
+    from .plan_cache import plan_cache
+    from .semantic_plan_cache import semantic_plan_cache
+
+    spacex = spacex_agent.get_cache_stats()
+    caches = {
+        "plan": plan_cache.stats(),
+        "semantic_plan": semantic_plan_cache.stats(),
+        "weather": weather_cache.get_cache_stats(),
+        "spacex_next_launch": spacex["next_launch"],
+        "spacex_launchpads": spacex["launchpads"]
+    }
+    # Only report the dictionary store once something has opened it
+    if dictionary_store._store is not None:
+        caches["dictionary_hot"] = dictionary_store._store.stats()["hot_cache"]
+    return caches
+
+def collect_cache_metrics() -> list:
+    caches = _cache_stats()
+    families = []
+    for field, name, kind, documentation in [
+        ("hits", "cache_hits_total", "counter", "Cache lookups served fresh"),
+        ("stale_hits", "cache_stale_hits_total", "counter", "Cache lookups served stale while revalidating"),
+        ("misses", "cache_misses_total", "counter", "Cache lookups that missed"),
+        ("evictions", "cache_evictions_total", "counter", "Entries evicted to stay within capacity"),
+        ("size", "cache_entries", "gauge", "Entries currently cached")
+    ]:
+        samples = [({"cache": cache}, stats[field]) for cache, stats in caches.items() if field in stats]
+        if samples:
+            families.append((name, kind, documentation, samples))
+    return families
+
+REGISTRY.add_collector(collect_cache_metrics)
+tracing.add_span_observer(observe_span)
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,122 @@
+# agents/plan_cache.py
+# Cache of normalized goal text -> validated agent sequence, in front of the Gemini planning calls
+
+import atexit
+import json
+import os
+import re
+import threading
+from .cache import TTLCache
+
+def normalize_goal(goal: str) -> str:
+    """
+    Normalize goal text so trivially different phrasings share a cache entry.
+    Math operators are kept since they change what the goal asks for.
+    """
+    goal = re.sub(r"['’]", "", goal.lower())
+    goal = re.sub(r"[^\w\s+\-*/=^%]", " ", goal)
+    return " ".join(goal.split())
+
+class PlanCache:
+    """
+    LRU + TTL cache of planned agent sequences with optional JSON persistence.
+    Writes are batched: a put schedules one save save_delay seconds later, so a
+    burst of new plans costs a single file write off the request path.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 86400.0, path: str = None, save_delay: float = 2.0):
+        self.path = path
+        self.save_delay = save_delay
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._save_lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._save_timer = None
+        if path:
+            self.load()
+            atexit.register(self.flush)
+
+    def get(self, goal: str):
+        """
+        Return a copy of the cached agent sequence for goal, or None.
+        """
+        sequence = self._cache.get(normalize_goal(goal))
+        return list(sequence) if sequence else None
+
+    def put(self, goal: str, sequence: list):
+        """
+        Cache a validated agent sequence for goal (and persist it if enabled).
+        """
+        if not sequence:
+            return
+        self._cache.set(normalize_goal(goal), tuple(sequence))
+        if self.path:
+            self._schedule_save()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    def clear(self):
+        self._cache.clear()
+
+    def _schedule_save(self):
+        if self.save_delay <= 0:
+            self.save()
+            return
+        with self._timer_lock:
+            if self._save_timer is not None:
+                return  # the pending save will include this entry
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """
+        Write pending changes now (called by the save timer and at exit).
+        """
+        with self._timer_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is None:
+            return
+        timer.cancel()
+        self.save()
+
+    def load(self):
+        """
+        Load unexpired entries from the persistence file, if it exists.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f).get("entries", [])
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ Failed to load plan cache from {self.path}: {e}")
+            return
+
+        for entry in entries:
+            self._cache.set(entry["goal"], tuple(entry["sequence"]), stored_at=entry["stored_at"])
+
+    def save(self):
+        """
+        Atomically write all unexpired entries to the persistence file.
+        """
+        entries = [{"goal": goal, "sequence": list(sequence), "stored_at": stored_at}
+                   for goal, sequence, stored_at in self._cache.items()]
+        with self._save_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump({"version": 1, "entries": entries}, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"⚠️ Failed to save plan cache to {self.path}: {e}")
+
+# Process-wide plan cache shared by main.run_goal and GoogleADKCoordinator
+plan_cache = PlanCache(
+    maxsize=int(os.getenv("PLAN_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("PLAN_CACHE_TTL", "86400")),
+    path=os.getenv("PLAN_CACHE_PATH") or None,
+    save_delay=float(os.getenv("PLAN_CACHE_SAVE_DELAY", "2"))
+)
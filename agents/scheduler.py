@@ -0,0 +1,204 @@
+# agents/scheduler.py
+# Dependency-aware executor for planned agent sequences
+#
+# Each agent module may declare which keys of the shared data dict it reads and
+# writes through module-level READS / WRITES lists. Agents without declarations
+# are treated as reading and writing everything, so they run strictly in order.
+# Agents may also provide an `async def arun(data)` coroutine, which the asyncio
+# executor (aexecute_plan) awaits instead of calling the blocking `run`.
+
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from . import tracing
+
+MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", "4"))
+
+def agent_io(agent) -> tuple:
+    """
+    Return (reads, writes) for an agent module; None means "any key".
+    """
+    if agent is None:
+        return None, None
+    reads = getattr(agent, "READS", None)
+    writes = getattr(agent, "WRITES", None)
+    return (
+        None if reads is None else frozenset(reads),
+        None if writes is None else frozenset(writes)
+    )
+
+def _overlaps(written, read) -> bool:
+    if written is None:
+        return read is None or bool(read)
+    if read is None:
+        return bool(written)
+    return bool(written & read)
+
+def build_dag(io: list) -> list:
+    """
+    Build dependency sets from a list of (reads, writes) in plan order.
+    Agent i depends on an earlier agent j when i reads a key that j writes.
+    """
+    deps = []
+    for i, (reads, _) in enumerate(io):
+        deps.append({j for j in range(i) if _overlaps(io[j][1], reads)})
+    return deps
+
+def execution_levels(deps: list) -> list:
+    """
+    Group agent indices into levels that can run concurrently.
+    """
+    level = []
+    for node_deps in deps:
+        level.append(1 + max((level[d] for d in node_deps), default=-1))
+    levels = [[] for _ in range(max(level, default=-1) + 1)]
+    for index, value in enumerate(level):
+        levels[value].append(index)
+    return levels
+
+def _ancestors(deps: list) -> list:
+    closure = []
+    for node_deps in deps:
+        found = set(node_deps)
+        for d in node_deps:
+            found |= closure[d]
+        closure.append(found)
+    return closure
+
+def _delta(before: dict, after: dict) -> dict:
+    return {key: value for key, value in after.items()
+            if key not in before or before[key] is not value}
+
+def _run_one(agent, agent_name: str, snapshot: dict) -> dict:
+    with tracing.span(f"agent {agent_name}", agent=agent_name):
+        if agent is None:
+            raise ImportError(f"Agent '{agent_name}' could not be loaded")
+        return agent.run(snapshot)
+
+async def _arun_one(agent, agent_name: str, snapshot: dict) -> dict:
+    with tracing.span(f"agent {agent_name}", agent=agent_name) as span:
+        if agent is None:
+            raise ImportError(f"Agent '{agent_name}' could not be loaded")
+        if hasattr(agent, "arun"):
+            span.set("agent.async", True)
+            return await agent.arun(snapshot)
+        # Blocking agents run in the default executor so they don't stall the loop
+        return await asyncio.to_thread(agent.run, snapshot)
+
+class _PlanRun:
+    """
+    Bookkeeping shared by the threaded and asyncio executors: loaded modules,
+    the dependency DAG and each agent's output delta.
+    """
+    def __init__(self, sequence: list, data: dict, load_agent):
+        self.sequence = sequence
+        self.data = data
+        self.modules = []
+        self.load_errors = {}
+        for index, agent_name in enumerate(sequence):
+            try:
+                self.modules.append(load_agent(agent_name))
+            except Exception as e:
+                self.modules.append(None)
+                self.load_errors[index] = e
+
+        self.deps = build_dag([agent_io(module) for module in self.modules])
+        self.ancestors = _ancestors(self.deps)
+        self.deltas = {}
+        self.results = [None] * len(sequence)
+
+    def snapshot_for(self, index: int) -> dict:
+        snapshot = dict(self.data)
+        for ancestor in sorted(self.ancestors[index]):
+            snapshot.update(self.deltas.get(ancestor, {}))
+        return snapshot
+
+    def record(self, index: int, snapshot: dict, output=None, error=None):
+        if error is None:
+            self.deltas[index] = _delta(snapshot, output)
+        self.results[index] = {
+            "agent": self.sequence[index],
+            "input": snapshot,
+            "output": output if error is None else snapshot,
+            "error": self.load_errors.get(index, error)
+        }
+
+    def final_data(self) -> dict:
+        final_data = dict(self.data)
+        for index in range(len(self.sequence)):
+            final_data.update(self.deltas.get(index, {}))
+        return final_data
+
+def execute_plan(sequence: list, data: dict, load_agent, max_workers: int = None) -> tuple:
+    """
+    Execute agents from a planned sequence, running independent branches in a
+    thread pool. Each agent sees the initial data plus the outputs of the agents
+    it depends on; outputs are merged back in plan order so the final data is
+    deterministic regardless of completion order.
+
+    Returns (final_data, results) with one result dict per agent in plan order:
+    {"agent", "input", "output", "error"}.
+    """
+    plan = _PlanRun(sequence, data, load_agent)
+
+    workers = max_workers or MAX_WORKERS
+    if workers <= 1 or len(sequence) <= 1:
+        for index, agent_name in enumerate(sequence):
+            snapshot = plan.snapshot_for(index)
+            try:
+                plan.record(index, snapshot, output=_run_one(plan.modules[index], agent_name, dict(snapshot)))
+            except Exception as e:
+                plan.record(index, snapshot, error=e)
+    else:
+        pending = set(range(len(sequence)))
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent") as pool:
+            while pending or running:
+                for index in sorted(pending):
+                    if plan.deps[index] <= done:
+                        snapshot = plan.snapshot_for(index)
+                        # Run in a copy of the caller's context so context-local state
+                        # (e.g. the request's log sink) follows the agent into the pool
+                        context = contextvars.copy_context()
+                        future = pool.submit(context.run, _run_one, plan.modules[index], sequence[index], dict(snapshot))
+                        running[future] = (index, snapshot)
+                        pending.discard(index)
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, snapshot = running.pop(future)
+                    try:
+                        plan.record(index, snapshot, output=future.result())
+                    except Exception as e:
+                        plan.record(index, snapshot, error=e)
+                    done.add(index)
+
+    return plan.final_data(), plan.results
+
+async def aexecute_plan(sequence: list, data: dict, load_agent) -> tuple:
+    """
+    asyncio variant of execute_plan. Agents exposing `async def arun(data)` are
+    awaited directly; sync-only agents run via asyncio.to_thread. Same return
+    shape and merge semantics as execute_plan.
+    """
+    plan = _PlanRun(sequence, data, load_agent)
+    tasks = []
+
+    async def run_node(index: int):
+        if plan.deps[index]:
+            await asyncio.gather(*(tasks[d] for d in plan.deps[index]))
+        snapshot = plan.snapshot_for(index)
+        try:
+            output = await _arun_one(plan.modules[index], sequence[index], dict(snapshot))
+            plan.record(index, snapshot, output=output)
+        except Exception as e:
+            plan.record(index, snapshot, error=e)
+
+    # Dependencies always point to earlier indices, so their tasks already exist
+    for index in range(len(sequence)):
+        tasks.append(asyncio.ensure_future(run_node(index)))
+    await asyncio.gather(*tasks)
+
+    return plan.final_data(), plan.results
@@ -0,0 +1,162 @@
+# agents/semantic_plan_cache.py
+# Nearest-neighbour plan reuse for paraphrased goals using hashed n-gram embeddings.
+# A plan is only reused between goals with the same keyword topics (agents/intent_rules.py),
+# so goals that differ in a topic word ("weather" vs "news") never share a plan however
+# similar the rest of the text is.
+
+import os
+import re
+import threading
+import zlib
+import numpy as np
+from . import intent_rules
+from .plan_cache import normalize_goal
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'of', 'for', 'to', 'in', 'on', 'at', 'is', 'are',
+    'me', 'my', 'please', 'can', 'you', 'what', 'whats', 'will', 'it', 'that', 'this',
+    # Request phrasing that doesn't change which agents are needed
+    'next', 'upcoming', 'latest', 'current', 'today', 'now', 'right', 'get', 'find', 'show',
+    'tell', 'check', 'give', 'about', 'when', 'how', 'date', 'there', 'info', 'information',
+    'details', 'term', 'word', 'with', 'from', 'be', 'do', 'does', 'i', 'know', 'want',
+    'like', 'would', 'could', 'should', 'any', 'some', 'us', 'let'
+}
+
+def embed(text: str, dim: int = 512) -> np.ndarray:
+    """
+    Embed text as an L2-normalized bag of hashed word and character 3/4-gram
+    features. crc32 keeps the hashing stable across processes.
+    """
+    # Split operators from operands so "2+2" and "2 + 2" share features
+    text = re.sub(r"([+\-*/=^%])", r" \1 ", normalize_goal(text))
+    words = [word for word in text.split() if word not in STOP_WORDS]
+    features = list(words)
+    for word in words:
+        padded = f" {word} "
+        for n in (3, 4):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+    vector = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vector
+    indices = [zlib.crc32(feature.encode()) % dim for feature in features]
+    np.add.at(vector, indices, 1.0)
+    np.log1p(vector, out=vector)
+    vector /= np.linalg.norm(vector)
+    return vector
+
+def topic_key(goal: str) -> frozenset:
+    """
+    Keyword topics that must match for two goals to share a plan. A bare
+    "what is" phrasing is dropped when the goal has a more specific topic.
+    """
+    found = set(intent_rules.topics(goal))
+    if len(found) > 1:
+        found.discard("question")
+    return frozenset(found)
+
+class SemanticPlanCache:
+    """
+    NumPy-backed vector index of planned goals. A lookup reuses the agent
+    sequence of the most similar stored goal with the same topic_key when its
+    cosine similarity is at least `threshold`; goals without any keyword topic
+    are never matched. Oldest entries are overwritten once `capacity` is reached.
+    """
+    def __init__(self, threshold: float = 0.7, capacity: int = 4096, dim: int = 512):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.dim = dim
+        self._vectors = np.zeros((min(capacity, 256), dim), dtype=np.float32)
+        # Small integer id per distinct topic_key, so candidates are filtered with one comparison
+        self._topic_ids = np.zeros(len(self._vectors), dtype=np.int32)
+        self._topic_index = {}
+        self._plans = []
+        self._goals = []
+        self._next = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._similarity_histogram = np.zeros(10, dtype=np.int64)
+
+    def lookup(self, goal: str) -> tuple:
+        """
+        Return (sequence, similarity, matched_goal) for the nearest stored goal,
+        or (None, best_similarity, None) when nothing clears the threshold.
+        """
+        vector = embed(goal, self.dim)
+        topics = topic_key(goal)
+        with self._lock:
+            size = len(self._plans)
+            topic_id = self._topic_index.get(topics)
+            if size == 0 or not vector.any() or not topics or topic_id is None:
+                self.misses += 1
+                return None, 0.0, None
+
+            similarities = np.where(self._topic_ids[:size] == topic_id, self._vectors[:size] @ vector, -1.0)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            self._similarity_histogram[min(int(max(similarity, 0.0) * 10), 9)] += 1
+
+            if similarity >= self.threshold:
+                self.hits += 1
+                return list(self._plans[best]), similarity, self._goals[best]
+            self.misses += 1
+            return None, similarity, None
+
+    def add(self, goal: str, sequence: list):
+        """
+        Index goal with its validated agent sequence.
+        """
+        vector = embed(goal, self.dim)
+        topics = topic_key(goal)
+        if not sequence or not vector.any() or not topics:
+            return
+        with self._lock:
+            topic_id = self._topic_index.setdefault(topics, len(self._topic_index))
+            if len(self._plans) < self.capacity:
+                index = len(self._plans)
+                if index == len(self._vectors):
+                    grown = np.zeros((min(self.capacity, 2 * index), self.dim), dtype=np.float32)
+                    grown[:index] = self._vectors
+                    self._vectors = grown
+                    grown_ids = np.zeros(len(grown), dtype=np.int32)
+                    grown_ids[:index] = self._topic_ids
+                    self._topic_ids = grown_ids
+                self._plans.append(tuple(sequence))
+                self._goals.append(goal)
+            else:
+                index = self._next
+                self._next = (self._next + 1) % self.capacity
+                self._plans[index] = tuple(sequence)
+                self._goals[index] = goal
+            self._vectors[index] = vector
+            self._topic_ids[index] = topic_id
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._plans),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                # Best-match similarity per lookup, bucketed into [0.0, 0.1), ..., [0.9, 1.0]
+                "similarity_histogram": self._similarity_histogram.tolist()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self._goals.clear()
+            self._next = 0
+            self._vectors[:] = 0.0
+            self._topic_ids[:] = 0
+            self._topic_index.clear()
+
+# Process-wide semantic cache used by main.run_goal
+semantic_plan_cache = SemanticPlanCache(
+    threshold=float(os.getenv("SEMANTIC_PLAN_THRESHOLD", "0.7")),
+    capacity=int(os.getenv("SEMANTIC_PLAN_CAPACITY", "4096"))
+)
@@ -1,38 +1,179 @@
 # agents/spacex_agent.py
 
-import requests
+import contextvars
+import os
+import threading
+from . import http_client, tracing
+from .cache import TTLCache
+
+# Keys of the shared data dict this agent reads and writes (see agents/scheduler.py)
+READS = []
+WRITES = ["spacex"]
+
+NEXT_LAUNCH_URL = "https://api.spacexdata.com/v4/launches/next"
+LAUNCHPAD_URL = "https://api.spacexdata.com/v4/launchpads/{}"
+
+# The next launch changes a few times per week; launchpad records essentially never.
+# Stale entries are served for up to *_STALE_TTL seconds while a refresh runs in the background.
+NEXT_LAUNCH_TTL = float(os.getenv("SPACEX_NEXT_LAUNCH_TTL", "300"))
+NEXT_LAUNCH_STALE_TTL = float(os.getenv("SPACEX_NEXT_LAUNCH_STALE_TTL", "3600"))
+LAUNCHPAD_TTL = float(os.getenv("SPACEX_LAUNCHPAD_TTL", "604800"))
+LAUNCHPAD_STALE_TTL = float(os.getenv("SPACEX_LAUNCHPAD_STALE_TTL", "2592000"))
+
+_next_launch_cache = TTLCache(maxsize=1, ttl=NEXT_LAUNCH_TTL, stale_ttl=NEXT_LAUNCH_STALE_TTL)
+_launchpad_cache = TTLCache(maxsize=64, ttl=LAUNCHPAD_TTL, stale_ttl=LAUNCHPAD_STALE_TTL)
+
+_refreshing = set()
+_metrics_lock = threading.Lock()
+_metrics = {"upstream_calls": 0, "upstream_errors": 0, "background_refreshes": 0}
 
 def run(previous_data: dict) -> dict:
     """
     Fetches next SpaceX launch data and resolves launchpad coordinates.
     """
     # Get next launch data
-    url = "https://api.spacexdata.com/v4/launches/next"
-    response = requests.get(url)
-    data = response.json()
-    
-    launchpad_id = data.get("launchpad")
-    
+    data = _cached_json(_next_launch_cache, "next", NEXT_LAUNCH_URL) or {}
+
     # Resolve launchpad coordinates
-    coordinates = None
+    launchpad_data = None
+    launchpad_id = data.get("launchpad")
+    if launchpad_id:
+        launchpad_data = _cached_json(_launchpad_cache, launchpad_id, LAUNCHPAD_URL.format(launchpad_id))
+
+    previous_data.update({"spacex": build_launch_info(data, launchpad_data)})
+    return previous_data
+
+async def arun(previous_data: dict) -> dict:
+    """
+    Async variant of run using the shared async HTTP client.
+    """
+    data = await _acached_json(_next_launch_cache, "next", NEXT_LAUNCH_URL) or {}
+
+    launchpad_data = None
+    launchpad_id = data.get("launchpad")
     if launchpad_id:
-        launchpad_url = f"https://api.spacexdata.com/v4/launchpads/{launchpad_id}"
-        launchpad_response = requests.get(launchpad_url)
-        if launchpad_response.status_code == 200:
-            launchpad_data = launchpad_response.json()
-            coordinates = {
-                "latitude": launchpad_data.get("latitude"),
-                "longitude": launchpad_data.get("longitude"),
-                "name": launchpad_data.get("name"),
-                "location": launchpad_data.get("locality")
-            }
-
-    launch_info = {
+        launchpad_data = await _acached_json(_launchpad_cache, launchpad_id, LAUNCHPAD_URL.format(launchpad_id))
+
+    previous_data.update({"spacex": build_launch_info(data, launchpad_data)})
+    return previous_data
+
+def build_launch_info(data: dict, launchpad_data: dict = None) -> dict:
+    """
+    Build the launch summary from the next-launch and launchpad API records.
+    """
+    coordinates = None
+    if launchpad_data:
+        coordinates = {
+            "latitude": launchpad_data.get("latitude"),
+            "longitude": launchpad_data.get("longitude"),
+            "name": launchpad_data.get("name"),
+            "location": launchpad_data.get("locality")
+        }
+
+    return {
         "mission": data.get("name"),
         "date": data.get("date_utc"),
-        "launchpad_id": launchpad_id,
+        "launchpad_id": data.get("launchpad"),
         "coordinates": coordinates
     }
 
-    previous_data.update({"spacex": launch_info})
-    return previous_data
+def get_cache_stats() -> dict:
+    """
+    Cache and upstream counters for the next-launch and launchpad caches.
+    """
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics["next_launch"] = _next_launch_cache.stats()
+    metrics["launchpads"] = _launchpad_cache.stats()
+    return metrics
+
+def clear_cache():
+    _next_launch_cache.clear()
+    _launchpad_cache.clear()
+
+def _count(name: str):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+def _fetch_json(url: str):
+    _count("upstream_calls")
+    response = http_client.get(url)
+    if response.status_code != 200:
+        _count("upstream_errors")
+        return None
+    return response.json()
+
+async def _afetch_json(url: str):
+    _count("upstream_calls")
+    response = await http_client.aget(url)
+    if response.status_code != 200:
+        _count("upstream_errors")
+        return None
+    return response.json()
+
+def _trace_cache(key, value, fresh: bool):
+    state = "miss" if value is None else "hit" if fresh else "stale"
+    tracing.set_attribute("spacex.next_launch_cache" if key == "next" else "spacex.launchpad_cache", state)
+
+def _cached_json(cache: TTLCache, key, url: str):
+    """
+    Serve from cache (stale-while-revalidate), fetching synchronously only on a cold miss.
+    """
+    value, fresh = cache.get_stale(key)
+    _trace_cache(key, value, fresh)
+    if value is not None:
+        if not fresh:
+            _refresh_in_background(cache, key, url)
+        return value
+
+    value = _fetch_json(url)
+    if value is not None:
+        cache.set(key, value)
+    return value
+
+async def _acached_json(cache: TTLCache, key, url: str):
+    value, fresh = cache.get_stale(key)
+    _trace_cache(key, value, fresh)
+    if value is not None:
+        if not fresh:
+            _refresh_in_background(cache, key, url)
+        return value
+
+    value = await _afetch_json(url)
+    if value is not None:
+        cache.set(key, value)
+    return value
+
+def _refresh_in_background(cache: TTLCache, key, url: str):
+    """
+    Start a single background refresh per stale key. It runs in a copy of the
+    caller's context, so its log lines reach the request's capture, but under
+    a trace of its own: the refresh may outlive the request's trace.
+    """
+    refresh_key = (id(cache), key)
+    with _metrics_lock:
+        if refresh_key in _refreshing:
+            return
+        _refreshing.add(refresh_key)
+        _metrics["background_refreshes"] += 1
+
+    request_trace = getattr(tracing.current_span(), "trace", None)
+
+    def refresh():
+        tracing.detach()
+        try:
+            with tracing.start_trace("spacex.cache_refresh", **{"spacex.cache_key": str(key)}) as trace:
+                if request_trace is not None:
+                    trace.root.set("triggered_by.trace_id", request_trace.trace_id)
+                value = _fetch_json(url)
+                if value is not None:
+                    cache.set(key, value)
+        except Exception as e:
+            _count("upstream_errors")
+            print(f"⚠️ SpaceX cache refresh failed: {e}")
+        finally:
+            with _metrics_lock:
+                _refreshing.discard(refresh_key)
+
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(refresh,), name="spacex-cache-refresh", daemon=True).start()
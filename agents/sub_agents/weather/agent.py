@@ -4,8 +4,7 @@
 from google.adk import Agent
 from google.adk.tools import google_search
 # agents/weather_agent.py
-import requests
-import os
+from ... import weather_cache
 
 MODEL = "gemini-2.5-flash"
 
@@ -15,17 +14,12 @@ def get_weather(coordinates: dict) -> dict:
     """
     Gets weather data using latitude and longitude from input dictionary and returns a dictonary {"weather": weather_summary}.
     """
-    api_key = os.getenv("WEATHER_API_KEY")
-    
     # Extract coordinates from input dictionary
     lat = coordinates["latitude"]
     lon = coordinates["longitude"]
     location_name = coordinates.get("name", "Location")
     
-    url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-    response = requests.get(url)
-    
-    data = response.json()
+    data = weather_cache.fetch_weather(lat, lon)
 
     weather_summary = {
         "location": location_name,
@@ -0,0 +1,293 @@
+# agents/tracing.py
+# Lightweight request tracing: nested spans for planning, agents, upstream HTTP/LLM calls
+# and the final summary, kept in a contextvar so they follow a request into the
+# scheduler's worker threads and asyncio tasks.
+#
+# Finished traces can be appended to TRACE_EXPORT_PATH as OTLP/JSON lines (the
+# OpenTelemetry file exporter format), and traces slower than TRACE_SLOW_MS have
+# their span tree written to TRACE_SLOW_LOG.
+
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+# OTLP/JSON lines file for finished traces; empty disables export
+EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+# Requests slower than this (milliseconds) get their span tree logged; 0 disables
+SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "10000"))
+SLOW_LOG_PATH = os.getenv("TRACE_SLOW_LOG", ".cache/slow_requests.log")
+SERVICE_NAME = "multi-agent-ai-system"
+
+# OTLP SpanKind / StatusCode values
+KINDS = {"internal": 1, "server": 2, "client": 3}
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("trace_span", default=None)
+_export_lock = threading.Lock()
+# Called with every finished span, e.g. metrics.observe_span
+_observers = []
+
+class Span:
+    """
+    One timed operation within a trace. Use via span() / start_trace().
+    """
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "status_message")
+
+    def __init__(self, trace, name: str, parent_id: str = None, kind: str = "internal", attributes: dict = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_OK
+        self.status_message = ""
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_error(self, error: Exception):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+class _NoopSpan:
+    """
+    Returned outside a trace, so instrumented code never has to check.
+    """
+    def set(self, key: str, value):
+        pass
+
+    def set_error(self, error: Exception):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """
+    All spans of one request; spans may be added from several threads.
+    """
+    def __init__(self, name: str, attributes: dict = None):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self._lock = threading.Lock()
+        self.root = self.add(name, None, "server", attributes)
+
+    def add(self, name: str, parent_id: str, kind: str, attributes: dict) -> Span:
+        span = Span(self, name, parent_id, kind, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @property
+    def duration_ms(self) -> float:
+        return self.root.duration_ms
+
+    def _children(self) -> dict:
+        children = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in sorted(spans, key=lambda s: s.start_ns):
+            children.setdefault(span.parent_id, []).append(span)
+        return children
+
+    def to_dict(self) -> dict:
+        """
+        Span tree for the returned data: {"trace_id", "name", "duration_ms", ..., "children": [...]}.
+        """
+        children = self._children()
+
+        def node(span: Span) -> dict:
+            result = {
+                "name": span.name,
+                "span_id": span.span_id,
+                "start_offset_ms": round((span.start_ns - self.root.start_ns) / 1e6, 3),
+                "duration_ms": round(span.duration_ms, 3),
+                "status": "error" if span.status == STATUS_ERROR else "ok",
+                "attributes": dict(span.attributes)
+            }
+            if span.status_message:
+                result["error"] = span.status_message
+            result["children"] = [node(child) for child in children.get(span.span_id, [])]
+            return result
+
+        return dict(trace_id=self.trace_id, **node(self.root))
+
+    def format_tree(self) -> str:
+        """
+        Indented text rendering of the span tree, for logs.
+        """
+        children = self._children()
+        lines = []
+
+        def walk(span: Span, depth: int):
+            attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            error = f" ❌ {span.status_message}" if span.status == STATUS_ERROR else ""
+            lines.append(f"{'  ' * depth}{span.name} {span.duration_ms:.1f}ms {attributes}{error}".rstrip())
+            for child in children.get(span.span_id, []):
+                walk(child, depth + 1)
+
+        walk(self.root, 0)
+        return "\n".join(lines)
+
+    def to_otlp(self) -> dict:
+        """
+        The trace as an OTLP/JSON ExportTraceServiceRequest.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "agents.tracing"},
+                "spans": [{
+                    "traceId": self.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": KINDS.get(span.kind, 1),
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                    "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+                    "status": {"code": span.status, "message": span.status_message}
+                } for span in spans]
+            }]
+        }]}
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+def _otlp_attribute(key: str, value) -> dict:
+    return {"key": key, "value": _otlp_value(value)}
+
+def add_span_observer(observer):
+    """
+    Register observer(span), called as each span in a trace ends.
+    """
+    _observers.append(observer)
+
+def _notify(span: Span):
+    for observer in _observers:
+        try:
+            observer(span)
+        except Exception as e:
+            print(f"⚠️ Span observer failed: {e}")
+
+def current_span():
+    """
+    The active span, or a no-op span outside a trace.
+    """
+    return _current_span.get() or _NOOP_SPAN
+
+def detach():
+    """
+    Leave the active trace in the current context, so the next start_trace()
+    opens a new one. For background work that may outlive its request.
+    """
+    _current_span.set(None)
+
+def set_attribute(key: str, value):
+    """
+    Set an attribute on the active span (no-op outside a trace).
+    """
+    current_span().set(key, value)
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """
+    Time a block as a child of the active span. Outside a trace this yields a
+    no-op span and records nothing.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP_SPAN
+        return
+    child = parent.trace.add(name, parent.span_id, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_error(e)
+        raise
+    finally:
+        child.end()
+        _current_span.reset(token)
+        _notify(child)
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """
+    Start a trace rooted at a span called name and yield the Trace. On exit the
+    trace is exported and, if slow, logged. Inside an existing trace this only
+    opens a child span and yields the enclosing trace.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        with span(name, **attributes):
+            yield parent.trace
+        return
+    trace = Trace(name, attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.set_error(e)
+        raise
+    finally:
+        trace.root.end()
+        _current_span.reset(token)
+        _notify(trace.root)
+        finish(trace)
+
+def finish(trace: Trace):
+    """
+    Export a finished trace and log its span tree if it was slow.
+    """
+    if EXPORT_PATH:
+        _append(EXPORT_PATH, json.dumps(trace.to_otlp(), separators=(",", ":")))
+    if SLOW_MS and trace.duration_ms > SLOW_MS:
+        print(f"🐢 Slow request: {trace.root.name} took {trace.duration_ms:.0f}ms (> {SLOW_MS:.0f}ms), "
+              f"span tree written to {SLOW_LOG_PATH}")
+        header = f"=== {time.strftime('%Y-%m-%d %H:%M:%S')} trace {trace.trace_id} ({trace.duration_ms:.0f}ms)"
+        _append(SLOW_LOG_PATH, f"{header}\n{trace.format_tree()}\n")
+
+def _append(path: str, line: str):
+    try:
+        with _export_lock:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write trace file {path}: {e}")
+
+def stage_durations(trace: dict) -> dict:
+    """
+    Milliseconds spent in each top-level stage of a trace dict (plan, execute, summary, ...).
+    """
+    return {child["name"]: child["duration_ms"] for child in trace.get("children", [])}
@@ -1,18 +1,41 @@
 # agents/weather_agent.py
 
-import requests
-import os
+from . import weather_cache
+
+# Keys of the shared data dict this agent reads and writes (see agents/scheduler.py)
+READS = ["spacex"]
+WRITES = ["weather"]
 
 def run(previous_data: dict) -> dict:
     """
     Gets weather data at the launch location using coordinates from SpaceX agent.
     """
-    api_key = os.getenv("WEATHER_API_KEY")
-    
+    lat, lon, location_name = resolve_location(previous_data)
+
+    # Served from the geo-quantized cache when the same area was queried recently
+    data = weather_cache.fetch_weather(lat, lon)
+
+    previous_data.update({"weather": build_weather_summary(data, location_name, lat, lon)})
+    return previous_data
+
+async def arun(previous_data: dict) -> dict:
+    """
+    Async variant of run using the shared async HTTP client and weather cache.
+    """
+    lat, lon, location_name = resolve_location(previous_data)
+    data = await weather_cache.afetch_weather(lat, lon)
+
+    previous_data.update({"weather": build_weather_summary(data, location_name, lat, lon)})
+    return previous_data
+
+def resolve_location(previous_data: dict) -> tuple:
+    """
+    Pick (lat, lon, name) from the SpaceX agent's coordinates, falling back to Kennedy Space Center.
+    """
     # Get coordinates from SpaceX data
     spacex_data = previous_data.get("spacex", {})
     coordinates = spacex_data.get("coordinates", {})
-    
+
     if coordinates and coordinates.get("latitude") and coordinates.get("longitude"):
         lat = coordinates["latitude"]
         lon = coordinates["longitude"]
@@ -24,15 +47,13 @@ def run(previous_data: dict) -> dict:
         location_name = "Kennedy Space Center (fallback)"
         print(f"⚠️ Using fallback location: {location_name}")
 
-    url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-    response = requests.get(url)
-    
-    if response.status_code != 200:
-        raise Exception(f"Weather API error: {response.status_code}")
-    
-    data = response.json()
+    return lat, lon, location_name
 
-    weather_summary = {
+def build_weather_summary(data: dict, location_name: str, lat: float, lon: float) -> dict:
+    """
+    Reduce an OpenWeatherMap response to the fields the other agents use.
+    """
+    return {
         "location": location_name,
         "latitude": lat,
         "longitude": lon,
@@ -42,6 +63,3 @@ def run(previous_data: dict) -> dict:
         "condition": data["weather"][0]["description"],
         "humidity": data["main"]["humidity"]
     }
-
-    previous_data.update({"weather": weather_summary})
-    return previous_data
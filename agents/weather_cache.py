@@ -0,0 +1,67 @@
+# agents/weather_cache.py
+# Geo-quantized OpenWeatherMap cache shared by weather_agent and the ADK weather sub-agent
+
+import os
+from . import http_client, tracing
+from .cache import TTLCache
+
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather?lat={}&lon={}&appid={}&units=metric"
+
+# Coordinates are snapped to this grid (degrees); 0.01° is roughly 1 km
+GRID = float(os.getenv("WEATHER_CACHE_GRID", "0.01"))
+# OpenWeatherMap refreshes current conditions about every 10 minutes
+TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+
+_cache = TTLCache(maxsize=int(os.getenv("WEATHER_CACHE_SIZE", "1024")), ttl=TTL)
+
+def snap(lat: float, lon: float, grid: float = GRID) -> tuple:
+    """
+    Snap coordinates to the cache grid.
+    """
+    return round(round(float(lat) / grid) * grid, 6), round(round(float(lon) / grid) * grid, 6)
+
+def fetch_weather(lat: float, lon: float) -> dict:
+    """
+    Return the raw OpenWeatherMap response for the grid cell containing (lat, lon).
+    """
+    key = snap(lat, lon)
+    data = _cache.get(key)
+    tracing.set_attribute("weather.cache_hit", data is not None)
+    if data is not None:
+        return data
+
+    api_key = os.getenv("WEATHER_API_KEY")
+    response = http_client.get(WEATHER_URL.format(key[0], key[1], api_key))
+    if response.status_code != 200:
+        raise Exception(f"Weather API error: {response.status_code}")
+
+    data = response.json()
+    _cache.set(key, data)
+    return data
+
+async def afetch_weather(lat: float, lon: float) -> dict:
+    """
+    Async variant of fetch_weather.
+    """
+    key = snap(lat, lon)
+    data = _cache.get(key)
+    tracing.set_attribute("weather.cache_hit", data is not None)
+    if data is not None:
+        return data
+
+    api_key = os.getenv("WEATHER_API_KEY")
+    response = await http_client.aget(WEATHER_URL.format(key[0], key[1], api_key))
+    if response.status_code != 200:
+        raise Exception(f"Weather API error: {response.status_code}")
+
+    data = response.json()
+    _cache.set(key, data)
+    return data
+
+def get_cache_stats() -> dict:
+    stats = _cache.stats()
+    stats.update({"grid": GRID, "ttl": TTL})
+    return stats
+
+def clear_cache():
+    _cache.clear()
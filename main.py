@@ -1,42 +1,134 @@
 # main.py - Enhanced with Gemini-first workflow
 
+import asyncio
 import importlib
 import os
-from agents import planner
-from agents.google_adk_agent import GoogleADKCoordinator
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+# Load .env before importing agents: their settings are read from os.environ at import time
 load_dotenv()
 
+from agents import planner, scheduler
+from agents.google_adk_agent import GoogleADKCoordinator
+from agents import intent_model, llm_client, metrics, tracing
+from agents.plan_cache import plan_cache
+from agents.semantic_plan_cache import semantic_plan_cache
+from langchain_core.messages import HumanMessage, SystemMessage
+
 def load_agent(name: str):
     return importlib.import_module(f"agents.{name}")
 
+def _safe_load_agent(name: str):
+    try:
+        return load_agent(name)
+    except Exception:
+        return None
+
+def _llm_span(operation: str, user_message: str, temperature: float):
+    return tracing.span(f"llm.{operation}", kind="client", **{
+        "llm.model": llm_client.DEFAULT_MODEL,
+        "llm.backend": llm_client.BACKEND,
+        "llm.temperature": temperature,
+        "llm.prompt_chars": len(user_message)
+    })
+
+def _record_llm_response(span, text: str, usage: dict = None):
+    span.set("llm.response_chars", len(text or ""))
+    if usage:
+        span.set("llm.input_tokens", usage.get("input_tokens", 0))
+        span.set("llm.output_tokens", usage.get("output_tokens", 0))
+
+def _messages(user_message: str, system_prompt: str) -> list:
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_message)]
+
+@contextmanager
+def _gemini_call(operation: str, user_message: str, temperature: float):
+    """
+    Trace one Gemini call. Errors are recorded on the span and logged instead of
+    raised, so the caller falls through to its None (fallback) response
+    """
+    with _llm_span(operation, user_message, temperature) as span:
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(e)
+            print(f"⚠️ Gemini API error: {e}")
+
+def _chunk_text(chunk) -> str:
+    content = chunk.content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return content or ""
+
+class _StreamCollector:
+    """
+    Collects streamed chunks, forwarding each piece of text to on_token
+    """
+    def __init__(self, span, on_token):
+        self.span = span
+        self.on_token = on_token
+        self.parts = []
+        self.usage = None
+
+    def add(self, chunk):
+        text = _chunk_text(chunk)
+        self.usage = getattr(chunk, "usage_metadata", None) or self.usage
+        if text:
+            if not self.parts:
+                self.span.set("llm.time_to_first_token_ms", round(self.span.duration_ms, 3))
+            self.parts.append(text)
+            self.on_token(text)
+
+    def result(self) -> str:
+        response = "".join(self.parts)
+        _record_llm_response(self.span, response, self.usage)
+        return response
+
 def get_gemini_response(user_message: str, system_prompt: str, temperature: float = 0.7) -> str:
     """
     Send message to Gemini using LangChain and get response
     """
-    try:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found")
-        
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=api_key,
-            temperature=temperature,
-            max_tokens=1000
-        )
-        
-        system_message = SystemMessage(content=system_prompt)
-        human_message = HumanMessage(content=user_message)
-        
-        response = llm.invoke([system_message, human_message])
+    with _gemini_call("invoke", user_message, temperature) as span:
+        llm = llm_client.get_llm(temperature=temperature)
+        response = llm.invoke(_messages(user_message, system_prompt))
+        _record_llm_response(span, response.content, getattr(response, "usage_metadata", None))
         return response.content
-    except Exception as e:
-        print(f"⚠️ Gemini API error: {e}")
-        return None
+    return None
+
+async def aget_gemini_response(user_message: str, system_prompt: str, temperature: float = 0.7) -> str:
+    """
+    Async variant of get_gemini_response using LangChain's ainvoke
+    """
+    with _gemini_call("invoke", user_message, temperature) as span:
+        llm = llm_client.get_llm(temperature=temperature)
+        response = await llm.ainvoke(_messages(user_message, system_prompt))
+        _record_llm_response(span, response.content, getattr(response, "usage_metadata", None))
+        return response.content
+    return None
+
+def stream_gemini_response(user_message: str, system_prompt: str, on_token, temperature: float = 0.7) -> str:
+    """
+    Stream a Gemini response, calling on_token(text) for each chunk as it
+    arrives, and return the full response text
+    """
+    with _gemini_call("stream", user_message, temperature) as span:
+        collector = _StreamCollector(span, on_token)
+        for chunk in llm_client.get_llm(temperature=temperature).stream(_messages(user_message, system_prompt)):
+            collector.add(chunk)
+        return collector.result()
+    return None
+
+async def astream_gemini_response(user_message: str, system_prompt: str, on_token, temperature: float = 0.7) -> str:
+    """
+    Async variant of stream_gemini_response using LangChain's astream
+    """
+    with _gemini_call("stream", user_message, temperature) as span:
+        collector = _StreamCollector(span, on_token)
+        async for chunk in llm_client.get_llm(temperature=temperature).astream(_messages(user_message, system_prompt)):
+            collector.add(chunk)
+        return collector.result()
+    return None
 
 def extract_agent_output(agent_name: str, current_data: dict, previous_data: dict) -> str:
     """
@@ -152,13 +244,7 @@ def extract_agent_output(agent_name: str, current_data: dict, previous_data: dic
         else:
             return f"🔧 {agent_name}: Data processed (no new keys added)"
 
-def run_goal(user_goal: str):
-    print(f"📝 Processing request: '{user_goal}'")
-    
-    # Step 1: Use Gemini to determine appropriate agents
-    print("\n🧠 Step 1: Consulting Gemini for agent selection...")
-    
-    agent_selection_prompt = """You are an intelligent agent coordinator for a multi-agent AI system.
+AGENT_SELECTION_PROMPT = """You are an intelligent agent coordinator for a multi-agent AI system.
     
     Available agents:
     - spacex_agent: Gets SpaceX launch data, schedules, and mission information
@@ -171,6 +257,7 @@ def run_goal(user_goal: str):
     Based on the user's request, determine which agents are needed. Consider:
     - For greetings/conversations: only summary_agent
     - For calculations/math (keywords: calculate, compute, solve, math): calculator_agent, summary_agent
+    - For statistics over a list of numbers (keywords: sum, average, mean, median, standard deviation, percentile, min/max of): calculator_agent, summary_agent
     - For definitions (keywords: define, meaning, what is): dictionary_agent, summary_agent
     - For news/headlines (keywords: news, article, headlines, latest): news_agent, summary_agent
     - For SpaceX info only: spacex_agent, summary_agent  
@@ -180,58 +267,8 @@ def run_goal(user_goal: str):
     
     Respond with ONLY a comma-separated list of agent names in execution order.
     Example: spacex_agent, weather_agent, summary_agent"""
-    
-    gemini_response = get_gemini_response(user_goal, agent_selection_prompt, temperature=0.3)
-    
-    if gemini_response:        # Parse agent sequence from Gemini response
-        sequence = [agent.strip() for agent in gemini_response.strip().split(',')]
-        
-        # Validate agent names
-        valid_agents = ["spacex_agent", "weather_agent", "calculator_agent", "dictionary_agent", "news_agent", "summary_agent"]
-        sequence = [agent for agent in sequence if agent in valid_agents]
-        
-        if not sequence:
-            sequence = ["summary_agent"]  # Fallback
-            
-        print(f"🎯 Gemini selected agents: {sequence}")
-    else:
-        # Fallback to traditional planning
-        try:
-            adk = GoogleADKCoordinator()
-            sequence = adk.plan_agent_sequence(user_goal)
-            print(f"🔄 Fallback ADK selected: {sequence}")
-        except Exception as e:
-            sequence = planner.plan(user_goal)
-            print(f"🔄 Fallback basic planner selected: {sequence}")
-      # Step 2: Execute the selected agents
-    print(f"\n⚙️ Step 2: Executing {len(sequence)} agents...")
-    data = {"goal": user_goal}
-    agent_outputs = {}  # Store each agent's output
 
-    for i, agent_name in enumerate(sequence, 1):
-        print(f"\n🔄 [{i}/{len(sequence)}] Executing {agent_name}...")
-        try:
-            agent = load_agent(agent_name)
-            previous_data = data.copy()  # Store state before agent execution
-            data = agent.run(data)
-            
-            # Extract and display the agent's specific output
-            agent_output = extract_agent_output(agent_name, data, previous_data)
-            agent_outputs[agent_name] = agent_output
-            
-            print(f"✅ {agent_name} completed successfully")
-            print(f"📊 {agent_name} Output:")
-            print("-" * 40)
-            print(agent_output)
-            print("-" * 40)
-            
-        except Exception as e:
-            print(f"❌ {agent_name} failed: {e}")
-            agent_outputs[agent_name] = f"Error: {e}"
-      # Step 3: Use Gemini to create intelligent final summary
-    print("\n🎯 Step 3: Generating intelligent summary with Gemini...")
-    
-    final_summary_prompt = """You are an intelligent summarization agent for a multi-agent AI system.
+FINAL_SUMMARY_PROMPT = """You are an intelligent summarization agent for a multi-agent AI system.
     
     Your job is to analyze the collected data and create a comprehensive, helpful response for the user.
     
@@ -244,9 +281,111 @@ def run_goal(user_goal: str):
     - Always end with an offer to help further
     
     Create a final response that directly addresses the user's original request."""
-    
+
+VALID_AGENTS = ["spacex_agent", "weather_agent", "calculator_agent", "dictionary_agent", "news_agent", "summary_agent"]
+
+def _parse_agent_sequence(gemini_response: str) -> list:
+    """
+    Parse and validate the comma-separated agent list returned by Gemini
+    """
+    sequence = [agent.strip() for agent in gemini_response.strip().split(',')]
+    return [agent for agent in sequence if agent in VALID_AGENTS]
+
+def _cached_plan(user_goal: str):
+    """
+    Reuse a previous Gemini plan for the same goal or a close paraphrase of it
+    """
+    sequence = plan_cache.get(user_goal)
+    if sequence:
+        print(f"⚡ Plan cache hit, reusing agents: {sequence}")
+        tracing.set_attribute("plan.source", "plan_cache")
+        return sequence
+
+    sequence, similarity, matched_goal = semantic_plan_cache.lookup(user_goal)
+    if sequence:
+        print(f"⚡ Similar goal found ({similarity:.2f}): '{matched_goal}', reusing agents: {sequence}")
+        tracing.set_attribute("plan.source", "semantic_plan_cache")
+        tracing.set_attribute("plan.similarity", round(float(similarity), 3))
+    return sequence
+
+def _local_plan(user_goal: str):
+    """
+    Use the local intent model's prediction when it is confident enough to skip Gemini
+    """
+    sequence, confidence = intent_model.predict(user_goal)
+    if sequence:
+        print(f"⚡ Local intent model selected agents ({confidence:.2f}): {sequence}")
+        tracing.set_attribute("plan.source", "intent_model")
+        tracing.set_attribute("plan.confidence", round(confidence, 3))
+    return sequence
+
+def _gemini_plan(user_goal: str, gemini_response: str) -> list:
+    """
+    Turn Gemini's agent selection into a sequence, caching validated plans
+    """
+    sequence = _parse_agent_sequence(gemini_response)
+    tracing.set_attribute("plan.source", "gemini")
+    if sequence:
+        # Plans from the fake backend or a replay must not reach the caches or the intent model's training log
+        if llm_client.is_live():
+            plan_cache.put(user_goal, sequence)
+            semantic_plan_cache.add(user_goal, sequence)
+            intent_model.log_plan(user_goal, sequence)
+    else:
+        sequence = ["summary_agent"]  # Fallback
+    print(f"🎯 Gemini selected agents: {sequence}")
+    return sequence
+
+def _fallback_plan(user_goal: str) -> list:
+    """
+    Fallback to traditional planning when Gemini agent selection fails
+    """
+    try:
+        adk = GoogleADKCoordinator()
+        sequence = adk.plan_agent_sequence(user_goal)
+        tracing.set_attribute("plan.source", "adk")
+        print(f"🔄 Fallback ADK selected: {sequence}")
+    except Exception:
+        with tracing.span("plan.basic_planner"):
+            sequence = planner.plan(user_goal)
+        tracing.set_attribute("plan.source", "basic_planner")
+        print(f"🔄 Fallback basic planner selected: {sequence}")
+    return sequence
+
+def _print_execution_plan(sequence: list):
+    deps = scheduler.build_dag([scheduler.agent_io(_safe_load_agent(name)) for name in sequence])
+    levels = scheduler.execution_levels(deps)
+    if len(levels) < len(sequence):
+        stages = " → ".join("[" + ", ".join(sequence[i] for i in level) + "]" for level in levels)
+        print(f"🔀 Parallel execution plan: {stages}")
+
+def _collect_agent_outputs(results: list) -> dict:
+    """
+    Display each agent's result in plan order and return the formatted outputs
+    """
+    agent_outputs = {}
+    for i, result in enumerate(results, 1):
+        agent_name = result["agent"]
+        print(f"\n🔄 [{i}/{len(results)}] {agent_name}")
+        if result["error"] is not None:
+            print(f"❌ {agent_name} failed: {result['error']}")
+            agent_outputs[agent_name] = f"Error: {result['error']}"
+            continue
+
+        # Extract and display the agent's specific output
+        agent_output = extract_agent_output(agent_name, result["output"], result["input"])
+        agent_outputs[agent_name] = agent_output
+
+        print(f"✅ {agent_name} completed successfully")
+        print(f"📊 {agent_name} Output:")
+        print("-" * 40)
+        print(agent_output)
+        print("-" * 40)
+    return agent_outputs
+
+def _summary_context(user_goal: str, sequence: list, agent_outputs: dict, data: dict) -> str:
     # Prepare context for Gemini including individual agent outputs
-    context = f"""
+    return f"""
     Original User Request: "{user_goal}"
     
     Agents Executed: {', '.join(sequence)}
@@ -258,9 +397,8 @@ def run_goal(user_goal: str):
     {data}
     
     Please create an intelligent, helpful final response for the user."""
-    
-    final_response = get_gemini_response(context, final_summary_prompt, temperature=0.7)
-    
+
+def _report_results(user_goal: str, sequence: list, agent_outputs: dict, data: dict, final_response: str) -> dict:
     # Display comprehensive results
     print("\n" + "="*60)
     print("📋 COMPLETE EXECUTION SUMMARY")
@@ -291,6 +429,100 @@ def run_goal(user_goal: str):
     print("\n" + "="*60)
     return data
 
+def run_goal(user_goal: str, on_token=None):
+    """
+    Plan, execute and summarize a goal. With on_token, the final summary is
+    streamed from Gemini and on_token(text) is called for each chunk.
+    The request's span tree (agents/tracing.py) is returned in data["trace"].
+    """
+    metrics.GOALS_IN_FLIGHT.inc()
+    try:
+        with tracing.start_trace("run_goal", goal=user_goal) as trace:
+            data = _run_goal(user_goal, on_token)
+    finally:
+        metrics.GOALS_IN_FLIGHT.dec()
+    data["trace"] = trace.to_dict()
+    return data
+
+def _run_goal(user_goal: str, on_token=None):
+    print(f"📝 Processing request: '{user_goal}'")
+    
+    # Step 1: Use Gemini to determine appropriate agents
+    print("\n🧠 Step 1: Consulting Gemini for agent selection...")
+    with tracing.span("plan") as span:
+        sequence = _cached_plan(user_goal) or _local_plan(user_goal)
+        if not sequence:
+            gemini_response = get_gemini_response(user_goal, AGENT_SELECTION_PROMPT, temperature=0.3)
+            if gemini_response:
+                sequence = _gemini_plan(user_goal, gemini_response)
+            else:
+                sequence = _fallback_plan(user_goal)
+        span.set("plan.sequence", sequence)
+    
+    # Step 2: Execute the selected agents
+    print(f"\n⚙️ Step 2: Executing {len(sequence)} agents...")
+    with tracing.span("execute", agents=len(sequence)):
+        _print_execution_plan(sequence)
+        data, results = scheduler.execute_plan(sequence, {"goal": user_goal}, load_agent)
+    agent_outputs = _collect_agent_outputs(results)
+    
+    # Step 3: Use Gemini to create intelligent final summary
+    print("\n🎯 Step 3: Generating intelligent summary with Gemini...")
+    with tracing.span("summary", streamed=bool(on_token)) as span:
+        context = _summary_context(user_goal, sequence, agent_outputs, data)
+        if on_token:
+            final_response = stream_gemini_response(context, FINAL_SUMMARY_PROMPT, on_token, temperature=0.7)
+        else:
+            final_response = get_gemini_response(context, FINAL_SUMMARY_PROMPT, temperature=0.7)
+        span.set("summary.fallback", not final_response)
+    
+    return _report_results(user_goal, sequence, agent_outputs, data, final_response)
+
+async def arun_goal(user_goal: str, on_token=None):
+    """
+    asyncio-native variant of run_goal: Gemini calls and agents with an
+    `arun` coroutine are awaited, so many goals can share one event loop
+    """
+    metrics.GOALS_IN_FLIGHT.inc()
+    try:
+        with tracing.start_trace("arun_goal", goal=user_goal) as trace:
+            data = await _arun_goal(user_goal, on_token)
+    finally:
+        metrics.GOALS_IN_FLIGHT.dec()
+    data["trace"] = trace.to_dict()
+    return data
+
+async def _arun_goal(user_goal: str, on_token=None):
+    print(f"📝 Processing request: '{user_goal}'")
+    
+    print("\n🧠 Step 1: Consulting Gemini for agent selection...")
+    with tracing.span("plan") as span:
+        sequence = _cached_plan(user_goal) or _local_plan(user_goal)
+        if not sequence:
+            gemini_response = await aget_gemini_response(user_goal, AGENT_SELECTION_PROMPT, temperature=0.3)
+            if gemini_response:
+                sequence = _gemini_plan(user_goal, gemini_response)
+            else:
+                sequence = await asyncio.to_thread(_fallback_plan, user_goal)
+        span.set("plan.sequence", sequence)
+    
+    print(f"\n⚙️ Step 2: Executing {len(sequence)} agents...")
+    with tracing.span("execute", agents=len(sequence)):
+        _print_execution_plan(sequence)
+        data, results = await scheduler.aexecute_plan(sequence, {"goal": user_goal}, load_agent)
+    agent_outputs = _collect_agent_outputs(results)
+    
+    print("\n🎯 Step 3: Generating intelligent summary with Gemini...")
+    with tracing.span("summary", streamed=bool(on_token)) as span:
+        context = _summary_context(user_goal, sequence, agent_outputs, data)
+        if on_token:
+            final_response = await astream_gemini_response(context, FINAL_SUMMARY_PROMPT, on_token, temperature=0.7)
+        else:
+            final_response = await aget_gemini_response(context, FINAL_SUMMARY_PROMPT, temperature=0.7)
+        span.set("summary.fallback", not final_response)
+    
+    return _report_results(user_goal, sequence, agent_outputs, data, final_response)
+
 if __name__ == "__main__":
     goal = input("Enter your goal: ")
     run_goal(goal)
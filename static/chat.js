@@ -163,6 +163,12 @@ class ChatInterface {
         this.showTyping();
 
         try {
+            // Stream logs and summary tokens as they arrive when the browser supports it
+            if (window.ReadableStream && window.TextDecoder) {
+                await this.streamMessage(message);
+                return;
+            }
+
             // Send to backend
             const response = await fetch('/api/chat', {
                 method: 'POST',
@@ -191,6 +197,83 @@ class ChatInterface {
         }
    }
 
+    async streamMessage(message) {
+        const response = await fetch('/api/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                message: message,
+                agent: this.currentAgent
+            })
+        });
+
+        if (!response.ok) {
+            const data = await response.json().catch(() => ({}));
+            this.hideTyping();
+            this.addMessage(`Error: ${data.error || response.statusText}`, 'system');
+            return;
+        }
+
+        // Newline-delimited JSON events: log, token, done, error
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let summaryMessage = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const event = JSON.parse(line);
+
+                if (event.type === 'log') {
+                    this.handleWorkflowLog(event);
+                } else if (event.type === 'token') {
+                    if (!summaryMessage) {
+                        this.hideTyping();
+                        this.updateAgentStatus('summary', 'busy');
+                        summaryMessage = this.startStreamingMessage('summary');
+                    }
+                    this.appendToMessage(summaryMessage, event.text);
+                } else if (event.type === 'done') {
+                    this.hideTyping();
+                    this.updateAgentStatus('summary', 'online');
+                    if (!summaryMessage) {
+                        this.addMessage(event.result.summary || 'Task completed successfully!', 'agent', 'summary');
+                    }
+                    if (event.result.raw_data) {
+                        this.addJsonMessage(event.result.raw_data, 'Raw API Data');
+                    }
+                } else if (event.type === 'error') {
+                    this.hideTyping();
+                    this.addMessage(`Error: ${event.error}`, 'system');
+                }
+            }
+        }
+    }
+
+    startStreamingMessage(agent) {
+        this.addMessage('', 'agent', agent);
+        return this.messages[this.messages.length - 1];
+    }
+
+    appendToMessage(message, text) {
+        message.content += text;
+        const element = document.querySelector(`[data-message-id="${message.id}"] .message-text`);
+        if (element) {
+            element.style.whiteSpace = 'pre-wrap';
+            element.textContent = message.content;
+        }
+        this.scrollToBottom();
+    }
+
     sendQuickMessage(message) {
         document.getElementById('chat-input').value = message;
         this.sendMessage();
@@ -199,17 +282,7 @@ class ChatInterface {
     processAgentResponse(data) {
         // Add agent responses based on the workflow
         if (data.workflow_logs) {
-            data.workflow_logs.forEach(log => {
-                if (log.agent && this.agents[log.agent]) {
-                    this.updateAgentStatus(log.agent, 'busy');
-                    this.addMessage(log.message, 'agent', log.agent);
-                    setTimeout(() => {
-                        this.updateAgentStatus(log.agent, 'online');
-                    }, 1000);
-                } else {
-                    this.addMessage(log.message, 'system');
-                }
-            });
+            data.workflow_logs.forEach(log => this.handleWorkflowLog(log));
         }
 
         // Add final result
@@ -223,6 +296,18 @@ class ChatInterface {
         }
     }
 
+    handleWorkflowLog(log) {
+        if (log.agent && this.agents[log.agent]) {
+            this.updateAgentStatus(log.agent, 'busy');
+            this.addMessage(log.message, 'agent', log.agent);
+            setTimeout(() => {
+                this.updateAgentStatus(log.agent, 'online');
+            }, 1000);
+        } else {
+            this.addMessage(log.message, 'system');
+        }
+    }
+
     addMessage(content, type = 'system', agent = null) {
         const message = {
             id: Date.now() + Math.random(),
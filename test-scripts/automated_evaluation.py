@@ -5,18 +5,27 @@ import sys
 import os
 sys.path.append('..')  # Add parent directory to path for imports
 
+import argparse
+import contextvars
+import io
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from main import run_goal
+from agents import log_context, tracing
 from typing import Dict, List, Any
 
+# Number of test cases evaluated at once (run_goal is I/O bound, so threads are enough)
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "1"))
+
 class AgentSystemEvaluator:
     """
     Automated evaluation system for testing agent performance and goal satisfaction
     """
     
-    def __init__(self, test_file: str = "evals/test_goals.json"):
+    def __init__(self, test_file: str = "evals/test_goals.json", concurrency: int = None):
         self.test_file = test_file
+        self.concurrency = max(1, concurrency or EVAL_CONCURRENCY)
         self.results = []
     
     def load_test_cases(self) -> List[Dict]:
@@ -35,11 +44,11 @@ class AgentSystemEvaluator:
         print(f"\n🧪 Testing Goal: {goal}")
         print("-" * 50)
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             result = run_goal(goal)
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             
             # Check if expected keys are present
             missing_keys = [key for key in expected_keys if key not in result]
@@ -52,6 +61,8 @@ class AgentSystemEvaluator:
                 "goal": goal,
                 "success": success,
                 "execution_time": round(execution_time, 2),
+                # Milliseconds per run_goal stage (plan, execute, summary) from the request trace
+                "stage_times_ms": tracing.stage_durations(result.get("trace", {})),
                 "missing_keys": missing_keys,
                 "data_keys": list(result.keys()),
                 "adk_confidence": adk_validation.get("confidence", 0),
@@ -69,7 +80,7 @@ class AgentSystemEvaluator:
             return evaluation
             
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             print(f"❌ Test failed with error: {e}")
             
             return {
@@ -80,9 +91,11 @@ class AgentSystemEvaluator:
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
             }
     
-    def run_full_evaluation(self) -> Dict[str, Any]:
+    def run_full_evaluation(self, progress_callback=None, should_cancel=None) -> Dict[str, Any]:
         """
-        Run evaluation on all test cases and generate comprehensive report
+        Run evaluation on all test cases and generate comprehensive report.
+        progress_callback(completed, total, evaluation) is called after each case;
+        if should_cancel() returns True the remaining cases are skipped.
         """
         print("🚀 Starting Full Agent System Evaluation")
         print("=" * 60)
@@ -91,23 +104,26 @@ class AgentSystemEvaluator:
         if not test_cases:
             return {"error": "No test cases found"}
         
-        total_start_time = time.time()
-        
-        for test_case in test_cases:
-            goal = test_case.get("goal", "")
-            expected_keys = test_case.get("expected_keys", [])
-            
-            evaluation = self.evaluate_goal(goal, expected_keys)
-            self.results.append(evaluation)
-        
-        total_time = time.time() - total_start_time
+        total_start_time = time.perf_counter()
+        if self.concurrency > 1:
+            print(f"⚡ Running up to {self.concurrency} test cases concurrently")
+            cancelled = self._run_concurrently(test_cases, progress_callback, should_cancel)
+        else:
+            cancelled = self._run_sequentially(test_cases, progress_callback, should_cancel)
+        total_time = time.perf_counter() - total_start_time
+        summed_case_time = sum(r.get("execution_time", 0) for r in self.results)
         
         # Generate summary statistics
         successful_tests = [r for r in self.results if r.get("success", False)]
-        success_rate = len(successful_tests) / len(self.results) * 100
+        success_rate = len(successful_tests) / len(self.results) * 100 if self.results else 0
         avg_confidence = sum(r.get("adk_confidence", 0) for r in successful_tests) / len(successful_tests) if successful_tests else 0
         avg_quality = sum(r.get("adk_quality_score", 0) for r in successful_tests) / len(successful_tests) if successful_tests else 0
-        avg_time = sum(r.get("execution_time", 0) for r in self.results) / len(self.results)
+        avg_time = sum(r.get("execution_time", 0) for r in self.results) / len(self.results) if self.results else 0
+        stage_totals = {}
+        for r in self.results:
+            for stage, ms in r.get("stage_times_ms", {}).items():
+                stage_totals[stage] = stage_totals.get(stage, 0) + ms
+        avg_stage_times = {stage: round(ms / len(self.results), 1) for stage, ms in stage_totals.items()}
         
         summary = {
             "total_tests": len(self.results),
@@ -116,7 +132,11 @@ class AgentSystemEvaluator:
             "average_confidence": round(avg_confidence, 2),
             "average_quality_score": round(avg_quality, 2),
             "average_execution_time": round(avg_time, 2),
+            "average_stage_times_ms": avg_stage_times,
             "total_evaluation_time": round(total_time, 2),
+            "summed_case_time": round(summed_case_time, 2),
+            "concurrency": self.concurrency,
+            "cancelled": cancelled,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
             "detailed_results": self.results
         }
@@ -130,13 +150,85 @@ class AgentSystemEvaluator:
         print(f"Average ADK Confidence: {summary['average_confidence']}%")
         print(f"Average Quality Score: {summary['average_quality_score']}%")
         print(f"Average Execution Time: {summary['average_execution_time']}s")
-        print(f"Total Evaluation Time: {summary['total_evaluation_time']}s")
+        if avg_stage_times:
+            print("Average Stage Times: " + ", ".join(f"{stage} {ms}ms" for stage, ms in avg_stage_times.items()))
+        print(f"Total Evaluation Time: {summary['total_evaluation_time']}s (wall clock)")
+        print(f"Summed Case Time: {summary['summed_case_time']}s across {self.concurrency} worker(s)")
         
-        # Save results
-        self.save_results(summary)
+        # Save results (partial runs are not saved)
+        if not cancelled:
+            self.save_results(summary)
         
         return summary
     
+    def _run_sequentially(self, test_cases: List[Dict], progress_callback, should_cancel) -> bool:
+        for test_case in test_cases:
+            if should_cancel and should_cancel():
+                print("🛑 Evaluation cancelled")
+                return True
+            
+            goal = test_case.get("goal", "")
+            expected_keys = test_case.get("expected_keys", [])
+            
+            evaluation = self.evaluate_goal(goal, expected_keys)
+            self.results.append(evaluation)
+            if progress_callback:
+                progress_callback(len(self.results), len(test_cases), evaluation)
+        return False
+    
+    def _evaluate_buffered(self, goal: str, expected_keys: List[str], buffer: io.StringIO) -> Dict[str, Any]:
+        # Collect this case's output separately so concurrent cases don't interleave
+        with log_context.capture(buffer):
+            return self.evaluate_goal(goal, expected_keys)
+    
+    def _run_concurrently(self, test_cases: List[Dict], progress_callback, should_cancel) -> bool:
+        """
+        Evaluate cases on a thread pool. Results and each case's buffered output
+        are emitted in test-case order; progress is reported as cases finish.
+        """
+        results = [None] * len(test_cases)
+        buffers = [None] * len(test_cases)
+        next_case = 0
+        next_to_emit = 0
+        completed = 0
+        cancelled = False
+        running = {}
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="evaluation-case") as pool:
+            while running or (next_case < len(test_cases) and not cancelled):
+                # Keep at most `concurrency` cases in flight so cancellation takes effect quickly
+                while len(running) < self.concurrency and next_case < len(test_cases):
+                    if should_cancel and should_cancel():
+                        cancelled = True
+                        break
+                    test_case = test_cases[next_case]
+                    buffers[next_case] = io.StringIO()
+                    context = contextvars.copy_context()
+                    future = pool.submit(context.run, self._evaluate_buffered, test_case.get("goal", ""),
+                                         test_case.get("expected_keys", []), buffers[next_case])
+                    running[future] = next_case
+                    next_case += 1
+                
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    results[index] = future.result()
+                    completed += 1
+                    if progress_callback:
+                        progress_callback(completed, len(test_cases), results[index])
+                
+                while next_to_emit < len(test_cases) and results[next_to_emit] is not None:
+                    for line in buffers[next_to_emit].getvalue().splitlines():
+                        print(line)
+                    self.results.append(results[next_to_emit])
+                    next_to_emit += 1
+        
+        if cancelled:
+            print("🛑 Evaluation cancelled")
+        return cancelled
+    
     def save_results(self, summary: Dict[str, Any]):
         """Save evaluation results to file"""
         timestamp = time.strftime("%Y%m%d_%H%M%S")
@@ -151,7 +243,13 @@ class AgentSystemEvaluator:
 
 def main():
     """Run the automated evaluation"""
-    evaluator = AgentSystemEvaluator()
+    parser = argparse.ArgumentParser(description="Run the automated agent system evaluation")
+    parser.add_argument("--test-file", default="evals/test_goals.json")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"Test cases to run at once (default: EVAL_CONCURRENCY or {EVAL_CONCURRENCY})")
+    args = parser.parse_args()
+    
+    evaluator = AgentSystemEvaluator(args.test_file, concurrency=args.concurrency)
     evaluator.run_full_evaluation()
 
 if __name__ == "__main__":
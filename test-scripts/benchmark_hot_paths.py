@@ -0,0 +1,284 @@
+# benchmark_hot_paths.py
+# Micro-benchmarks for the CPU-bound, per-request pure-Python code paths
+
+import sys
+import os
+sys.path.append('..')  # Add parent directory to path for imports
+
+import argparse
+import itertools
+import json
+import math
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from main import extract_agent_output
+from agents import calculator_agent, dictionary_agent, planner
+from web_interface import classify_log_line
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class Benchmark:
+    """One function under test with a list of inputs that calls cycle through"""
+
+    def __init__(self, name: str, func, inputs: list, kind: str = "realistic"):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.kind = kind
+
+    def _calibrate(self, min_sample_time: float) -> int:
+        """Calls per timed sample, so each sample is long enough to measure reliably"""
+        calls = 1
+        while True:
+            start = time.perf_counter()
+            self._call(calls, itertools.cycle(self.inputs))
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_sample_time or calls >= 1_000_000:
+                return calls
+            calls *= 2 if elapsed == 0 else max(2, min(10, int(min_sample_time / elapsed) + 1))
+
+    def _call(self, calls: int, inputs):
+        func = self.func
+        for _ in range(calls):
+            func(next(inputs))
+
+    def run(self, repetitions: int, warmup: int, min_sample_time: float) -> dict:
+        inputs = itertools.cycle(self.inputs)
+        calls = self._calibrate(min_sample_time)
+        for _ in range(warmup):
+            self._call(calls, inputs)
+
+        samples = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            self._call(calls, inputs)
+            samples.append((time.perf_counter() - start) / calls)
+
+        samples.sort()
+        total_time = sum(samples) * calls
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "inputs": len(self.inputs),
+            "repetitions": repetitions,
+            "calls_per_sample": calls,
+            "mean_us": sum(samples) / len(samples) * 1e6,
+            "p50_us": percentile(samples, 50) * 1e6,
+            "p95_us": percentile(samples, 95) * 1e6,
+            "p99_us": percentile(samples, 99) * 1e6,
+            "min_us": samples[0] * 1e6,
+            "max_us": samples[-1] * 1e6,
+            "ops_per_sec": repetitions * calls / total_time if total_time else 0.0
+        }
+
+def _ignore_errors(func):
+    """Benchmark the rejection path of functions that raise on bad input"""
+    def call(value):
+        try:
+            return func(value)
+        except Exception:
+            return None
+    return call
+
+def load_goals(path: str = "../evals/test_goals.json") -> list:
+    if not os.path.exists(path):
+        path = "evals/test_goals.json"
+    try:
+        with open(path, 'r') as f:
+            return [case["goal"] for case in json.load(f)]
+    except (OSError, ValueError, KeyError):
+        return ["Find the next SpaceX launch and check the weather there"]
+
+def make_definition_payload(entries: int, meanings: int, definitions: int) -> list:
+    """Synthetic dictionaryapi.dev response of the given size"""
+    return [{
+        "word": f"word{e}",
+        "phonetic": "/wɜːd/",
+        "phonetics": [{"text": "/wɜːd/", "audio": f"https://example.com/{e}.mp3"}, {"audio": ""}],
+        "meanings": [{
+            "partOfSpeech": ["noun", "verb", "adjective"][m % 3],
+            "synonyms": [f"syn{m}a", f"syn{m}b"],
+            "antonyms": [f"ant{m}"],
+            "definitions": [{
+                "definition": f"Definition {d} of meaning {m}: a fairly ordinary sentence describing the word.",
+                "example": f"An example sentence using word{e}.",
+                "synonyms": [],
+                "antonyms": []
+            } for d in range(definitions)]
+        } for m in range(meanings)]
+    } for e in range(entries)]
+
+def build_benchmarks() -> list:
+    goals = load_goals()
+
+    plan_adversarial = [
+        "x" * 10_000,  # long goal with no keyword
+        "spacexx launchpads weatherly calculator definitions " * 200,  # keyword prefixes that never match whole words
+        "what is " * 2_000,
+        "🚀🌍📝🧠 " * 2_500
+    ]
+
+    math_goals = [
+        "Calculate 15 * 4 + 3",
+        "What is the square root of 144?",
+        "Compute 2 to the power of 10",
+        "Solve 3x + 5 = 20",
+        "What is sin of 30 and log of 100?",
+        "What is the average of 3, 5, 7 and 9?",
+        "Calculate factorial of 10"
+    ]
+    # Sized so each call takes milliseconds: several of these grow quadratically with length
+    math_adversarial = [
+        "+".join(["1"] * 200),
+        "what is " * 100,
+        "1." * 200,
+        "calculate " + " ".join(str(i) for i in range(200)),
+        "mean of " + ", ".join(str(i) for i in range(200))
+    ]
+    expressions = ["15 * 4 + 3", "sqrt(144)", "2 ** 10", "(3 + 5) * (7 - 2) / 4", "sin(0.5) + cos(0.5)", "factorial(10)"]
+    expressions_adversarial = [
+        "(" * 90 + "1" + ")" * 90,
+        " + ".join(str(i) for i in range(1_000)),
+        "9 ** 9 ** 9",  # rejected by the cost estimate
+        "factorial(100000)",
+        "1 / 0"
+    ]
+
+    definition_goals = [
+        "Define serendipity",
+        "What does ephemeral mean?",
+        "What is the meaning of ubiquitous",
+        "Tell me about the word photosynthesis",
+        "definition of algorithm"
+    ]
+    definition_adversarial = [
+        "the a an and or but " * 1_000,
+        "define " + "supercalifragilisticexpialidocious" * 300,
+        "!?.,;:" * 2_000
+    ]
+
+    agent_outputs = [
+        ("spacex_agent", {"spacex": {"mission": "Starlink 10-1", "date": "2030-01-01T00:00:00Z", "launchpad_id": "5e9e4502f509094188566f88",
+                                     "coordinates": {"name": "KSC LC 39A", "latitude": 28.6080585, "longitude": -80.6039558}}}, {}),
+        ("weather_agent", {"weather": {"temperature": 78.4, "wind_speed": 9.2, "clouds": 40, "humidity": 71, "location": "Cape Canaveral"}}, {}),
+        ("calculator_agent", {"calculation": {"success": True, "calculations": [
+            {"success": True, "expression": "15 * 4 + 3", "result": 63.0},
+            {"success": False, "expression": "1 / 0", "error": "division by zero"}]}}, {}),
+        ("dictionary_agent", {"definition": {
+            "success": True, "word": "word0", "definitions": dictionary_agent.parse_definition_data(make_definition_payload(1, 3, 5))}}, {}),
+        ("google_adk_agent", {"adk_validation": {"goal_achieved": True, "confidence": 90, "quality_score": 85,
+                                                 "missing_data": [], "suggested_improvements": ["None"]}}, {})
+    ]
+    large_data = {f"key{i}": {"value": i, "items": list(range(20))} for i in range(2_000)}
+    agent_outputs_adversarial = [
+        ("custom_agent", dict(large_data, extra="x" * 10_000), large_data),
+        ("calculator_agent", {"calculation": {"success": True, "calculations": [
+            {"success": True, "expression": f"{i} * 2", "result": i * 2} for i in range(2_000)]}}, {})
+    ]
+
+    log_lines = [
+        "📝 Processing request: 'Find the next SpaceX launch'",
+        "🧠 Step 1: Consulting Gemini for agent selection...",
+        "🚀 SpaceX Data Retrieved:",
+        "🌍 Weather Data Retrieved:",
+        "⚙️ Step 2: Executing 3 agents...",
+        "✅ weather_agent completed successfully",
+        "----------------------------------------",
+        "• Temperature: 78.4°F"
+    ]
+    log_adversarial = [
+        "x" * 65_536,  # long line with no agent keyword: every check scans it all
+        "é" * 65_536,
+        ("Ünïcödé " * 8_000) + "adk"
+    ]
+
+    return [
+        Benchmark("planner.plan", planner.plan, goals),
+        Benchmark("planner.plan", planner.plan, plan_adversarial, "adversarial"),
+        Benchmark("calculator_agent.extract_math_expressions", calculator_agent.extract_math_expressions, math_goals),
+        Benchmark("calculator_agent.extract_math_expressions", calculator_agent.extract_math_expressions, math_adversarial, "adversarial"),
+        Benchmark("calculator_agent.evaluate_expression", _ignore_errors(calculator_agent.evaluate_expression), expressions),
+        Benchmark("calculator_agent.evaluate_expression", _ignore_errors(calculator_agent.evaluate_expression), expressions_adversarial, "adversarial"),
+        Benchmark("dictionary_agent.extract_word_to_define", dictionary_agent.extract_word_to_define, definition_goals),
+        Benchmark("dictionary_agent.extract_word_to_define", dictionary_agent.extract_word_to_define, definition_adversarial, "adversarial"),
+        Benchmark("dictionary_agent.parse_definition_data", dictionary_agent.parse_definition_data,
+                  [make_definition_payload(1, 3, 5), make_definition_payload(2, 2, 3)]),
+        Benchmark("dictionary_agent.parse_definition_data", dictionary_agent.parse_definition_data,
+                  [make_definition_payload(50, 20, 50)], "adversarial"),
+        Benchmark("main.extract_agent_output", lambda args: extract_agent_output(*args), agent_outputs),
+        Benchmark("main.extract_agent_output", lambda args: extract_agent_output(*args), agent_outputs_adversarial, "adversarial"),
+        Benchmark("web_interface.classify_log_line", classify_log_line, log_lines),
+        Benchmark("web_interface.classify_log_line", classify_log_line, log_adversarial, "adversarial"),
+    ]
+
+def compare(results: list, baseline_path: str, max_regression: float) -> list:
+    """Return (benchmark, baseline p50, current p50) for p50 regressions above max_regression percent"""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r["name"], r["kind"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["name"], result["kind"]))
+        if previous and result["p50_us"] > previous["p50_us"] * (1 + max_regression / 100):
+            regressions.append((f"{result['name']} [{result['kind']}]", previous["p50_us"], result["p50_us"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the CPU-bound hot paths")
+    parser.add_argument("--repetitions", type=int, default=50, help="timed samples per benchmark")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed samples before measuring")
+    parser.add_argument("--min-sample-time", type=float, default=0.002, help="seconds per timed sample (calls are batched to reach it)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="JSON results file (default: evals/benchmark_results_<timestamp>.json)")
+    parser.add_argument("--baseline", help="previous results file; exit 1 if a p50 regressed by more than --max-regression")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p50 slowdown vs the baseline, in percent")
+    args = parser.parse_args()
+
+    benchmarks = [b for b in build_benchmarks() if args.filter in b.name]
+    print(f"⏱️ Running {len(benchmarks)} benchmarks ({args.warmup} warmup + {args.repetitions} timed samples each)")
+    print(f"{'Benchmark':<58} {'p50 µs':>10} {'p95 µs':>10} {'p99 µs':>10} {'ops/sec':>12}")
+    print("-" * 104)
+
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        for benchmark in benchmarks:
+            # Agents print diagnostics; keep them out of the timings and the report
+            with redirect_stdout(devnull):
+                result = benchmark.run(args.repetitions, args.warmup, args.min_sample_time)
+            results.append(result)
+            label = f"{result['name']} [{result['kind']}]"
+            print(f"{label:<58} {result['p50_us']:>10.2f} {result['p95_us']:>10.2f} {result['p99_us']:>10.2f} {result['ops_per_sec']:>12,.0f}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "settings": {"repetitions": args.repetitions, "warmup": args.warmup, "min_sample_time": args.min_sample_time},
+        "results": results
+    }
+    output = args.output
+    if not output:
+        evals_dir = "../evals" if os.path.isdir("../evals") else "evals"
+        output = os.path.join(evals_dir, f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to: {output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.max_regression:.0f}% vs {args.baseline}:")
+            for label, before, after in regressions:
+                print(f"   {label}: p50 {before:.2f}µs → {after:.2f}µs")
+            sys.exit(1)
+        print(f"\n✅ No p50 regressions over {args.max_regression:.0f}% vs {args.baseline}")
+
+if __name__ == "__main__":
+    main()
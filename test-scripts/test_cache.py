@@ -0,0 +1,145 @@
+# test_cache.py
+# Tests for the LRU + TTL cache behind the plan, SpaceX and weather caches (agents/cache.py)
+
+import sys
+import threading
+sys.path.append('..')  # Add parent directory to path for imports
+
+from agents.cache import TTLCache
+
+class FakeClock:
+    """Manually advanced clock for TTLCache(clock=...)"""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+def test_fresh_read_until_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("k", "v")
+    clock.advance(10)  # age == ttl is still fresh
+    assert cache.get("k") == "v"
+    assert cache.get_stale("k") == ("v", True)
+    clock.advance(0.001)
+    assert cache.get("k", "default") == "default"
+
+def test_expired_entry_is_dropped_without_stale_window():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("k", "v")
+    clock.advance(11)
+    assert cache.get("k") is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+def test_stale_window():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, stale_ttl=20, clock=clock)
+    cache.set("k", "v")
+    clock.advance(15)
+    # get() treats stale as a miss but keeps the entry for get_stale()
+    assert cache.get("k") is None
+    assert len(cache) == 1
+    assert cache.get_stale("k") == ("v", False)
+    clock.advance(15)  # age 30 == ttl + stale_ttl
+    assert cache.get_stale("k") == ("v", False)
+    clock.advance(0.001)
+    assert cache.get_stale("k") == (None, False)
+    assert len(cache) == 0
+
+def test_stored_at_backdates_entries():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, stale_ttl=10, clock=clock)
+    cache.set("old", "v", stored_at=clock.now - 15)
+    assert cache.get_stale("old") == ("v", False)
+    assert [key for key, _, _ in cache.items()] == []
+
+def test_lru_eviction_order():
+    cache = TTLCache(maxsize=2, ttl=10, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    cache.set("a", 10)  # overwriting refreshes recency without evicting
+    cache.set("d", 4)
+    assert cache.get("c") is None
+    assert cache.get("a") == 10 and cache.get("d") == 4
+    assert cache.stats()["evictions"] == 2
+
+def test_get_stale_refreshes_recency():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, stale_ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    clock.advance(15)
+    cache.get_stale("a")
+    cache.set("c", 3)
+    assert cache.get_stale("a") == (1, False)
+    assert cache.get_stale("b") == (None, False)
+
+def test_stats_counters():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, stale_ttl=10, clock=clock)
+    cache.get("missing")                 # miss
+    cache.set("a", 1)
+    cache.get("a")                       # hit
+    cache.get_stale("a")                 # hit
+    clock.advance(15)
+    cache.get_stale("a")                 # stale hit
+    cache.get("a")                       # miss (stale)
+    clock.advance(10)
+    cache.get_stale("a")                 # miss + expiration
+    cache.set("b", 2)
+    cache.set("c", 3)
+    cache.set("d", 4)                    # eviction
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 2,
+        "stale_hits": 1,
+        "misses": 3,
+        "evictions": 1,
+        "expirations": 1,
+        "hit_ratio": 0.5
+    }
+
+def test_items_skips_expired_and_pop_clear():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, stale_ttl=10, clock=clock)
+    cache.set("old", 1)
+    clock.advance(5)
+    cache.set("new", 2)
+    clock.advance(6)
+    assert [(key, value) for key, value, _ in cache.items()] == [("new", 2)]
+    assert cache.pop("new") == 2
+    assert cache.pop("new", "gone") == "gone"
+    cache.clear()
+    assert len(cache) == 0
+
+def test_concurrent_updates_keep_counters_consistent():
+    cache = TTLCache(maxsize=50, ttl=10, clock=FakeClock())
+
+    def worker(offset):
+        for i in range(2000):
+            cache.set((offset, i % 100), i)
+            cache.get((offset, (i * 7) % 100))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats["size"] == 50
+    assert stats["hits"] + stats["misses"] == 8 * 2000
+
+if __name__ == "__main__":
+    from unit_runner import run_tests
+    run_tests(globals(), "cache")
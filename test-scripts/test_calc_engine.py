@@ -0,0 +1,97 @@
+# test_calc_engine.py
+# Tests for the safe expression engine behind calculator_agent (agents/calc_engine.py, agents/calc_vector.py)
+
+import sys
+sys.path.append('..')  # Add parent directory to path for imports
+
+import math
+from agents import calc_engine, calc_vector
+from agents.calc_engine import CalculationTooExpensive, ExpressionError
+
+def template(expression, bindings):
+    values, ok = calc_vector.evaluate_template(expression, bindings)
+    return values.tolist(), ok.tolist()
+
+def raises(error_type, function, *args, **kwargs):
+    try:
+        function(*args, **kwargs)
+    except error_type as e:
+        return e
+    raise AssertionError(f"{function.__name__}{args} did not raise {error_type.__name__}")
+
+def test_template_variable_names_keep_their_case():
+    assert template("Price*2", {"Price": [1, 2]}) == ([2.0, 4.0], [True, True])
+    assert template("Price * Qty", {"Price": [2], "Qty": [3]}) == ([6.0], [True])
+    # Names are case-sensitive, like Python identifiers
+    raises(ExpressionError, calc_vector.evaluate_template, "price*2", {"Price": [1]})
+
+def test_template_keywords_are_still_normalized():
+    assert template("SQRT(x) Plus 1", {"x": [4, 9]}) == ([3.0, 4.0], [True, True])
+    assert template("x divided by 2", {"x": [8]}) == ([4.0], [True])
+
+def test_template_variables_named_like_operator_words():
+    assert template("power times 2", {"power": [3]}) == ([6.0], [True])
+    assert template("minus - plus", {"minus": [5], "plus": [2]}) == ([3.0], [True])
+    assert template("plus_fee + base", {"plus_fee": [1], "base": [2]}) == ([3.0], [True])
+
+def test_template_bindings_shadow_constants():
+    assert template("e * 2", {"e": [1, 2]}) == ([2.0, 4.0], [True, True])
+    assert template("pi + 1", {"pi": [0]}) == ([1.0], [True])
+    values, _ = template("e * 2", {})
+    assert math.isclose(values[0], 2 * math.e)
+
+def test_template_rejects_invalid_variable_names():
+    raises(ExpressionError, calc_vector.evaluate_template, "x + 1", {"x y": [1]})
+    raises(ExpressionError, calc_vector.evaluate_template, "x + 1", {"1x": [1]})
+
+def test_template_reports_non_finite_results():
+    assert template("1 / x", {"x": [1, 0]}) == ([1.0, math.inf], [True, False])
+
+def test_batch_matches_scalar_evaluation():
+    expressions = ["2 + 3", "40 + 2", "2 ** 10", "sqrt(16) times 2", "1 / 0", "e * 2"]
+    results = calc_vector.evaluate_batch(expressions)
+    for expression, (value, error) in zip(expressions, results):
+        try:
+            expected, expected_error = calc_engine.evaluate(expression), None
+        except ExpressionError as e:
+            expected, expected_error = None, e
+        assert (error is None) == (expected_error is None), (expression, error, expected_error)
+        if error is None:
+            assert math.isclose(value, expected), (expression, value, expected)
+
+def test_integer_results_beyond_float_range_are_too_expensive():
+    for expression in ["10**309", "10**500", "factorial(171)", "9**9**9", "factorial(10**20)"]:
+        error = raises(CalculationTooExpensive, calc_engine.evaluate, expression)
+        assert error.error_type == "too_expensive"
+
+def test_integer_results_up_to_float_range_are_returned():
+    assert calc_engine.evaluate("10**308") == 1e308
+    assert calc_engine.evaluate("factorial(170)") == float(math.factorial(170))
+
+def test_small_intermediates_stay_in_process():
+    assert calc_engine.evaluate("10**500 % 7", timeout=2.0) == float(10**500 % 7)
+
+def test_big_intermediates_run_in_a_reused_worker():
+    assert calc_engine.INLINE_DIGITS < calc_engine.MAX_INTERMEDIATE_DIGITS
+    assert calc_engine.evaluate("factorial(2800) % 1000", timeout=10.0) == 0.0
+    assert calc_engine._idle_workers.qsize() == 1
+    assert calc_engine.evaluate("10**5000 % 7", timeout=10.0) == float(10**5000 % 7)
+    assert calc_engine._idle_workers.qsize() == 1
+    # Errors raised in the worker come back as ExpressionError
+    raises(ExpressionError, calc_engine.evaluate, "factorial(2800) / 0", timeout=10.0)
+
+def test_worker_timeout_kills_the_worker():
+    calc_engine.evaluate("factorial(2800) % 7", timeout=10.0)
+    error = raises(CalculationTooExpensive, calc_engine.evaluate, "factorial(2801) % 7", timeout=1e-6)
+    assert "time limit" in str(error)
+    assert calc_engine._idle_workers.qsize() == 0
+    assert calc_engine.evaluate("factorial(2802) % 1000", timeout=10.0) == 0.0
+
+def test_oversized_intermediates_are_too_expensive():
+    raises(CalculationTooExpensive, calc_engine.evaluate, "factorial(4000) % 7")
+    raises(CalculationTooExpensive, calc_engine.evaluate, "9**9**9 % 7")
+    raises(CalculationTooExpensive, calc_engine.evaluate, "round(5, -10**6)")
+
+if __name__ == "__main__":
+    from unit_runner import run_tests
+    run_tests(globals(), "calculator engine")
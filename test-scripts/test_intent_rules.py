@@ -0,0 +1,101 @@
+# test_intent_rules.py
+# Tests for the Aho-Corasick keyword matcher and intent rules (agents/intent_rules.py)
+
+import sys
+import random
+sys.path.append('..')  # Add parent directory to path for imports
+
+from agents import intent_rules
+from agents.intent_rules import KeywordAutomaton
+
+def naive_labels(keywords: dict, text: str) -> set:
+    """Reference matcher: scan text for every keyword occurrence with str.find"""
+    labels = set()
+    for label, words in keywords.items():
+        for word in words:
+            word = word.lower()
+            start = text.find(word)
+            while start != -1:
+                end = start + len(word) - 1
+                ok_start = not word[0].isalnum() or start == 0 or not text[start - 1].isalnum()
+                ok_end = not word[-1].isalnum() or end == len(text) - 1 or not text[end + 1].isalnum()
+                if ok_start and ok_end:
+                    labels.add(label)
+                    break
+                start = text.find(word, start + 1)
+    return labels
+
+def naive_classify(goal: str) -> str:
+    found = naive_labels(intent_rules.KEYWORDS, goal.lower().strip())
+    for intent, required, _ in intent_rules.INTENTS:
+        if required <= found:
+            return intent
+    return None
+
+def random_text(rng: random.Random, vocabulary: list) -> str:
+    pieces = []
+    for _ in range(rng.randint(0, 12)):
+        choice = rng.random()
+        if choice < 0.5:
+            pieces.append(rng.choice(vocabulary))
+        elif choice < 0.8:
+            # Fragments glued to keywords exercise the word-boundary checks
+            pieces.append(rng.choice(vocabulary)[:rng.randint(1, 4)] + rng.choice(vocabulary))
+        else:
+            pieces.append("".join(rng.choice("abcdehimnorstuwy+-*/=^ ,.?'") for _ in range(rng.randint(1, 6))))
+    return rng.choice([" ", "", "  "]).join(pieces)
+
+def test_overlapping_keywords():
+    keywords = {"a": ["he", "she", "hers"], "b": ["his"], "c": ["rs"], "d": ["+"]}
+    automaton = KeywordAutomaton(keywords)
+    for text in ["ushers", "she", "hers", "his hers", "ahishers", "a+b", "he+she", "shis", ""]:
+        assert automaton.find_labels(text) == naive_labels(keywords, text), text
+
+def test_keywords_sharing_prefixes_and_suffixes():
+    keywords = {"short": ["mean"], "long": ["mean of"], "suffix": ["of"], "inner": ["an o"]}
+    automaton = KeywordAutomaton(keywords)
+    for text in ["mean of", "the mean", "meaning of", "a mean offer", "mean  of", "an of"]:
+        assert automaton.find_labels(text) == naive_labels(keywords, text), text
+
+def test_word_boundaries():
+    labels = intent_rules.topics
+    assert "conversational" not in labels("this")             # "hi" inside a word
+    assert "conversational" in labels("hi there")
+    assert "spacex" in labels("next launch?")
+    assert "spacex" not in labels("relaunched")
+    assert "calculation" in labels("2+2")                      # symbols match anywhere
+    assert "calculation" not in labels("well-known")           # " - " needs the spaces
+    assert "weather" in labels("conditions") and "weather" in labels("condition")
+
+def test_priority_ties_follow_intent_order():
+    # Several intents match; the first in INTENTS wins
+    assert intent_rules.classify("hello, what is the weather for the spacex launch") == "conversational"
+    assert intent_rules.classify("define the average") == "calculation"
+    assert intent_rules.classify("spacex launch weather") == "spacex_weather"
+    assert intent_rules.classify("weather news") == "weather"
+    assert intent_rules.classify("spacex news") == "spacex"
+    assert intent_rules.classify("what is spacex") == "spacex"
+    assert intent_rules.classify("what is a quark") == "question"
+    assert intent_rules.classify("tell me a story") is None
+    assert intent_rules.classify("launch now", short_goal_words=3) == "conversational"
+
+def test_fuzz_against_naive_matcher():
+    rng = random.Random(14)
+    automaton = KeywordAutomaton(intent_rules.KEYWORDS)
+    vocabulary = [word for words in intent_rules.KEYWORDS.values() for word in words]
+    vocabulary += ["the", "next", "of", "at", "relaunch", "this", "hike", "meaning", "okay?", "2", "x"]
+    for _ in range(20000):
+        text = random_text(rng, vocabulary).lower()
+        expected = naive_labels(intent_rules.KEYWORDS, text)
+        assert automaton.find_labels(text) == expected, (text, automaton.find_labels(text), expected)
+        # topics()/classify() strip the goal first, so " - " at either end is not an operator
+        assert intent_rules.topics(text) == naive_labels(intent_rules.KEYWORDS, text.strip()), text
+        assert intent_rules.classify(text) == naive_classify(text), text
+
+def test_classify_batch_matches_classify():
+    goals = ["spacex launch weather", "define x", "spacex launch weather", "hi", "tell me a story"]
+    assert intent_rules.classify_batch(goals) == [intent_rules.classify(goal) for goal in goals]
+
+if __name__ == "__main__":
+    from unit_runner import run_tests
+    run_tests(globals(), "intent rule")
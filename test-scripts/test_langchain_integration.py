@@ -20,11 +20,12 @@ def test_langchain_integration():
     print("\n1. Testing imports and initialization...")
     try:
         from agents.google_adk_agent import GoogleADKCoordinator
+        from agents import cassette
         print("✅ Successfully imported GoogleADKCoordinator")
         
-        # Check if API key is available
+        # Check if API key is available (not needed when replaying a cassette)
         api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
+        if not api_key and not cassette.replaying():
             print("❌ GOOGLE_API_KEY not found - skipping LangChain tests")
             return
         
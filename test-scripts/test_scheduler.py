@@ -0,0 +1,151 @@
+# test_scheduler.py
+# Tests for the READS/WRITES dependency scheduler (agents/scheduler.py)
+
+import sys
+import asyncio
+import threading
+import time
+import types
+sys.path.append('..')  # Add parent directory to path for imports
+
+from agents import scheduler
+
+def make_agent(name, reads=None, writes=None, delay=0.0, fail=False, log=None):
+    """Fake agent module: writes "<key>" = name for each key in writes"""
+    agent = types.ModuleType(name)
+    if reads is not None:
+        agent.READS = reads
+    if writes is not None:
+        agent.WRITES = writes
+
+    def run(data):
+        if log is not None:
+            log.append(("start", name, sorted(data)))
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        data = dict(data)
+        for key in writes or [name]:
+            data[key] = name
+        if log is not None:
+            log.append(("end", name))
+        return data
+
+    agent.run = run
+    return agent
+
+def loader(agents):
+    def load(name):
+        if name not in agents:
+            raise ImportError(f"No module named 'agents.{name}'")
+        return agents[name]
+    return load
+
+def test_build_dag_orders_by_reads_and_writes():
+    io = [
+        (frozenset(), frozenset({"spacex"})),          # spacex
+        (frozenset({"spacex"}), frozenset({"weather"})),  # weather needs spacex
+        (frozenset(), frozenset({"calc"})),            # independent
+        (None, frozenset({"summary"}))                 # reads everything
+    ]
+    deps = scheduler.build_dag(io)
+    assert deps == [set(), {0}, set(), {0, 1, 2}]
+    assert scheduler.execution_levels(deps) == [[0, 2], [1], [3]]
+
+def test_undeclared_agents_run_strictly_in_order():
+    io = [(None, None), (None, None), (None, None)]
+    deps = scheduler.build_dag(io)
+    assert deps == [set(), {0}, {0, 1}]
+    assert scheduler.execution_levels(deps) == [[0], [1], [2]]
+
+def test_dependencies_only_point_backwards():
+    # A reader planned before its writer does not wait for it (no cycles possible)
+    io = [(frozenset({"weather"}), frozenset({"summary"})), (frozenset(), frozenset({"weather"}))]
+    assert scheduler.build_dag(io) == [set(), set()]
+
+def test_missing_writer_sees_initial_data_only():
+    agents = {"weather_agent": make_agent("weather_agent", reads=["spacex"], writes=["weather"])}
+    final_data, results = scheduler.execute_plan(["weather_agent"], {"goal": "g"}, loader(agents))
+    assert results[0]["error"] is None
+    assert results[0]["input"] == {"goal": "g"}
+    assert final_data == {"goal": "g", "weather": "weather_agent"}
+
+def test_independent_agents_run_concurrently():
+    agents = {
+        "a": make_agent("a", reads=[], writes=["a"], delay=0.2),
+        "b": make_agent("b", reads=[], writes=["b"], delay=0.2)
+    }
+    start = time.perf_counter()
+    final_data, _ = scheduler.execute_plan(["a", "b"], {}, loader(agents), max_workers=2)
+    assert time.perf_counter() - start < 0.35
+    assert final_data == {"a": "a", "b": "b"}
+
+def test_dependent_agent_waits_and_sees_only_its_ancestors():
+    log = []
+    agents = {
+        "spacex": make_agent("spacex", reads=[], writes=["spacex"], delay=0.05, log=log),
+        "calc": make_agent("calc", reads=[], writes=["calc"], delay=0.1, log=log),
+        "weather": make_agent("weather", reads=["spacex"], writes=["weather"], log=log)
+    }
+    _, results = scheduler.execute_plan(["spacex", "calc", "weather"], {"goal": "g"}, loader(agents), max_workers=4)
+    assert log.index(("end", "spacex")) < log.index(("start", "weather", ["goal", "spacex"]))
+    # calc is not an ancestor of weather, so its output is not in weather's input
+    assert results[2]["input"] == {"goal": "g", "spacex": "spacex"}
+
+def test_outputs_merge_in_plan_order():
+    # Both write the same key; the later agent in the plan wins even if it finishes first
+    agents = {
+        "slow": make_agent("slow", reads=[], writes=["value"], delay=0.1),
+        "fast": make_agent("fast", reads=[], writes=["value"])
+    }
+    final_data, _ = scheduler.execute_plan(["slow", "fast"], {}, loader(agents), max_workers=2)
+    assert final_data["value"] == "fast"
+
+def test_failures_and_load_errors_are_reported_per_agent():
+    agents = {
+        "broken": make_agent("broken", reads=[], writes=["broken"], fail=True),
+        "ok": make_agent("ok", reads=[], writes=["ok"])
+    }
+    final_data, results = scheduler.execute_plan(["missing", "broken", "ok"], {"goal": "g"}, loader(agents), max_workers=2)
+    assert isinstance(results[0]["error"], ImportError)
+    assert isinstance(results[1]["error"], RuntimeError)
+    assert results[1]["output"] == results[1]["input"]
+    assert results[2]["error"] is None
+    assert final_data == {"goal": "g", "ok": "ok"}
+
+def test_sequential_and_threaded_paths_agree():
+    def agents():
+        return {
+            "spacex": make_agent("spacex", reads=[], writes=["spacex"]),
+            "weather": make_agent("weather", reads=["spacex"], writes=["weather"]),
+            "summary": make_agent("summary")
+        }
+    sequence = ["spacex", "weather", "summary"]
+    sequential = scheduler.execute_plan(sequence, {"goal": "g"}, loader(agents()), max_workers=1)
+    threaded = scheduler.execute_plan(sequence, {"goal": "g"}, loader(agents()), max_workers=4)
+    assert sequential == threaded
+
+def test_async_path_matches_threaded_path():
+    arun_threads = []
+
+    spacex = make_agent("spacex", reads=[], writes=["spacex"], delay=0.05)
+    async def arun(data):
+        arun_threads.append(threading.current_thread())
+        await asyncio.sleep(0.05)
+        return {**data, "weather": "weather"}
+    weather = make_agent("weather", reads=["spacex"], writes=["weather"])
+    weather.arun = arun
+    agents = {"spacex": spacex, "weather": weather, "summary": make_agent("summary")}
+    sequence = ["spacex", "weather", "summary", "missing"]
+
+    threaded = scheduler.execute_plan(sequence, {"goal": "g"}, loader(agents), max_workers=4)
+    final_data, results = asyncio.run(scheduler.aexecute_plan(sequence, {"goal": "g"}, loader(agents)))
+    assert final_data == threaded[0]
+    assert [r["input"] for r in results] == [r["input"] for r in threaded[1]]
+    assert isinstance(results[3]["error"], ImportError)
+    # arun is awaited on the event loop thread, not offloaded
+    assert arun_threads == [threading.main_thread()]
+
+if __name__ == "__main__":
+    from unit_runner import run_tests
+    run_tests(globals(), "scheduler")
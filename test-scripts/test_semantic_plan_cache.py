@@ -0,0 +1,107 @@
+# test_semantic_plan_cache.py
+# Calibration tests for paraphrase plan reuse (agents/semantic_plan_cache.py)
+
+import sys
+import time
+sys.path.append('..')  # Add parent directory to path for imports
+
+from agents.semantic_plan_cache import SemanticPlanCache, embed
+
+SPACEX_WEATHER = ["spacex_agent", "weather_agent", "summary_agent"]
+
+# (stored goal, query goal) paraphrases that should reuse the plan
+PARAPHRASES = [
+    ("next spacex launch weather?", "weather for the upcoming SpaceX launch"),
+    ("Find the next SpaceX launch, check weather at that location, and summarize if it may be delayed.",
+     "Check the weather at the next SpaceX launch site and tell me if it could be delayed"),
+    ("Get information about the next SpaceX mission and launch details.", "Tell me about the next SpaceX mission"),
+    ("When is the next SpaceX launch?", "what's the date of the upcoming spacex launch"),
+    ("Tell me about SpaceX Starship launch and weather forecast at the site.", "Starship launch and the weather forecast at the launch site"),
+    ("What's the next rocket launch and will bad weather delay it?", "Will bad weather delay the next rocket launch?"),
+    ("What's the weather in London?", "weather in london today"),
+    ("What's the weather in Paris?", "How is the weather in Paris right now"),
+    ("Show me the weather forecast for Tokyo", "Tokyo weather forecast"),
+    ("What is the temperature in New York?", "current temperature in new york"),
+    ("Calculate 15% tip on $47.50", "calculate a 15% tip on $47.50"),
+    ("calculate 2 + 2", "Calculate 2+2 please"),
+    ("What is the average of 3, 5, 7 and 9?", "average of 3, 5, 7, 9"),
+    ("Compute the standard deviation of 2, 4, 4, 4, 5, 5, 7, 9", "standard deviation of 2 4 4 4 5 5 7 9"),
+    ("Define quantum entanglement", "define the term quantum entanglement"),
+    ("What is the meaning of serendipity?", "meaning of the word serendipity"),
+    ("Define ephemeral", "Please define ephemeral"),
+    ("Latest technology news", "latest tech news"),
+    ("Show me the latest news headlines", "latest news headlines please"),
+    ("Get the next SpaceX launch and check the weather there", "Get the next spacex launch and check weather there"),
+    ("Find the upcoming SpaceX launch and the weather conditions there", "Next SpaceX launch and weather conditions at the pad"),
+    ("Check weather conditions at Kennedy Space Center for rocket launches.", "rocket launch weather conditions at Kennedy Space Center"),
+]
+# (stored goal, query goal) that must not reuse the plan
+NEAR_MISSES = [
+    ("Get the next SpaceX launch and check the weather there", "Get the next SpaceX launch and check the news there"),
+    ("Get the next SpaceX launch and check the weather there", "Get the next SpaceX launch"),
+    ("Find the next SpaceX launch, check weather at that location, and summarize if it may be delayed.",
+     "Find the next SpaceX launch and summarize if it may be delayed."),
+    ("What's the weather in London?", "What's the news in London?"),
+    ("Define quantum entanglement", "Latest news on quantum entanglement"),
+    ("Calculate 15% tip on $47.50", "Define tip"),
+    ("What is the meaning of serendipity?", "What is the weather in Serendipity?"),
+    ("Latest SpaceX news", "Latest SpaceX launch"),
+    ("Weather forecast for the SpaceX launch", "Weather forecast for London"),
+    ("What is the temperature in New York?", "What is 5 + 3?"),
+]
+
+def cache_with(goal: str, sequence=None) -> SemanticPlanCache:
+    cache = SemanticPlanCache()
+    cache.add(goal, sequence or ["summary_agent"])
+    return cache
+
+def test_paraphrases_reuse_the_plan():
+    misses = []
+    for stored, query in PARAPHRASES:
+        sequence, similarity, matched = cache_with(stored).lookup(query)
+        if sequence is None:
+            misses.append((round(similarity, 3), stored, query))
+    # The default threshold is calibrated so nearly all of these hit
+    assert len(misses) <= 1, misses
+
+def test_request_example_paraphrase_hits():
+    cache = cache_with("next spacex launch weather?", SPACEX_WEATHER)
+    sequence, _, matched = cache.lookup("weather for the upcoming SpaceX launch")
+    assert sequence == SPACEX_WEATHER
+    assert matched == "next spacex launch weather?"
+
+def test_goals_differing_in_a_topic_never_share_a_plan():
+    for stored, query in NEAR_MISSES:
+        sequence, similarity, _ = cache_with(stored).lookup(query)
+        assert sequence is None, (similarity, stored, query)
+
+def test_goals_without_topics_are_not_cached():
+    cache = cache_with("how far away is mars")
+    assert cache.stats()["size"] == 0
+    assert cache.lookup("how far away is mars")[0] is None
+
+def test_best_match_is_taken_among_same_topic_goals():
+    cache = SemanticPlanCache()
+    cache.add("Get the next SpaceX launch and check the news there", ["spacex_agent", "news_agent", "summary_agent"])
+    cache.add("Is the weather good for the SpaceX launch", SPACEX_WEATHER)
+    sequence, _, _ = cache.lookup("Get the next SpaceX launch and check the weather there")
+    assert sequence == SPACEX_WEATHER
+
+def test_operator_spacing_does_not_matter():
+    assert float(embed("calculate 2+2") @ embed("calculate 2 + 2")) > 0.99
+
+def test_lookup_is_sub_millisecond_with_thousands_of_entries():
+    cache = SemanticPlanCache(capacity=4096)
+    for i in range(4096):
+        cache.add(f"weather forecast for city number {i}", ["weather_agent", "summary_agent"])
+    start = time.perf_counter()
+    for _ in range(100):
+        cache.lookup("weather forecast for city number 17")
+    assert (time.perf_counter() - start) / 100 < 0.001
+
+if __name__ == "__main__":
+    from unit_runner import run_tests
+    for stored, query in PARAPHRASES + NEAR_MISSES:
+        print(f"{float(embed(stored) @ embed(query)):.3f}  {stored!r} ~ {query!r}")
+    print()
+    run_tests(globals(), "semantic plan cache")
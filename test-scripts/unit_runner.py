@@ -0,0 +1,20 @@
+# unit_runner.py
+# Shared __main__ runner for the offline unit test scripts (python test_<name>.py)
+
+import sys
+
+def run_tests(namespace: dict, label: str):
+    """
+    Run every test_* function in namespace, print ✅/❌ per test and exit 1 if any failed.
+    """
+    tests = [value for name, value in list(namespace.items()) if name.startswith("test_") and callable(value)]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {type(e).__name__}: {e}")
+    print(f"\n📊 {len(tests) - failed}/{len(tests)} {label} tests passed")
+    sys.exit(1 if failed else 0)
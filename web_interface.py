@@ -1,45 +1,295 @@
 # web_interface.py
 # Interactive Web UI for Multi-Agent AI System
 
-from flask import Flask, render_template, request, jsonify, stream_template
+from flask import Flask, Response, g, render_template, request, jsonify
+import contextvars
+import itertools
 import json
+import queue
+import threading
 import time
+import uuid
 from main import run_goal
+from agents import log_context, metrics
 import sys
 import os
 sys.path.append('test-scripts')  # Add test-scripts directory to path
 from automated_evaluation import AgentSystemEvaluator
-import io
-from contextlib import redirect_stdout, redirect_stderr
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__)
 
-# Global variable to store terminal logs
-terminal_logs = []
+# Number of recent events kept for SSE resume, and seconds between keep-alive comments
+LOG_STREAM_BUFFER = int(os.getenv("LOG_STREAM_BUFFER", "1000"))
+LOG_STREAM_KEEPALIVE = float(os.getenv("LOG_STREAM_KEEPALIVE", "15"))
+
+class LogEventBus:
+    """Ring buffer of log events with monotonic ids, for the SSE log stream"""
+    def __init__(self, maxlen=LOG_STREAM_BUFFER):
+        self.events = deque(maxlen=maxlen)  # (id, event)
+        self.ids = itertools.count(1)
+        self.last_id = 0
+        self.condition = threading.Condition()
+    
+    def publish(self, event):
+        with self.condition:
+            self.last_id = next(self.ids)
+            self.events.append((self.last_id, event))
+            self.condition.notify_all()
+        return self.last_id
+    
+    def wait_for_events(self, after_id, timeout):
+        """Return events with id > after_id, waiting up to timeout seconds for one"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id > after_id, timeout=timeout)
+            if self.last_id <= after_id:
+                return []
+            # Events are in id order; only the tail past after_id is new
+            new_count = min(self.last_id - after_id, len(self.events))
+            return list(itertools.islice(self.events, len(self.events) - new_count, None))
+
+log_events = LogEventBus()
+
+# Most recent log entries across all requests, for /api/logs
+recent_logs = deque(maxlen=100)
 
 class TerminalCapture:
-    """Capture terminal output for web display"""
-    def __init__(self):
+    """Capture terminal output of one request for web display"""
+    def __init__(self, request_id=None, events=None):
         self.logs = []
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        # Optional queue that receives each log event as it is written (streaming responses)
+        self.events = events
     
     def write(self, text):
         if text.strip():
             timestamp = time.strftime('%H:%M:%S')
-            self.logs.append({
+            entry = {
                 'timestamp': timestamp,
                 'message': text.strip(),
                 'type': 'output'
-            })
+            }
+            self.logs.append(entry)
             # Keep only last 100 log entries
             if len(self.logs) > 100:
                 self.logs = self.logs[-100:]
+            recent_logs.append(entry)
+            event = {
+                'type': 'log',
+                'request_id': self.request_id,
+                'timestamp': timestamp,
+                'message': text.strip(),
+                'agent': classify_log_line(text)
+            }
+            log_events.publish(event)
+            if self.events is not None:
+                self.events.put(event)
         return len(text)
     
     def flush(self):
         pass
 
-# Global terminal capture instance
-terminal_capture = TerminalCapture()
+class RequestIds:
+    """Server-issued request ids. A page reserves one before starting a run so it
+    can pick that run's lines out of the log stream; each id is claimed by at most
+    one request, so a client can't attach to another request's capture"""
+    def __init__(self, maxlen=1000, ttl=300):
+        self.reserved = OrderedDict()  # id -> reserved at
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self.lock = threading.Lock()
+    
+    def reserve(self):
+        request_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            self.reserved[request_id] = time.time()
+            while len(self.reserved) > self.maxlen:
+                self.reserved.popitem(last=False)
+        return request_id
+    
+    def claim(self, request_id=None):
+        """Return request_id if it was reserved and not yet used, otherwise a new id"""
+        with self.lock:
+            reserved_at = self.reserved.pop(request_id, None) if request_id else None
+        if reserved_at is not None and time.time() - reserved_at <= self.ttl:
+            return request_id
+        return uuid.uuid4().hex[:12]
+
+request_ids = RequestIds()
+
+def claim_request_id():
+    """Server-side id for the current request (a reserved X-Request-ID is honoured once)"""
+    if 'request_id' not in g:
+        g.request_id = request_ids.claim(request.headers.get('X-Request-ID'))
+    return g.request_id
+
+def new_capture(events=None):
+    """Create the log capture for the current request"""
+    return TerminalCapture(claim_request_id(), events)
+
+def classify_log_line(log_msg):
+    """Detect which agent a log line belongs to (None for system lines)"""
+    if 'spacex' in log_msg.lower() or '🚀' in log_msg:
+        return 'spacex'
+    elif 'weather' in log_msg.lower() or '🌍' in log_msg:
+        return 'weather'
+    elif 'summary' in log_msg.lower() or '📝' in log_msg:
+        return 'summary'
+    elif 'adk' in log_msg.lower() or '🧠' in log_msg:
+        return 'google_adk'
+    return None
+
+# Evaluation jobs: concurrent workers, max queued+running jobs, finished jobs kept for retrieval
+EVAL_JOB_WORKERS = int(os.getenv("EVAL_JOB_WORKERS", "1"))
+EVAL_JOB_MAX_PENDING = int(os.getenv("EVAL_JOB_MAX_PENDING", "4"))
+EVAL_JOB_HISTORY = int(os.getenv("EVAL_JOB_HISTORY", "20"))
+
+class EvaluationJobs:
+    """Runs AgentSystemEvaluator jobs on a bounded background pool"""
+    FINISHED = ('completed', 'failed', 'cancelled')
+    
+    def __init__(self, workers=EVAL_JOB_WORKERS, max_pending=EVAL_JOB_MAX_PENDING, history=EVAL_JOB_HISTORY):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evaluation")
+        self.max_pending = max_pending
+        self.history = history
+        self.jobs = OrderedDict()  # job id -> job dict
+        self.lock = threading.Lock()
+    
+    def submit(self, job_id=None):
+        """Queue a new evaluation job; returns None when the queue is full"""
+        with self.lock:
+            active = sum(1 for job in self.jobs.values() if job['status'] not in self.FINISHED)
+            if active >= self.max_pending:
+                return None
+            if not job_id or job_id in self.jobs:
+                job_id = uuid.uuid4().hex[:12]
+            job = {
+                'id': job_id,
+                'status': 'queued',
+                'submitted_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'started_at': None,
+                'finished_at': None,
+                'progress': {'completed': 0, 'total': None, 'cases': []},
+                'result': None,
+                'error': None,
+                'cancel': threading.Event(),
+                'capture': TerminalCapture(job_id)
+            }
+            self.jobs[job_id] = job
+            self._prune()
+        self.pool.submit(self._run, job)
+        return job
+    
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def cancel(self, job_id):
+        """Request cancellation; a running job stops before its next test case"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] in self.FINISHED:
+                return job
+            job['cancel'].set()
+            if job['status'] == 'queued':
+                job['status'] = 'cancelled'
+                job['finished_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            return job
+    
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in self.FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+    
+    def _run(self, job):
+        with self.lock:
+            if job['cancel'].is_set():
+                return
+            job['status'] = 'running'
+            job['started_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        
+        capture = job['capture']
+        
+        def on_progress(completed, total, evaluation):
+            with self.lock:
+                job['progress']['completed'] = completed
+                job['progress']['total'] = total
+                job['progress']['cases'].append({
+                    'goal': evaluation.get('goal'),
+                    'success': evaluation.get('success', False),
+                    'execution_time': evaluation.get('execution_time'),
+                    'error': evaluation.get('error')
+                })
+        
+        try:
+            capture.write("🧪 Starting comprehensive system evaluation...")
+            capture.write("=" * 60)
+            with log_context.capture(capture):
+                evaluator = AgentSystemEvaluator()
+                results = evaluator.run_full_evaluation(progress_callback=on_progress,
+                                                        should_cancel=job['cancel'].is_set)
+            capture.write("=" * 60)
+            if results.get('cancelled'):
+                capture.write("🛑 Evaluation cancelled")
+            else:
+                capture.write("✅ Evaluation completed successfully!")
+            status, error = ('cancelled' if results.get('cancelled') else 'completed'), results.get('error')
+        except Exception as e:
+            capture.write(f"❌ Evaluation error: {str(e)}")
+            results, status, error = None, 'failed', str(e)
+        
+        with self.lock:
+            job['result'] = results
+            job['status'] = 'failed' if error else status
+            job['error'] = error
+            job['finished_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    
+    def describe(self, job):
+        """JSON-safe view of a job (without the final result)"""
+        with self.lock:
+            return {
+                'job_id': job['id'],
+                'status': job['status'],
+                'submitted_at': job['submitted_at'],
+                'started_at': job['started_at'],
+                'finished_at': job['finished_at'],
+                'progress': {
+                    'completed': job['progress']['completed'],
+                    'total': job['progress']['total'],
+                    'cases': list(job['progress']['cases'])
+                },
+                'error': job['error'],
+                'log_count': len(job['capture'].logs)
+            }
+
+evaluation_jobs = EvaluationJobs()
+
+# Streaming chat: threads running goals, max queued+running chats before new ones get a 429
+CHAT_STREAM_WORKERS = int(os.getenv("CHAT_STREAM_WORKERS", "8"))
+CHAT_STREAM_MAX_PENDING = int(os.getenv("CHAT_STREAM_MAX_PENDING", "32"))
+chat_stream_pool = ThreadPoolExecutor(max_workers=CHAT_STREAM_WORKERS, thread_name_prefix="chat-stream")
+chat_stream_slots = threading.BoundedSemaphore(CHAT_STREAM_MAX_PENDING)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses (SSE, chunked run_goal) are measured to the first byte
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 @app.route('/')
 def index():
@@ -51,9 +301,15 @@ def chat():
     """Chat interface page"""
     return render_template('chat.html')
 
+@app.route('/api/request_id', methods=['POST'])
+def api_request_id():
+    """Reserve a request id to send as X-Request-ID with the next run"""
+    return jsonify({'request_id': request_ids.reserve()})
+
 @app.route('/api/chat', methods=['POST'])
 def api_chat():
     """API endpoint for chat interface"""
+    capture = new_capture()
     try:
         data = request.json
         message = data.get('message', '')
@@ -62,55 +318,30 @@ def api_chat():
         if not message:
             return jsonify({'error': 'Message is required'}), 400
         
-        # Clear previous logs and add start message
-        terminal_capture.logs.clear()
-        terminal_capture.write(f"💬 Chat: {message}")
+        # Start message for this request's log
+        capture.write(f"💬 Chat: {message}")
         
         if agent:
-            terminal_capture.write(f"🎯 Focusing on agent: {agent}")
-        
-        terminal_capture.write("=" * 60)
+            capture.write(f"🎯 Focusing on agent: {agent}")
         
-        # Capture stdout/stderr while running the goal
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
+        capture.write("=" * 60)
         
-        try:
-            # Redirect output to our capture
-            sys.stdout = terminal_capture
-            sys.stderr = terminal_capture
-            
+        # Capture this request's stdout/stderr while running the goal
+        with log_context.capture(capture):
             # Run the goal/message as a task
             result = run_goal(message)
-            
-            terminal_capture.write("=" * 60)
-            terminal_capture.write("✅ Task completed successfully!")
-            
-        finally:
-            # Restore original stdout/stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+        
+        capture.write("=" * 60)
+        capture.write("✅ Task completed successfully!")
         
         # Process logs to extract agent-specific information
         workflow_logs = []
-        for log in terminal_capture.logs:
-            log_msg = log['message']
-            agent_type = None
-            
+        for log in capture.logs:
             # Detect which agent is speaking
-            if 'spacex' in log_msg.lower() or '🚀' in log_msg:
-                agent_type = 'spacex'
-            elif 'weather' in log_msg.lower() or '🌍' in log_msg:
-                agent_type = 'weather'
-            elif 'summary' in log_msg.lower() or '📝' in log_msg:
-                agent_type = 'summary'
-            elif 'adk' in log_msg.lower() or '🧠' in log_msg:
-                agent_type = 'google_adk'
-            
             workflow_logs.append({
-                'message': log_msg,
+                'message': log['message'],
                 'timestamp': log['timestamp'],
-                'agent': agent_type
+                'agent': classify_log_line(log['message'])
             })
         
         return jsonify({
@@ -120,20 +351,82 @@ def api_chat():
                 'raw_data': result
             },
             'workflow_logs': workflow_logs,
+            'request_id': capture.request_id,
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         })
         
     except Exception as e:
-        terminal_capture.write(f"❌ Error: {str(e)}")
+        capture.write(f"❌ Error: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e),
             'workflow_logs': [{'message': f'Error: {str(e)}', 'timestamp': time.strftime('%H:%M:%S'), 'agent': None}]
         }), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def api_chat_stream():
+    """Streaming chat endpoint: newline-delimited JSON events (log, token, done, error)"""
+    data = request.json or {}
+    message = data.get('message', '')
+    agent = data.get('agent', None)
+    
+    if not message:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    if not chat_stream_slots.acquire(blocking=False):
+        return jsonify({'error': 'Too many chats in progress, try again later'}), 429
+    
+    events = queue.Queue()
+    capture = new_capture(events)
+    
+    def worker():
+        capture.write(f"💬 Chat: {message}")
+        if agent:
+            capture.write(f"🎯 Focusing on agent: {agent}")
+        capture.write("=" * 60)
+        
+        try:
+            with log_context.capture(capture):
+                # Summary tokens are forwarded as soon as Gemini produces them
+                result = run_goal(message, on_token=lambda text: events.put({'type': 'token', 'text': text}))
+            
+            capture.write("=" * 60)
+            capture.write("✅ Task completed successfully!")
+            events.put({
+                'type': 'done',
+                'result': {
+                    'summary': result.get('ai_summary') or result.get('summary', 'Task completed successfully!'),
+                    'raw_data': result
+                },
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+            })
+        except Exception as e:
+            capture.write(f"❌ Error: {str(e)}")
+            events.put({'type': 'error', 'error': str(e)})
+        finally:
+            chat_stream_slots.release()
+            events.put(None)
+    
+    # Run in the caller's context so context variables carry over to the pool thread
+    context = contextvars.copy_context()
+    chat_stream_pool.submit(context.run, worker)
+    
+    def generate():
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield json.dumps(event, default=str) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/run_goal', methods=['POST'])
 def api_run_goal():
     """API endpoint to run a goal"""
+    capture = new_capture()
     try:
         data = request.json
         goal = data.get('goal', '')
@@ -141,100 +434,129 @@ def api_run_goal():
         if not goal:
             return jsonify({'error': 'Goal is required'}), 400
         
-        # Clear previous logs and add start message
-        terminal_capture.logs.clear()
-        terminal_capture.write(f"🚀 Starting execution for goal: {goal}")
-        terminal_capture.write("=" * 60)
-        
-        # Capture stdout/stderr while running the goal
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
+        # Start message for this request's log
+        capture.write(f"🚀 Starting execution for goal: {goal}")
+        capture.write("=" * 60)
         
-        try:
-            # Redirect output to our capture
-            sys.stdout = terminal_capture
-            sys.stderr = terminal_capture
-            
+        # Capture this request's stdout/stderr while running the goal
+        with log_context.capture(capture):
             # Run the goal
             result = run_goal(goal)
-            
-            terminal_capture.write("=" * 60)
-            terminal_capture.write("✅ Goal execution completed successfully!")
-            
-        finally:
-            # Restore original stdout/stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+        
+        capture.write("=" * 60)
+        capture.write("✅ Goal execution completed successfully!")
         
         return jsonify({
             'success': True,
             'result': result,
-            'logs': terminal_capture.logs,
+            'logs': capture.logs,
+            'request_id': capture.request_id,
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         })
         
     except Exception as e:
-        terminal_capture.write(f"❌ Error: {str(e)}")
+        capture.write(f"❌ Error: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e),
-            'logs': terminal_capture.logs
+            'logs': capture.logs
         }), 500
 
 @app.route('/api/evaluate', methods=['POST'])
 def api_evaluate():
-    """API endpoint to run full evaluation"""
-    try:
-        # Clear logs and start evaluation
-        terminal_capture.logs.clear()
-        terminal_capture.write("🧪 Starting comprehensive system evaluation...")
-        terminal_capture.write("=" * 60)
-        
-        # Capture output during evaluation
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        
-        try:
-            sys.stdout = terminal_capture
-            sys.stderr = terminal_capture
-            
-            evaluator = AgentSystemEvaluator()
-            results = evaluator.run_full_evaluation()
-            
-            terminal_capture.write("=" * 60)
-            terminal_capture.write("✅ Evaluation completed successfully!")
-            
-        finally:
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-        
-        return jsonify({
-            'success': True,
-            'evaluation': results,
-            'logs': terminal_capture.logs
-        })
-        
-    except Exception as e:
-        terminal_capture.write(f"❌ Evaluation error: {str(e)}")
+    """Submit a full evaluation as a background job"""
+    job = evaluation_jobs.submit(claim_request_id())
+    if job is None:
         return jsonify({
             'success': False,
-            'error': str(e),
-            'logs': terminal_capture.logs
-        }), 500
+            'error': 'Too many evaluation jobs queued, try again later'
+        }), 429
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/api/evaluate/{job['id']}",
+        'result_url': f"/api/evaluate/{job['id']}/result"
+    }), 202
+
+@app.route('/api/evaluate/<job_id>')
+def api_evaluate_status(job_id):
+    """Status and per-test-case progress of an evaluation job"""
+    job = evaluation_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({'success': True, **evaluation_jobs.describe(job)})
+
+@app.route('/api/evaluate/<job_id>/result')
+def api_evaluate_result(job_id):
+    """Final evaluation summary and logs of a finished job"""
+    job = evaluation_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    if job['status'] not in EvaluationJobs.FINISHED:
+        return jsonify({'success': False, 'status': job['status'], 'error': 'Job has not finished'}), 409
+    
+    return jsonify({
+        'success': job['status'] == 'completed',
+        'status': job['status'],
+        'evaluation': job['result'],
+        'error': job['error'],
+        'logs': job['capture'].logs
+    })
+
+@app.route('/api/evaluate/<job_id>/cancel', methods=['POST'])
+def api_evaluate_cancel(job_id):
+    """Cancel a queued or running evaluation job"""
+    job = evaluation_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({'success': True, 'job_id': job_id, 'status': job['status']})
 
 @app.route('/api/logs')
 def api_logs():
-    """Get current terminal logs"""
+    """Get recent terminal logs across all requests"""
+    logs = list(recent_logs)
     return jsonify({
-        'logs': terminal_capture.logs,
-        'count': len(terminal_capture.logs)
+        'logs': logs,
+        'count': len(logs)
+    })
+
+@app.route('/api/logs/stream')
+def api_logs_stream():
+    """Server-Sent Events stream of log events; resumes after Last-Event-ID on reconnect"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        after_id = int(last_event_id)
+    except (TypeError, ValueError):
+        # New subscribers only get events from now on; /api/logs has the current snapshot
+        after_id = log_events.last_id
+    if after_id > log_events.last_id:
+        # The id is from before a server restart; replay everything buffered since
+        after_id = 0
+    
+    def generate(after_id):
+        yield "retry: 3000\n\n"
+        while True:
+            events = log_events.wait_for_events(after_id, LOG_STREAM_KEEPALIVE)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event in events:
+                yield f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            after_id = events[-1][0]
+    
+    return Response(generate(after_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
 @app.route('/api/clear_logs', methods=['POST'])
 def api_clear_logs():
     """Clear terminal logs"""
-    terminal_capture.logs.clear()
-    terminal_capture.write("🔄 Logs cleared")
+    recent_logs.clear()
+    log_events.publish({'type': 'clear'})
+    new_capture().write("🔄 Logs cleared")
     return jsonify({'success': True})
 
 @app.route('/api/agent_status')
@@ -271,4 +593,5 @@ def agent_status():
         })
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Log capture is per request, so the server can handle requests concurrently
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)